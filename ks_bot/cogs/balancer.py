@@ -1,4 +1,5 @@
 import os
+from datetime import timedelta
 
 import discord
 from discord.ext import commands, tasks
@@ -6,6 +7,8 @@ from discord import Member, Status
 
 from ks_bot.ks_bot import KSBot
 from ks_bot.core.pubg_balancer import PUBG_Balancer
+from ks_bot.core.request_handler import RequestPriority
+from ks_bot.core.team_balancer import TeamBalancer
 from ks_bot.common.error import *
 from ks_bot.utils import *
 from typing import Union, Tuple
@@ -14,6 +17,7 @@ import asyncio
 
 class Balancer(commands.Cog):
     PUBG_APP_NAME = 'PUBG: BATTLEGROUNDS'
+    CACHED_STATS_WAIT_TIME = 0.2  # sec
 
     def __init__(self, bot: KSBot):
         self.bot = bot
@@ -23,8 +27,10 @@ class Balancer(commands.Cog):
     async def on_ready(self):
         await self.pubg_balancer.connect_db()
         self.check_member_status.start()
+        self.maintain_db.start()
 
     async def cog_unload(self):
+        self.maintain_db.cancel()
         await self.pubg_balancer.close_db()
 
     @tasks.loop(minutes=30)
@@ -32,17 +38,31 @@ class Balancer(commands.Cog):
         '''
         주기적으로 멤버가 게임을 플레이 중인지 확인하여 플레이어 정보를 업데이트합니다.
         '''
+        playing_members = {}
         for guild in self.bot.guilds:
             for member in guild.members:
                 if member.activity and member.activity.name == Balancer.PUBG_APP_NAME:
-                    player_id = self.parse_player_id(discord_member=member)
-                    player = await self.pubg_balancer._request_single_player(player_id)
-                    if not await self.pubg_balancer.is_player_exist(player.name):
-                        await self.pubg_balancer.insert_player(player)
-                    else:
-                        await self.pubg_balancer.update_player(player)
+                    playing_members[self.parse_player_id(discord_member=member)] = member
 
-                    await self.pubg_balancer.update_discord_id(player.name, member.id)
+        # 플레이 중인 멤버들을 최대 10명씩 묶어서 한 번에 조회합니다.
+        players = await self.pubg_balancer.request_players_by_id(list(playing_members), priority=RequestPriority.BACKGROUND)
+        for player in players:
+            member = playing_members.get(player.id) or playing_members.get(player.normalized_id)
+            await self.pubg_balancer.sync_player(player)
+
+            if member:
+                await self.pubg_balancer.update_discord_id(player.name, member.id)
+
+    @tasks.loop(minutes=10)
+    async def maintain_db(self):
+        '''
+        새로 저장된 매치 스탯을 리더보드에 반영하고, 한가한 시간에 오래된 매치 스탯을 정리하고 DB 파일을 조금씩 줄입니다.
+        '''
+        try:
+            await self.pubg_balancer.refresh_leaderboard()
+            await self.pubg_balancer.maintain_db()
+        except Exception as e:
+            print_error(e)
 
     def parse_discord_display_name(self, display_name: str) -> str:
         return display_name.split('|')[1].strip()
@@ -51,9 +71,26 @@ class Balancer(commands.Cog):
         if input.startswith("<@") and input.endswith(">"):
             return input.strip("<@!>")
 
+    def format_stats_age(self, age: timedelta) -> str:
+        if age < timedelta(minutes=1):
+            return f"{int(age.total_seconds())}초"
+        elif age < timedelta(hours=1):
+            return f"{int(age.total_seconds() // 60)}분"
+        elif age < timedelta(days=1):
+            return f"{int(age.total_seconds() // 3600)}시간"
+        return f"{age.days}일"
+
     def parse_player_id(self, discord_member: Member) -> str | None:
         return discord_member.activity.party['id'].split('-')[0]
 
+    async def get_member_player_name(self, discord_member: Member) -> str:
+        try:
+            return await self.pubg_balancer.get_player_name_by_discord_id(discord_id=discord_member.id)
+        except PlayerNotFoundError_Balancer:
+            if '|' in discord_member.display_name:
+                return self.parse_discord_display_name(discord_member.display_name)
+            return discord_member.display_name
+
     async def parse_command_input(self, ctx: commands.Context, input: Union[Member, str]) -> Tuple[str, str | None]:
         if input:
             discord_id = self.parse_discord_id(input)
@@ -108,23 +145,28 @@ class Balancer(commands.Cog):
     async def player_stats_score(self, ctx: commands.Context, *, input: str = None):
         # async def player_stats_score(self, ctx: commands.Context, player_name: str):
         embed_color = 0xD04848
+        message = None
 
         try:
             player_name, discord_id = await self.parse_command_input(ctx, input)
             await self.pubg_balancer.update_discord_id(player_name, discord_id)
-            stats_future = self.pubg_balancer.get_stats(player_name)
+            stats_task = asyncio.ensure_future(self.pubg_balancer.get_cached_stats(player_name))
 
-            embed = discord.Embed(
-                title="삐삑! 전투력 측정 중...", description="매치정보를 받아오는 중입니다, 잠시만 기다려주세요...", color=embed_color
-            )
-            embed.set_image(
-                url='https://lh3.googleusercontent.com/u/0/drive-viewer/AEYmBYRiFGFgeh92WnsjsTBvEi1rxCKjEpbAYq3pi5FBM_asqA6nKFIOl885D9WzQJ6dC0Fj43nAGt0KQhOvtvlr1desweLuHQ=w2560-h1271'
-            )
-            message = await ctx.send(embed=embed)
-            await asyncio.sleep(1)
+            # 저장된 점수가 있으면 바로 보여 주고, 새로 측정해야 할 때만 측정 중 화면을 띄웁니다.
+            done_tasks, _ = await asyncio.wait([stats_task], timeout=Balancer.CACHED_STATS_WAIT_TIME)
+            if not done_tasks:
+                embed = discord.Embed(
+                    title="삐삑! 전투력 측정 중...", description="매치정보를 받아오는 중입니다, 잠시만 기다려주세요...", color=embed_color
+                )
+                embed.set_image(
+                    url='https://lh3.googleusercontent.com/u/0/drive-viewer/AEYmBYRiFGFgeh92WnsjsTBvEi1rxCKjEpbAYq3pi5FBM_asqA6nKFIOl885D9WzQJ6dC0Fj43nAGt0KQhOvtvlr1desweLuHQ=w2560-h1271'
+                )
+                message = await ctx.send(embed=embed)
+                await asyncio.sleep(1)
 
             # await ctx.send(f"{player_name}의 스탯 점수는 {stats.sco re:.04f} 입니다.")
-            stats = await stats_future
+            cached_stats = await stats_task
+            stats = cached_stats.stats
             stats_description = f"**`{player_name}`**의 스탯 점수는 **`{stats.score:.04f}`** 입니다."
             if 0 < stats.score < 5:
                 new_embed = discord.Embed(
@@ -162,10 +204,102 @@ class Balancer(commands.Cog):
                 new_embed.set_image(
                     url='https://lh3.googleusercontent.com/u/0/drive-viewer/AEYmBYQ3qw-Prf9G2V758nIn1Xzx3YLe5RTCI-ibi4Q7rtYHqC8283wYpqV0oS8PkNsyjwJGJWUOjOcf_ou1T9YnQ2PMyroC_w=w2560-h1271'
                 )
-            await message.edit(embed=new_embed)
+            if cached_stats.is_stale:
+                new_embed.set_footer(text=f"{self.format_stats_age(cached_stats.age)} 전에 측정한 점수입니다. 최신 점수를 다시 측정하고 있습니다.")
+
+            if message:
+                await message.edit(embed=new_embed)
+            else:
+                await ctx.send(embed=new_embed)
         except PlayerNotFoundError_Balancer as e:
             print_error(e)
-            await message.edit(content=f"플레이어 `{player_name}`을 찾을 수 없습니다.", embed=None)
+            if message:
+                await message.edit(content=f"플레이어 `{player_name}`을 찾을 수 없습니다.", embed=None)
+            else:
+                await ctx.send(f"플레이어 `{player_name}`을 찾을 수 없습니다.")
+        except Exception as e:
+            print_error(e)
+
+    @commands.command(
+        name="밸런스",
+        help="음성 채널에 있는 멤버들을 스탯 점수가 비슷한 팀으로 나눕니다.",
+        description="음성 채널에 있는 멤버들을 스탯 점수가 비슷한 팀으로 나눕니다. 팀 인원을 함께 입력할 수 있습니다. (기본 4명)",
+        aliases=['팀', '팀나누기', 'balance'],
+    )
+    async def balance_teams(self, ctx: commands.Context, team_size: int = TeamBalancer.DEFAULT_TEAM_SIZE):
+        embed_color = 0xD04848
+
+        if not ctx.author.voice or not ctx.author.voice.channel:
+            await ctx.send("음성 채널에 참가한 뒤 다시 시도해주세요.")
+            return
+
+        discord_members = [discord_member for discord_member in ctx.author.voice.channel.members if not discord_member.bot]
+        embed = discord.Embed(
+            title="삐삑! 팀 나누는 중...", description=f"{len(discord_members)}명의 전투력을 측정하는 중입니다, 잠시만 기다려주세요...", color=embed_color
+        )
+        message = await ctx.send(embed=embed)
+
+        try:
+            player_names = [await self.get_member_player_name(discord_member) for discord_member in discord_members]
+            result, failed_players = await self.pubg_balancer.balance_teams(player_names, team_size=team_size)
+
+            new_embed = discord.Embed(title="팀 나누기 완료!", description=f"팀 점수 차이: **`{result.spread:.04f}`**", color=embed_color)
+            for idx, team in enumerate(result.teams):
+                new_embed.add_field(
+                    name=f"{idx + 1}팀 ({team.score:.02f})", value='\n'.join([f"`{player_name}`" for player_name in team.player_names]), inline=True
+                )
+            if failed_players:
+                new_embed.set_footer(text=f"점수를 측정하지 못해 평균 점수로 배치한 플레이어: {', '.join(failed_players)}")
+            await message.edit(embed=new_embed)
+        except TeamSizeError_Balancer as e:
+            print_error(e)
+            await message.edit(content=f"{len(discord_members)}명을 {team_size}명씩 팀으로 나눌 수 없습니다.", embed=None)
+        except Exception as e:
+            print_error(e)
+
+    @commands.command(
+        name="순위",
+        help="서버 멤버들의 스탯 점수 순위를 출력합니다.",
+        description="서버 멤버들의 스탯 점수 순위를 출력합니다. 페이지 번호나 유저를 함께 입력할 수 있습니다.",
+        aliases=['랭킹', '리더보드', 'leaderboard'],
+    )
+    async def leaderboard(self, ctx: commands.Context, *, input: str = None):
+        embed_color = 0xD04848
+
+        # 리더보드 인덱스와 DB만 사용하므로 API를 호출하지 않습니다.
+        try:
+            page = int(input) if input and input.isdigit() else 1
+            if input and not input.isdigit():
+                discord_id = self.parse_discord_id(input)
+                discord_member = ctx.guild.get_member(int(discord_id)) if discord_id else None
+                player_name = await self.get_member_player_name(discord_member) if discord_member else input
+            else:
+                player_name = await self.get_member_player_name(ctx.author)
+
+            leaderboard_ranks, page_num = await self.pubg_balancer.get_leaderboard_page(page)
+            page = min(max(page, 1), page_num)
+            embed = discord.Embed(
+                title=f"스탯 점수 순위 ({page}/{page_num})",
+                description='\n'.join(
+                    [
+                        f"**{leaderboard_rank.rank}.** `{leaderboard_rank.entry.player_name}` **`{leaderboard_rank.entry.score:.04f}`**"
+                        for leaderboard_rank in leaderboard_ranks
+                    ]
+                )
+                or "아직 순위에 오른 플레이어가 없습니다.",
+                color=embed_color,
+            )
+
+            try:
+                player_rank = await self.pubg_balancer.get_leaderboard_rank(player_name)
+                embed.set_footer(
+                    text=f"{player_name}: {player_rank.rank}위 / {player_rank.player_num}명 (상위 {player_rank.top_ratio:.1f}%, 점수 {player_rank.entry.score:.04f})"
+                )
+            except LeaderboardEntryNotFoundError_Balancer:
+                embed.set_footer(
+                    text=f"{player_name}은(는) 아직 순위에 없습니다. 스쿼드 매치를 {int(PUBG_Balancer.DEFAULT_MAX_MATCH_NUM / 2)}판 이상 플레이하면 순위에 오릅니다."
+                )
+            await ctx.send(embed=embed)
         except Exception as e:
             print_error(e)
 
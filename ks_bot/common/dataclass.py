@@ -1,9 +1,10 @@
 from dataclasses import dataclass, field
+import json
 from .enum import GameMode, MatchType, Tier
 from .common import *
 from .error import *
 from datetime import datetime
-from typing import Union
+from typing import Dict, List, Set, Union
 
 
 @dataclass
@@ -18,41 +19,58 @@ class Match:
     date: datetime = field(default_factory=unix_time_start)
     participants: list = field(default_factory=list)
 
+    def _parse_participant_stats(self, participant: dict) -> 'PlayerMatchStats':
+        player_stats_info = participant['attributes']['stats']
+        return PlayerMatchStats(
+            player_name=player_stats_info['name'],
+            match_id=self.id,
+            is_custom_match=self.is_custom_match,
+            game_mode=self.game_mode,
+            match_type=self.match_type,
+            DBNOs=player_stats_info['DBNOs'],
+            boosts=player_stats_info['boosts'],
+            damage_dealt=player_stats_info['damageDealt'],
+            death_type=player_stats_info['deathType'],
+            headshot_kills=player_stats_info['headshotKills'],
+            heals=player_stats_info['heals'],
+            win_place=player_stats_info['winPlace'],
+            kill_place=player_stats_info['killPlace'],
+            kill_streaks=player_stats_info['killStreaks'],
+            kills=player_stats_info['kills'],
+            assists=player_stats_info['assists'],
+            longest_kill=player_stats_info['longestKill'],
+            revives=player_stats_info['revives'],
+            ride_distance=player_stats_info['rideDistance'],
+            swim_distance=player_stats_info['swimDistance'],
+            walk_distance=player_stats_info['walkDistance'],
+            road_kills=player_stats_info['roadKills'],
+            team_kills=player_stats_info['teamKills'],
+            time_survived=player_stats_info['timeSurvived'],
+            vehicle_destroys=player_stats_info['vehicleDestroys'],
+            weapons_acquired=player_stats_info['weaponsAcquired'],
+        )
+
+    @property
+    def participant_names(self) -> List[str]:
+        return [participant['attributes']['stats']['name'] for participant in self.participants]
+
     def get_match_by_player_name(self, player_name: str) -> Union['PlayerMatchStats', Error_Balancer]:
         for participant in self.participants:
             if participant['attributes']['stats']['name'] == player_name:
-                player_stats_info = participant['attributes']['stats']
-                return PlayerMatchStats(
-                    player_name=player_name,
-                    match_id=self.id,
-                    is_custom_match=self.is_custom_match,
-                    game_mode=self.game_mode,
-                    match_type=self.match_type,
-                    DBNOs=player_stats_info['DBNOs'],
-                    boosts=player_stats_info['boosts'],
-                    damage_dealt=player_stats_info['damageDealt'],
-                    death_type=player_stats_info['deathType'],
-                    headshot_kills=player_stats_info['headshotKills'],
-                    heals=player_stats_info['heals'],
-                    win_place=player_stats_info['winPlace'],
-                    kill_place=player_stats_info['killPlace'],
-                    kill_streaks=player_stats_info['killStreaks'],
-                    kills=player_stats_info['kills'],
-                    assists=player_stats_info['assists'],
-                    longest_kill=player_stats_info['longestKill'],
-                    revives=player_stats_info['revives'],
-                    ride_distance=player_stats_info['rideDistance'],
-                    swim_distance=player_stats_info['swimDistance'],
-                    walk_distance=player_stats_info['walkDistance'],
-                    road_kills=player_stats_info['roadKills'],
-                    team_kills=player_stats_info['teamKills'],
-                    time_survived=player_stats_info['timeSurvived'],
-                    vehicle_destroys=player_stats_info['vehicleDestroys'],
-                    weapons_acquired=player_stats_info['weaponsAcquired'],
-                )
+                return self._parse_participant_stats(participant)
         else:
             return PlayerMatchStatsNotFoundError_Balancer(f"Player match stats not found for {player_name} in match {self.id}.")
 
+    def get_player_match_stats_list(self, player_names: Set[str] = None) -> List['PlayerMatchStats']:
+        '''
+        매치에 참가한 모든 플레이어의 스탯을 반환합니다. `player_names`가 주어지면 해당 플레이어들의 스탯만 반환합니다.
+        '''
+        return [
+            self._parse_participant_stats(participant)
+            for participant in self.participants
+            if player_names is None or participant['attributes']['stats']['name'] in player_names
+        ]
+
 
 @dataclass
 class Player:
@@ -66,6 +84,32 @@ class Player:
     normal_stats: dict = field(default_factory=dict)
     match_list: list = field(default_factory=list)
 
+    @classmethod
+    def from_lazy_json_fields(cls, lazy_json_fields: Dict[str, str], **kwargs) -> 'Player':
+        '''
+        `lazy_json_fields`의 필드는 JSON 문자열로 보관했다가 처음 접근할 때 파싱합니다. DB에서 읽은 스탯처럼 대부분 사용되지 않는 필드에 사용합니다.
+        '''
+        player = cls(**kwargs)
+        for name in lazy_json_fields:
+            delattr(player, name)
+        player._lazy_json_fields = dict(lazy_json_fields)
+        return player
+
+    def __getattr__(self, name: str):
+        # 인스턴스에 없는 속성에 접근할 때만 호출되므로, 아직 파싱하지 않은 필드일 때만 JSON을 파싱합니다.
+        lazy_json_fields = self.__dict__.get('_lazy_json_fields')
+        if lazy_json_fields and name in lazy_json_fields:
+            value = json.loads(lazy_json_fields.pop(name))
+            setattr(self, name, value)
+            return value
+        raise AttributeError(f"'{type(self).__name__}' object has no attribute '{name}'")
+
+    def get_raw_json_field(self, name: str) -> Union[str, None]:
+        '''
+        아직 파싱하지 않은 필드라면 JSON 문자열을 그대로 반환하고, 그렇지 않으면 None을 반환합니다.
+        '''
+        return self.__dict__.get('_lazy_json_fields', {}).get(name)
+
 
 @dataclass
 class PlayerMatchStats:
@@ -50,9 +50,32 @@ class AlreadyExistError_Balancer(Error_Balancer):
 
 
 class APIRequestError_Balancer(Error_Balancer):
-    def __init__(self):
+    def __init__(self, reason: str = ''):
+        super().__init__()
+        self.reason = reason
+        self.message = f'[{self.__class__.__name__}] API request failed.' + (f' {self.reason}' if self.reason else '')
+
+    def __str__(self):
+        return self.message
+
+
+class TeamSizeError_Balancer(Error_Balancer):
+    def __init__(self, player_num: int = 0, team_num: int = 0, team_size: int = 0):
         super().__init__()
-        self.message = f'[{self.__class__.__name__}] API request failed.'
+        self.player_num = player_num
+        self.team_num = team_num
+        self.team_size = team_size
+        self.message = f'[{self.__class__.__name__}] Cannot split {self.player_num} players into {self.team_num} teams of up to {self.team_size} players.'
+
+    def __str__(self):
+        return self.message
+
+
+class LeaderboardEntryNotFoundError_Balancer(Error_Balancer):
+    def __init__(self, player_name: str = ''):
+        super().__init__()
+        self.player_name = player_name
+        self.message = f'[{self.__class__.__name__}] Player is not on the leaderboard: {self.player_name}.'
 
     def __str__(self):
         return self.message
@@ -1,14 +1,74 @@
-from dataclasses import dataclass, field, fields, is_dataclass, asdict
+from contextlib import asynccontextmanager, contextmanager
+from dataclasses import dataclass, field, fields, is_dataclass
 from datetime import datetime, timedelta
+from enum import Enum
+from operator import attrgetter
+from pathlib import Path
+import asyncio
 import json
 import os
 
 import aiosqlite
+import sqlite3
+from termcolor import cprint
 from ks_bot.common.dataclass import *
 from ks_bot.common.common import *
 from ks_bot.common.error import *
+from ks_bot.core.leaderboard import LeaderboardEntry
+from ks_bot.core.lru_cache import LRUCache, LRUCacheStats
+from ks_bot.core.stats_scorer import RollingStats
 from ks_bot.utils import *
-from typing import Any
+from typing import Any, Callable, Dict, Iterable, List, Set, Tuple, Union
+
+
+class FreshnessEntity(Enum):
+    # value는 해당 데이터의 갱신 시각을 저장하는 players 테이블의 컬럼 이름입니다.
+    PLAYER = 'updated_date'
+    MATCH_LIST = 'match_list_updated_date'
+    RANKED_STATS = 'rank_stats_updated_date'
+
+
+@dataclass
+class FreshnessPolicy:
+    player: timedelta = timedelta(days=7)
+    match_list: timedelta = timedelta(minutes=30)
+    ranked_stats: timedelta = timedelta(hours=1)
+
+    def get_ttl(self, entity: FreshnessEntity) -> timedelta:
+        return getattr(self, entity.name.lower())
+
+
+@dataclass
+class RetentionPolicy:
+    '''
+    player_match_stats 테이블에 남겨 둘 매치 스탯의 범위입니다. 플레이어마다 (게임 모드, 매치 타입)별로 최신 `max_match_num`개를 남기고,
+    `max_age`가 주어지면 그보다 오래된 매치도 정리합니다. `archive_db_file`이 주어지면 지우기 전에 해당 DB 파일로 옮깁니다.
+    '''
+
+    max_match_num: int = 100
+    max_age: timedelta = None
+    archive_db_file: str = None
+
+
+@dataclass
+class SQLiteTuning:
+    '''
+    SQLite 연결마다 적용되는 PRAGMA 설정입니다. WAL 모드에서는 `synchronous = NORMAL`이어도 커밋된 데이터가 손상되지 않으며,
+    체크포인트 시점에만 fsync가 발생합니다.
+    '''
+
+    synchronous: str = 'NORMAL'
+    cache_size: int = -16000  # 음수이면 KiB 단위입니다. (약 16MB)
+    mmap_size: int = 256 * 1024 * 1024
+    busy_timeout: int = 5000  # ms
+
+    def get_pragma_queries(self) -> List[str]:
+        return [
+            f"PRAGMA synchronous = {self.synchronous};",
+            f"PRAGMA cache_size = {self.cache_size};",
+            f"PRAGMA mmap_size = {self.mmap_size};",
+            f"PRAGMA busy_timeout = {self.busy_timeout};",
+        ]
 
 
 @dataclass
@@ -16,6 +76,9 @@ class Player_DB:
     player: Player = field(default_factory=Player)
     updated_date: datetime = field(default_factory=unix_time_start)
     discord_id: str = ''
+    sync_cursor: str = ''  # 점수 계산을 위해 처리가 끝난 가장 최근 매치 id
+    match_list_updated_date: datetime = field(default_factory=unix_time_start)
+    rank_stats_updated_date: datetime = field(default_factory=unix_time_start)
 
 
 @dataclass
@@ -24,40 +87,83 @@ class PlayerMatchStats_DB:
     updated_date: datetime = field(default_factory=unix_time_start)
 
 
-def create_table_query_for_dataclass_with_constraints(dataclass_type, table_name: str, unique_fields=None, foreign_keys=None):
-    column_definitions = []
+@dataclass
+class PlayerMatch_DB:
+    # position은 플레이어의 가장 오래된 매치가 0이며, 새 매치는 뒤에 이어 붙습니다.
+    player_id: str = ''
+    match_id: str = ''
+    position: int = 0
+
+
+@dataclass
+class PlayerRollingStats_DB:
+    rolling_stats: RollingStats = field(default_factory=RollingStats)
+    updated_date: datetime = field(default_factory=unix_time_start)
+
+
+@dataclass
+class LeaderboardEntry_DB:
+    leaderboard_entry: LeaderboardEntry = field(default_factory=LeaderboardEntry)
+    updated_date: datetime = field(default_factory=unix_time_start)
+
+
+@dataclass
+class LeaderboardWatermark_DB:
+    # 게임 모드별로 리더보드에 반영이 끝난 가장 큰 player_match_stats.seq
+    game_mode: GameMode = GameMode.UNDEFINED
+    last_seq: int = 0
+    updated_date: datetime = field(default_factory=unix_time_start)
+
+
+@dataclass
+class Match_DB:
+    id: str = ''
+    is_custom_match: bool = False
+    game_mode: GameMode = GameMode.UNDEFINED
+    match_type: MatchType = MatchType.UNDEFINED
+    map_name: str = ''
+    duration: int = 0
+    season_state: str = ''
+    date: datetime = field(default_factory=unix_time_start)
+    updated_date: datetime = field(default_factory=unix_time_start)
+
+
+def get_sqlite_column_type(field_type) -> str:
+    if field_type in [int, bool]:
+        return "INTEGER"
+    elif field_type == float:
+        return "REAL"
+    elif field_type == datetime:
+        return "DATETIME"
+    return "TEXT"
+
+
+def get_columns_for_dataclass(dataclass_type) -> List[Tuple[str, str]]:
+    '''
+    데이터클래스를 테이블로 저장할 때의 (컬럼 이름, 컬럼 타입) 목록을 반환합니다. 내부 데이터클래스의 필드는 펼쳐서 컬럼으로 만듭니다.
+    '''
+    columns = []
     # 데이터클래스 필드를 순회합니다.
     for field in fields(dataclass_type):
         # 내부 데이터클래스의 필드를 처리합니다.
         if is_dataclass(field.type):
             for nested_field in fields(field.type):
-                column_name = nested_field.name
-                column_type = "TEXT"
-                if nested_field.type in [int, bool]:
-                    column_type = "INTEGER"
-                elif nested_field.type == float:
-                    column_type = "REAL"
-                elif nested_field.type == datetime:
-                    column_type = "DATETIME"
-
-                column_definition = f"{column_name} {column_type}"
-                if unique_fields and column_name in unique_fields:
-                    column_definition += " UNIQUE"
-                column_definitions.append(column_definition)
+                columns.append((nested_field.name, get_sqlite_column_type(nested_field.type)))
         else:
-            column_name = field.name
-            column_type = "TEXT"
-            if field.type == int:
-                column_type = "INTEGER"
-            elif field.type == float:
-                column_type = "REAL"
-            elif field.type == datetime:
-                column_type = "DATETIME"
-
-            column_definition = f"{column_name} {column_type}"
-            if unique_fields and column_name in unique_fields:
-                column_definition += " UNIQUE"
-            column_definitions.append(column_definition)
+            columns.append((field.name, get_sqlite_column_type(field.type)))
+    return columns
+
+
+def create_table_query_for_dataclass_with_constraints(dataclass_type, table_name: str, unique_fields=None, foreign_keys=None, autoincrement_key: str = None):
+    column_definitions = []
+    # 데이터클래스에 없는 AUTOINCREMENT 키를 맨 앞에 추가합니다. 값이 재사용되지 않고 VACUUM에도 바뀌지 않으므로 저장 순서를 나타낼 수 있습니다.
+    if autoincrement_key:
+        column_definitions.append(f"{autoincrement_key} INTEGER PRIMARY KEY AUTOINCREMENT")
+    for column_name, column_type in get_columns_for_dataclass(dataclass_type):
+        column_definition = f"{column_name} {column_type}"
+        if unique_fields and column_name in unique_fields:
+            column_definition += " UNIQUE"
+        column_definitions.append(column_definition)
 
     # 외래 키 제약 조건을 추가합니다.
     if foreign_keys:
@@ -69,16 +175,287 @@ def create_table_query_for_dataclass_with_constraints(dataclass_type, table_name
     return create_table_sql
 
 
+def create_index_queries_for_dataclass(dataclass_type, table_name: str, indexes=None, unique_indexes=None) -> Dict[str, str]:
+    '''
+    `create_table_query_for_dataclass_with_constraints`로 생성한 테이블에 대한 인덱스 생성 쿼리를 {인덱스 이름: 쿼리} 형태로 반환합니다.
+    인덱스 이름은 `idx_{테이블}_{컬럼들}` (유니크 인덱스는 `uq_` 접두사) 형식으로 생성됩니다.
+    '''
+    column_names = [column_name for column_name, _ in get_columns_for_dataclass(dataclass_type)]
+
+    index_queries = {}
+    for index_fields, is_unique in [(index_fields, False) for index_fields in indexes or []] + [(index_fields, True) for index_fields in unique_indexes or []]:
+        for index_field in index_fields:
+            if index_field not in column_names:
+                raise ValueError(f"'{index_field}' is not a column of {table_name}.")
+
+        index_name = f"{'uq' if is_unique else 'idx'}_{table_name}_{'_'.join(index_fields)}"
+        index_queries[index_name] = (
+            f"CREATE {'UNIQUE ' if is_unique else ''}INDEX IF NOT EXISTS {index_name} ON {table_name} ({', '.join(index_fields)});"
+        )
+    return index_queries
+
+
+@dataclass
+class Migration:
+    '''
+    스키마 버전 하나를 올리는 마이그레이션입니다. `migrate`와 `backfill`은 SQLiteDBHandler의 메서드 이름입니다.
+
+    `migrate`는 버전 기록과 함께 하나의 트랜잭션 안에서 실행됩니다. `backfill`은 배치 하나를 처리하고 처리한 행 수를 반환하며,
+    0을 반환할 때까지 배치마다 커밋하면서 반복 실행되므로 큰 테이블도 쓰기를 오래 막지 않습니다.
+    VACUUM처럼 트랜잭션 안에서 실행할 수 없는 작업은 `transactional`을 False로 지정하며, 이때 버전은 작업이 끝난 뒤 따로 기록합니다.
+    중간에 종료되어도 다시 실행할 수 있도록 모든 단계는 여러 번 실행해도 결과가 같아야 합니다.
+    '''
+
+    version: int
+    description: str
+    migrate: str = ''
+    backfill: str = ''
+    transactional: bool = True
+
+
+class RowCodec:
+    '''
+    데이터클래스와 SQLite 행 사이의 변환 방법을 필드 타입으로부터 한 번만 계산해 두는 코덱입니다.
+    컬럼 순서와 SQL 문자열, 필드별 인코딩/디코딩 함수를 미리 만들어 두므로 행마다 `fields()`나 타입 검사를 반복하지 않습니다.
+    '''
+
+    def __init__(self, dataclass_type, exclude_fields: Iterable[str] = ()):
+        self.dataclass_type = dataclass_type
+        self.fields = [field for field in fields(dataclass_type) if field.name not in exclude_fields]
+        self.column_names = [field.name for field in self.fields]
+        self.columns_str = ', '.join(self.column_names)
+        self._encoders = [self._make_encoder(field.name, field.type) for field in self.fields]
+        self._decoders = [self._make_decoder(field.type) for field in self.fields]
+        self._queries: Dict[tuple, str] = {}
+
+    def _make_encoder(self, name: str, field_type) -> Callable[[Any], Any]:
+        get_value = attrgetter(name)
+        if isinstance(field_type, type) and issubclass(field_type, Enum):
+            return lambda instance: get_value(instance).value
+        elif field_type is bool:
+            return lambda instance: int(get_value(instance))
+        elif field_type in (list, dict):
+            if hasattr(self.dataclass_type, 'get_raw_json_field'):
+                # DB에서 읽은 뒤 접근하지 않은 JSON 필드는 파싱 없이 그대로 저장합니다.
+                return lambda instance: instance.get_raw_json_field(name) or json.dumps(get_value(instance))
+            return lambda instance: json.dumps(get_value(instance))
+        return get_value
+
+    def _make_decoder(self, field_type) -> Union[Callable[[Any], Any], None]:
+        if isinstance(field_type, type) and issubclass(field_type, Enum):
+            return field_type
+        elif field_type is bool:
+            return lambda value: str(value) == '1'
+        elif field_type in (list, dict):
+            return json.loads
+        elif field_type is datetime:
+            return lambda value: parse_utc_to_datetime(value, Timezone.KST) if isinstance(value, str) and value else value or None
+        return None
+
+    def encode(self, instance: Any) -> List[Any]:
+        return [encoder(instance) for encoder in self._encoders]
+
+    def decode(self, row: tuple) -> Any:
+        '''
+        `columns_str` 순서로 조회한 행을 데이터클래스로 변환합니다.
+        '''
+        return self.dataclass_type(
+            **{field.name: value if decoder is None else decoder(value) for field, decoder, value in zip(self.fields, self._decoders, row)}
+        )
+
+    def get_insert_query(self, table_name: str, extra_column_names: Iterable[str] = (), conflict_clause: str = '') -> str:
+        key = ('insert', table_name, tuple(extra_column_names), conflict_clause)
+        if key not in self._queries:
+            column_names = [*self.column_names, *extra_column_names]
+            placeholders_str = ', '.join(['?' for _ in column_names])
+            self._queries[key] = f"INSERT INTO {table_name} ({', '.join(column_names)}) VALUES ({placeholders_str}){conflict_clause}"
+        return self._queries[key]
+
+    def get_update_query(self, table_name: str, identifier_fields: Iterable[str], extra_column_names: Iterable[str] = ()) -> str:
+        key = ('update', table_name, tuple(identifier_fields), tuple(extra_column_names))
+        if key not in self._queries:
+            update_columns_str = ', '.join([f"{column_name} = ?" for column_name in [*self.column_names, *extra_column_names]])
+            identifier_str = ' AND '.join([f"{identifier_field} = ?" for identifier_field in identifier_fields])
+            self._queries[key] = f"UPDATE {table_name} SET {update_columns_str} WHERE {identifier_str}"
+        return self._queries[key]
+
+
 class SQLiteDBHandler:
     SQL_CREATE_PLAYERS_TABLE = create_table_query_for_dataclass_with_constraints(Player_DB, "players", unique_fields=["normalized_id", "name"])
     SQL_CREATE_PLAYER_MATCH_STATS_TABLE = create_table_query_for_dataclass_with_constraints(
-        PlayerMatchStats_DB, "player_match_stats", foreign_keys=[{"field": "player_name", "references": "players", "ref_field": "name"}]
+        PlayerMatchStats_DB,
+        "player_match_stats",
+        foreign_keys=[{"field": "player_name", "references": "players", "ref_field": "name"}],
+        autoincrement_key="seq",
+    )
+    SQL_CREATE_MATCHES_TABLE = create_table_query_for_dataclass_with_constraints(Match_DB, "matches", unique_fields=["id"])
+    SQL_CREATE_PLAYER_MATCHES_TABLE = create_table_query_for_dataclass_with_constraints(
+        PlayerMatch_DB, "player_matches", foreign_keys=[{"field": "player_id", "references": "players", "ref_field": "normalized_id"}]
+    )
+    SQL_CREATE_PLAYER_ROLLING_STATS_TABLE = create_table_query_for_dataclass_with_constraints(
+        PlayerRollingStats_DB, "player_rolling_stats", foreign_keys=[{"field": "player_name", "references": "players", "ref_field": "name"}]
+    )
+    SQL_CREATE_LEADERBOARD_TABLE = create_table_query_for_dataclass_with_constraints(
+        LeaderboardEntry_DB, "leaderboard", foreign_keys=[{"field": "player_name", "references": "players", "ref_field": "name"}]
+    )
+    SQL_CREATE_LEADERBOARD_WATERMARK_TABLE = create_table_query_for_dataclass_with_constraints(
+        LeaderboardWatermark_DB, "leaderboard_watermark", unique_fields=["game_mode"]
+    )
+    SQL_CREATE_PLAYERS_INDEXES = create_index_queries_for_dataclass(Player_DB, "players", indexes=[["discord_id"]])
+    SQL_CREATE_PLAYER_MATCH_STATS_INDEXES = create_index_queries_for_dataclass(
+        PlayerMatchStats_DB, "player_match_stats", unique_indexes=[["player_name", "match_id"]]
+    )
+    SQL_CREATE_MATCHES_INDEXES = create_index_queries_for_dataclass(Match_DB, "matches", indexes=[["game_mode", "match_type", "date"]])
+    SQL_CREATE_PLAYER_MATCHES_INDEXES = create_index_queries_for_dataclass(
+        PlayerMatch_DB, "player_matches", indexes=[["player_id", "position"]], unique_indexes=[["player_id", "match_id"]]
+    )
+    SQL_CREATE_PLAYER_ROLLING_STATS_INDEXES = create_index_queries_for_dataclass(
+        PlayerRollingStats_DB, "player_rolling_stats", unique_indexes=[["player_name", "game_mode"]]
+    )
+    SQL_CREATE_LEADERBOARD_INDEXES = create_index_queries_for_dataclass(LeaderboardEntry_DB, "leaderboard", unique_indexes=[["player_name", "game_mode"]])
+    PLAYER_MATCH_STATS_UNIQUE_INDEX = "uq_player_match_stats_player_name_match_id"
+    # 인덱스 이름 규칙이 정해지기 전에 만들어진 인덱스입니다. 같은 컬럼의 인덱스가 다시 만들어지므로 삭제합니다.
+    SQL_DROP_LEGACY_INDEXES = [
+        "DROP INDEX IF EXISTS idx_matches_mode_type_date;",
+        "DROP INDEX IF EXISTS uq_player_match_stats_player_match;",
+    ]
+    # 유니크 인덱스가 생기기 전에 중복 저장된 (player_name, match_id) 행은 가장 마지막에 저장된 행만 남깁니다.
+    SQL_DEDUPE_PLAYER_MATCH_STATS = (
+        "DELETE FROM player_match_stats WHERE rowid NOT IN (SELECT MAX(rowid) FROM player_match_stats GROUP BY player_name, match_id);"
     )
     SQL_DROP_PLAYERS_TABLE = "DROP TABLE IF EXISTS players;"
     SQL_DROP_PLAYER_MATCH_STATS_TABLE = "DROP TABLE IF EXISTS player_match_stats;"
+    SQL_DROP_MATCHES_TABLE = "DROP TABLE IF EXISTS matches;"
+    SQL_DROP_PLAYER_MATCHES_TABLE = "DROP TABLE IF EXISTS player_matches;"
+    SQL_DROP_PLAYER_ROLLING_STATS_TABLE = "DROP TABLE IF EXISTS player_rolling_stats;"
+    SQL_DROP_LEADERBOARD_TABLE = "DROP TABLE IF EXISTS leaderboard;"
+    SQL_DROP_LEADERBOARD_WATERMARK_TABLE = "DROP TABLE IF EXISTS leaderboard_watermark;"
+    SQL_CREATE_SCHEMA_VERSION_TABLE = "CREATE TABLE IF NOT EXISTS schema_version (version INTEGER PRIMARY KEY, description TEXT, applied_date DATETIME);"
+    SQL_DROP_SCHEMA_VERSION_TABLE = "DROP TABLE IF EXISTS schema_version;"
+
+    # 데이터클래스에 필드가 추가되면 `_migration_add_missing_columns`를 실행하는 마이그레이션을 새 버전으로 추가합니다.
+    MIGRATIONS = [
+        Migration(1, 'create tables', migrate='_migration_create_tables'),
+        Migration(2, 'add columns missing from tables created by older versions', migrate='_migration_add_missing_columns'),
+        Migration(3, 'remove duplicated player match stats and create indexes', migrate='_migration_create_indexes'),
+        Migration(4, 'move players.match_list JSON into player_matches', backfill='_backfill_player_matches'),
+        Migration(5, 'enable incremental auto vacuum', migrate='_migration_enable_incremental_vacuum', transactional=False),
+        Migration(6, 'create player_rolling_stats', migrate='_migration_create_player_rolling_stats'),
+        Migration(7, 'create leaderboard', migrate='_migration_create_leaderboard'),
+        Migration(8, 'add player_match_stats.seq and rebuild player_rolling_stats', migrate='_migration_add_player_match_stats_seq'),
+        Migration(9, 'create leaderboard_watermark', migrate='_migration_create_leaderboard_watermark'),
+    ]
+    MIGRATION_BATCH_SIZE = 500
+
+    SQL_CREATE_ARCHIVE_PLAYER_MATCH_STATS_TABLE = create_table_query_for_dataclass_with_constraints(PlayerMatchStats_DB, "archive.player_match_stats")
+    SQL_CREATE_ARCHIVE_PLAYER_MATCH_STATS_INDEX = (
+        "CREATE UNIQUE INDEX IF NOT EXISTS archive.uq_player_match_stats_player_name_match_id ON player_match_stats (player_name, match_id);"
+    )
+    # 플레이어의 (게임 모드, 매치 타입)별로 최신 매치부터 순위를 매겨, 보관 개수를 넘었거나 기준 시각보다 오래된 행을 찾습니다.
+    SQL_SELECT_PRUNABLE_PLAYER_MATCH_STATS = (
+        "SELECT rowid, player_name, match_id FROM ("
+        "SELECT pms.rowid AS rowid, pms.player_name AS player_name, pms.match_id AS match_id, COALESCE(m.date, pms.updated_date) AS date, "
+        "ROW_NUMBER() OVER (PARTITION BY pms.player_name, pms.game_mode, pms.match_type ORDER BY m.date DESC) AS match_rank "
+        "FROM player_match_stats pms LEFT JOIN matches m ON m.id = pms.match_id"
+        ") WHERE match_rank > ? OR date < ?"
+    )
+    # 지워진 매치가 window에 들어 있는 롤링 스탯은 지우고, 다음 점수 계산 때 남아 있는 매치로 다시 만듭니다.
+    SQL_DELETE_ROLLING_STATS_WITH_MATCH = (
+        "DELETE FROM player_rolling_stats WHERE player_name = ? "
+        "AND EXISTS (SELECT 1 FROM json_each(player_rolling_stats.window_matches) WHERE json_extract(value, '$[0]') = ?)"
+    )
+    PRUNE_BATCH_SIZE = 500
+    # 리더보드 갱신 기준점 이후에 매치 스탯이 저장되었거나 롤링 스탯이 지워진 리더보드 플레이어의, 롤링 스탯에 반영되지 않은 매치 스탯을 플레이어별로 모아 조회합니다.
+    SQL_SELECT_UNSCORED_PLAYER_MATCH_STATS_ROWS = (
+        "SELECT pms.player_name, pms.seq, pms.match_id, m.date, m.game_mode, m.match_type, pms.win_place, pms.damage_dealt, pms.kills, pms.assists "
+        "FROM player_match_stats pms CROSS JOIN matches m ON m.id = pms.match_id "
+        "WHERE pms.player_name IN ("
+        "SELECT player_name FROM player_match_stats WHERE seq > ? "
+        "UNION SELECT l.player_name FROM leaderboard l WHERE l.game_mode = ? "
+        "AND NOT EXISTS (SELECT 1 FROM player_rolling_stats r WHERE r.player_name = l.player_name AND r.game_mode = l.game_mode)"
+        ") AND pms.seq > COALESCE((SELECT r.last_seq FROM player_rolling_stats r WHERE r.player_name = pms.player_name AND r.game_mode = ?), 0) "
+        "ORDER BY pms.player_name, pms.seq"
+    )
 
-    def __init__(self, db_file: str):
+    # players 테이블에서 읽을 때 처음 접근하기 전까지 파싱하지 않는 JSON 컬럼입니다.
+    PLAYER_LAZY_JSON_COLUMNS = ['rank_stats', 'normal_stats']
+    # 플레이어 API가 아니라 스탯 API로 채우는 컬럼입니다. 플레이어 API 응답의 Player에는 빈 값으로 들어 있습니다.
+    PLAYER_STATS_COLUMNS = ['rank_stats', 'normal_stats']
+
+    # HOT_QUERIES가 조회하는 컬럼입니다. 조회한 행은 같은 컬럼 순서의 RowCodec으로 디코딩합니다.
+    PLAYER_DB_COLUMNS_STR = ', '.join(RowCodec(Player, ['match_list']).column_names + [field.name for field in fields(Player_DB) if field.name != 'player'])
+    PLAYER_MATCH_STATS_COLUMNS_STR = RowCodec(PlayerMatchStats).columns_str
+    ROLLING_STATS_COLUMNS_STR = RowCodec(RollingStats).columns_str
+
+    # 봇이 자주 실행하는 조회 쿼리이며, 각 조회 메서드는 이 쿼리를 그대로 실행합니다. open()에서 EXPLAIN QUERY PLAN으로 모든 쿼리가 인덱스를 사용하는지 확인합니다.
+    # IN 절은 placeholder 하나로 적어 두고, 실행할 때 `_expand_in_clause`로 값 개수만큼 늘립니다.
+    HOT_QUERIES = {
+        'get_player_by_normalized_id': f"SELECT {PLAYER_DB_COLUMNS_STR} FROM players WHERE normalized_id = ?",
+        'get_player_by_name': f"SELECT {PLAYER_DB_COLUMNS_STR} FROM players WHERE name = ?",
+        'get_player_match_list': "SELECT match_id FROM player_matches WHERE player_id = ? ORDER BY position DESC",
+        'get_player_name_by_discord_id': "SELECT name FROM players WHERE discord_id = ?",
+        'get_existing_player_names': "SELECT name FROM players WHERE name IN (?)",
+        'get_player_match_stats': f"SELECT {PLAYER_MATCH_STATS_COLUMNS_STR} FROM player_match_stats WHERE player_name = ? AND match_id = ?",
+        'is_player_match_stats_exists': "SELECT COUNT(*) FROM player_match_stats WHERE player_name = ? AND match_id = ?",
+        'get_player_match_ids': (
+            "SELECT pms.match_id FROM player_match_stats pms JOIN matches m ON m.id = pms.match_id WHERE pms.player_name = ? AND pms.match_id IN (?)"
+        ),
+        'get_latest_player_match_stats_list': (
+            f"SELECT {', '.join(f'pms.{column_name}' for column_name in RowCodec(PlayerMatchStats).column_names)} "
+            "FROM player_match_stats pms CROSS JOIN matches m ON m.id = pms.match_id "
+            "WHERE pms.player_name = ? AND m.game_mode = ? AND m.match_type IN (?) ORDER BY m.date DESC LIMIT ?"
+        ),
+        'get_match_relevance': "SELECT id, game_mode, match_type FROM matches WHERE id IN (?)",
+        'get_rolling_stats': f"SELECT {ROLLING_STATS_COLUMNS_STR} FROM player_rolling_stats WHERE player_name = ? AND game_mode = ?",
+        'get_new_player_match_stats_rows': (
+            "SELECT pms.seq, pms.match_id, m.date, m.game_mode, m.match_type, pms.win_place, pms.damage_dealt, pms.kills, pms.assists "
+            "FROM player_match_stats pms CROSS JOIN matches m ON m.id = pms.match_id WHERE pms.player_name = ? AND pms.seq > ? ORDER BY pms.seq"
+        ),
+    }
+
+    def __init__(
+        self,
+        db_file: str,
+        reader_num: int = 4,
+        tuning: SQLiteTuning = None,
+        write_behind: bool = False,
+        flush_size: int = 100,
+        flush_interval: float = 0.05,
+        player_cache_entries: int = 1024,
+        player_match_stats_cache_entries: int = 8192,
+        cache_max_size: int = 16 * 1024 * 1024,
+    ):
+        '''
+        쓰기는 WAL 모드로 연 하나의 `self.conn`에서만 수행하고, 조회는 `reader_num`개의 읽기 전용 연결에 나누어 실행합니다.
+        WAL 모드에서는 쓰기 트랜잭션이 진행 중이어도 읽기 연결들이 마지막으로 커밋된 데이터를 동시에 조회할 수 있습니다.
+
+        `write_behind`가 True이면 쓰기 쿼리를 바로 커밋하지 않고 대기열에 모았다가, `flush_size`개가 쌓이거나
+        `flush_interval`초가 지나면 하나의 트랜잭션으로 커밋합니다. 조회 전에는 대기 중인 쓰기를 먼저 반영하므로
+        같은 프로세스 안에서는 방금 쓴 데이터를 항상 읽을 수 있습니다.
+
+        조회한 플레이어 행(`Player_DB`)과 매치 스탯은 각각 항목 수와 `cache_max_size` byte로 크기가 제한된 LRU 캐시에 보관하며,
+        해당 행을 쓰는 메서드가 쓰기 전후로 무효화합니다. 캐시된 객체는 호출한 곳들이 공유하므로 수정하지 않고 읽기만 해야 합니다.
+        '''
         self.db_file: str = os.path.abspath(db_file)
+        self.reader_num = reader_num
+        self.tuning = tuning or SQLiteTuning()
+        self.conn: aiosqlite.Connection = None
+        self._readers: List[aiosqlite.Connection] = []
+        self._reader_queue: asyncio.Queue = None
+
+        self.write_behind = write_behind
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
+        self._pending_writes: List[Tuple[str, Any, bool]] = []
+        self._has_pending_writes = asyncio.Event()
+        self._is_write_batch_full = asyncio.Event()
+        self._write_lock = asyncio.Lock()
+        self._write_behind_task: asyncio.Task = None
+        self._row_codecs: Dict[tuple, RowCodec] = {}
+
+        self._player_ids_by_name: Dict[str, str] = {}
+        self._player_cache = LRUCache(max_entries=player_cache_entries, max_size=cache_max_size, on_remove=self._remove_player_name)
+        self._player_match_stats_cache = LRUCache(max_entries=player_match_stats_cache_entries, max_size=cache_max_size)
 
     async def __aenter__(self):
         return await self._create_connection()
@@ -87,110 +464,618 @@ class SQLiteDBHandler:
         await self._close_connection()
 
     async def _create_connection(self):
+        # 연결이 닫혀 있는 동안 다른 프로세스가 DB를 바꿨을 수 있으므로 캐시를 비웁니다.
+        self._player_cache.clear()
+        self._player_match_stats_cache.clear()
+
         self.conn = await aiosqlite.connect(self.db_file)
+        # 테이블이 만들어지기 전에만 적용되며, 기존 DB는 마이그레이션에서 한 번 변환합니다.
+        await self.conn.execute("PRAGMA auto_vacuum = INCREMENTAL;")
+        await self.conn.execute("PRAGMA journal_mode = WAL;")
         await self.conn.execute("PRAGMA foreign_keys = ON;")
+        for pragma_query in self.tuning.get_pragma_queries():
+            await self.conn.execute(pragma_query)
+
+        self._reader_queue = asyncio.Queue()
+        for _ in range(self.reader_num):
+            reader = await aiosqlite.connect(f'{Path(self.db_file).as_uri()}?mode=ro', uri=True)
+            for pragma_query in self.tuning.get_pragma_queries():
+                await reader.execute(pragma_query)
+            self._readers.append(reader)
+            self._reader_queue.put_nowait(reader)
+
+        if self.write_behind:
+            self._write_behind_task = asyncio.create_task(self._write_behind_loop())
         print(f'SQLite DB {self.db_file} connected.')
 
     async def _close_connection(self):
+        if self._write_behind_task:
+            self._write_behind_task.cancel()
+            try:
+                await self._write_behind_task
+            except asyncio.CancelledError:
+                pass
+            self._write_behind_task = None
+        if self.conn:
+            await self.flush()
+
+        for reader in self._readers:
+            await reader.close()
+        self._readers = []
+        self._reader_queue = None
+
         if self.conn:
             await self.conn.close()
+            self.conn = None
             print('SQLite DB connection closed.')
 
+    @asynccontextmanager
+    async def _read(self, query: str, params=None):
+        '''
+        읽기 전용 연결 하나를 빌려 조회 쿼리를 실행합니다. 읽기 연결이 없으면 쓰기 연결을 사용합니다.
+        '''
+        await self._flush_if_pending()
+        if not self._readers:
+            async with self.conn.execute(query, params or ()) as cursor:
+                yield cursor
+            return
+
+        reader = await self._reader_queue.get()
+        try:
+            async with reader.execute(query, params or ()) as cursor:
+                yield cursor
+        finally:
+            self._reader_queue.put_nowait(reader)
+
     async def _execute_query(self, query: str, params=None):
+        await self._flush_if_pending()
         async with self.conn.execute(query, params or ()) as cursor:
             if query.strip().upper().startswith("SELECT") or query.strip().upper().startswith("PRAGMA"):
                 return await cursor.fetchall()
             else:
                 await self.conn.commit()
 
-    async def _insert_dataclass(self, table_name: str, dataclass_instance: Any) -> None:
-        column_names, column_values = [], []
-        for field in fields(dataclass_instance):
-            column_names.append(field.name)
-            value = getattr(dataclass_instance, field.name)
-            if isinstance(value, (list, dict, bool)) or is_dataclass(value):
-                value = json.dumps(value if not isinstance(value, bool) else int(value))
-            elif hasattr(value, 'value'):  # Enum 처리
-                value = value.value
-            column_values.append(value)
-
-        columns_str = ', '.join(column_names)
-        placeholders_str = ', '.join(['?' for _ in column_values])
-        sql_query = f'INSERT INTO {table_name} ({columns_str}) VALUES ({placeholders_str})'
-
-        async with self.conn.cursor() as cursor:
-            await cursor.execute(sql_query, column_values)
-            await self.conn.commit()
-
-    async def _update_dataclass(self, table_name: str, dataclass_instance: Any, identifier_field: str) -> None:
-        update_columns, update_values = [], []
-        identifier_value = None
-
-        for field in fields(dataclass_instance):
-            value = getattr(dataclass_instance, field.name)
-            if field.name == identifier_field:
-                identifier_value = value
-                continue
-
-            if isinstance(value, (list, dict, bool)) or is_dataclass(value):
-                value = json.dumps(value if not isinstance(value, bool) else int(value))
-            elif hasattr(value, 'value'):  # Enum 처리
-                value = value.value
-            update_columns.append(f"{field.name} = ?")
-            update_values.append(value)
-
-        update_columns_str = ', '.join(update_columns)
-        sql_query = f"UPDATE {table_name} SET {update_columns_str} WHERE {identifier_field} = ?"
-        update_values.append(identifier_value)
-
-        async with self.conn.cursor() as cursor:
-            await cursor.execute(sql_query, update_values)
-            await self.conn.commit()
-
-    async def _get_player_update_date(self, normalized_id: str = None, player_name: str = None) -> datetime:
+    async def _write(self, query: str, params=None, is_many: bool = False) -> Union[int, None]:
+        '''
+        쓰기 쿼리를 실행하고 커밋한 뒤 변경된 행 수를 반환합니다. `is_many`가 True이면 `params`의 행들을 `executemany`로 실행합니다.
+        write-behind 모드에서는 쿼리를 대기열에 넣고 바로 None을 반환합니다.
+        '''
+        return (await self._write_many([(query, params, is_many)]))[0]
+
+    async def _write_many(self, queries: List[Tuple[str, Any, bool]]) -> List[Union[int, None]]:
+        '''
+        (쿼리, 파라미터, executemany 여부) 목록을 하나의 트랜잭션으로 실행하고 한 번만 커밋한 뒤 쿼리별 변경된 행 수를 반환합니다.
+        하나라도 실패하면 모두 되돌립니다. write-behind 모드에서는 쿼리들을 함께 대기열에 넣고 None을 반환합니다.
+        '''
+        if self.write_behind:
+            self._pending_writes.extend((query, params or (), is_many) for query, params, is_many in queries)
+            self._has_pending_writes.set()
+            if len(self._pending_writes) >= self.flush_size:
+                self._is_write_batch_full.set()
+            return [None for _ in queries]
+
+        # 쓰기 연결의 트랜잭션은 하나뿐이므로, 다른 쓰기의 커밋이나 롤백에 섞이지 않도록 커밋 또는 롤백까지 잠금을 유지합니다.
+        rowcounts = []
+        async with self._write_lock, self.conn.cursor() as cursor:
+            try:
+                for query, params, is_many in queries:
+                    if is_many:
+                        await cursor.executemany(query, params)
+                    else:
+                        await cursor.execute(query, params or ())
+                    rowcounts.append(cursor.rowcount)
+                await self.conn.commit()
+            except Exception:
+                await self.conn.rollback()
+                raise
+        return rowcounts
+
+    async def _write_behind_loop(self):
+        while True:
+            await self._has_pending_writes.wait()
+            # asyncio.wait_for는 대기가 끝나는 순간 취소가 들어오면 취소를 무시할 수 있으므로 asyncio.wait로 기다립니다.
+            batch_full_task = asyncio.ensure_future(self._is_write_batch_full.wait())
+            try:
+                await asyncio.wait([batch_full_task], timeout=self.flush_interval)
+            finally:
+                batch_full_task.cancel()
+            try:
+                await self.flush()
+            except Exception as e:
+                cprint(f'Failed to flush pending DB writes. error: {e}', 'red')
+
+    async def _flush_if_pending(self) -> None:
+        # write-behind 모드에서는 다른 작업이 커밋 중인 배치도 기다려야 하므로 잠금 여부까지 확인합니다.
+        # 직접 쓰기 모드의 잠금은 쓰기끼리만 순서를 맞추기 위한 것이므로, 읽기는 기다리지 않고 마지막으로 커밋된 데이터를 조회합니다.
+        if self._pending_writes or (self.write_behind and self._write_lock.locked()):
+            await self.flush()
+
+    async def flush(self) -> None:
+        '''
+        대기 중인 쓰기 쿼리를 순서대로 하나의 트랜잭션으로 실행하고 한 번만 커밋합니다.
+        실패한 쿼리는 해당 쿼리만 되돌려지고 경고를 출력하며, 나머지 쿼리는 그대로 커밋됩니다.
+        커밋에 실패하면 배치 전체를 대기열에 되돌려 놓고 호출한 작업에 예외를 전달하며, 다음 flush에서 다시 시도합니다.
+        호출한 작업이 취소되더라도 이미 꺼낸 쓰기가 유실되지 않도록 커밋까지 마칩니다.
+        '''
+        await asyncio.shield(self._flush())
+
+    async def _flush(self) -> None:
+        async with self._write_lock:
+            pending_writes, self._pending_writes = self._pending_writes, []
+            self._has_pending_writes.clear()
+            self._is_write_batch_full.clear()
+            if not pending_writes:
+                return
+
+            try:
+                for query, params, is_many in pending_writes:
+                    try:
+                        if is_many:
+                            await self.conn.executemany(query, params)
+                        else:
+                            await self.conn.execute(query, params)
+                    except sqlite3.Error as e:
+                        cprint(f'Failed to write behind. query: {query}, error: {e}', 'yellow')
+                await self.conn.commit()
+            except Exception:
+                # 커밋하지 못한 배치는 되돌리고 새로 들어온 쓰기보다 앞에 다시 넣어, 다음 flush에서 같은 순서로 다시 실행합니다.
+                self._pending_writes[:0] = pending_writes
+                self._has_pending_writes.set()
+                await self.conn.rollback()
+                raise
+
+    def _get_row_codec(self, dataclass_type, exclude_fields: Iterable[str] = ()) -> RowCodec:
+        key = (dataclass_type, tuple(exclude_fields))
+        if key not in self._row_codecs:
+            self._row_codecs[key] = RowCodec(dataclass_type, exclude_fields)
+        return self._row_codecs[key]
+
+    def _encode_dataclass(self, dataclass_instance: Any, exclude_fields: List[str] = None) -> Tuple[List[str], List[Any]]:
+        row_codec = self._get_row_codec(type(dataclass_instance), exclude_fields or ())
+        return row_codec.column_names, row_codec.encode(dataclass_instance)
+
+    def _get_insert_dataclass_query(
+        self, table_name: str, dataclass_instance: Any, extra_columns: Dict[str, Any] = None, exclude_fields: List[str] = None
+    ) -> Tuple[str, Any, bool]:
+        extra_columns = extra_columns or {}
+        row_codec = self._get_row_codec(type(dataclass_instance), exclude_fields or ())
+        sql_query = row_codec.get_insert_query(table_name, extra_columns.keys())
+
+        return sql_query, [*row_codec.encode(dataclass_instance), *extra_columns.values()], False
+
+    async def _insert_dataclass(
+        self, table_name: str, dataclass_instance: Any, extra_columns: Dict[str, Any] = None, exclude_fields: List[str] = None
+    ) -> None:
+        await self._write(*self._get_insert_dataclass_query(table_name, dataclass_instance, extra_columns, exclude_fields))
+
+    def _get_update_dataclass_query(
+        self,
+        table_name: str,
+        dataclass_instance: Any,
+        identifier_fields: Union[str, List[str]],
+        extra_columns: Dict[str, Any] = None,
+        exclude_fields: List[str] = None,
+    ) -> Tuple[str, Any, bool]:
+        if isinstance(identifier_fields, str):
+            identifier_fields = [identifier_fields]
+        extra_columns = extra_columns or {}
+
+        row_codec = self._get_row_codec(type(dataclass_instance), (*(exclude_fields or ()), *identifier_fields))
+        sql_query = row_codec.get_update_query(table_name, identifier_fields, extra_columns.keys())
+        identifier_values = [getattr(dataclass_instance, identifier_field) for identifier_field in identifier_fields]
+
+        return sql_query, [*row_codec.encode(dataclass_instance), *extra_columns.values(), *identifier_values], False
+
+    async def _update_dataclass(
+        self,
+        table_name: str,
+        dataclass_instance: Any,
+        identifier_fields: Union[str, List[str]],
+        extra_columns: Dict[str, Any] = None,
+        exclude_fields: List[str] = None,
+    ) -> None:
+        await self._write(*self._get_update_dataclass_query(table_name, dataclass_instance, identifier_fields, extra_columns, exclude_fields))
+
+    def _get_upsert_dataclasses_query(
+        self,
+        table_name: str,
+        dataclass_instances: Iterable[Any],
+        conflict_fields: List[str],
+        extra_columns: Dict[str, Any] = None,
+        update_on_conflict: bool = True,
+        exclude_fields: List[str] = None,
+    ) -> Union[Tuple[str, Any, bool], None]:
+        '''
+        여러 행을 `executemany`로 저장하는 (쿼리, 파라미터, executemany 여부)를 반환하며, 저장할 행이 없으면 None을 반환합니다.
+        `conflict_fields`가 같은 행이 이미 있으면 나머지 컬럼을 갱신하고, `update_on_conflict`가 False이면 건너뜁니다.
+        '''
+        extra_columns = extra_columns or {}
+        rows = []
+        row_codec = None
+        for dataclass_instance in dataclass_instances:
+            row_codec = row_codec or self._get_row_codec(type(dataclass_instance), exclude_fields or ())
+            rows.append((*row_codec.encode(dataclass_instance), *extra_columns.values()))
+        if not rows:
+            return None
+
+        column_names = [*row_codec.column_names, *extra_columns.keys()]
+        conflict_str = ', '.join(conflict_fields)
+        if update_on_conflict:
+            update_columns_str = ', '.join([f"{column_name} = excluded.{column_name}" for column_name in column_names if column_name not in conflict_fields])
+            conflict_clause = f" ON CONFLICT({conflict_str}) DO UPDATE SET {update_columns_str}"
+        else:
+            conflict_clause = f" ON CONFLICT({conflict_str}) DO NOTHING"
+        sql_query = row_codec.get_insert_query(table_name, extra_columns.keys(), conflict_clause)
+
+        return sql_query, rows, True
+
+    async def _upsert_dataclasses(
+        self,
+        table_name: str,
+        dataclass_instances: Iterable[Any],
+        conflict_fields: List[str],
+        extra_columns: Dict[str, Any] = None,
+        update_on_conflict: bool = True,
+        exclude_fields: List[str] = None,
+    ) -> Union[int, None]:
+        '''
+        여러 행을 `executemany`로 하나의 트랜잭션 안에서 저장하고 커밋은 한 번만 수행합니다.
+        '''
+        upsert_query = self._get_upsert_dataclasses_query(table_name, dataclass_instances, conflict_fields, extra_columns, update_on_conflict, exclude_fields)
+        if upsert_query is None:
+            return 0
+        return await self._write(*upsert_query)
+
+    async def _is_index_exists(self, index_name: str) -> bool:
+        async with self.conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'index' AND name = ?", (index_name,)) as cursor:
+            return await cursor.fetchone() is not None
+
+    def _get_player_matches_queries(self, normalized_id: str, match_list: List[dict]) -> List[Tuple[str, Any, bool]]:
+        '''
+        플레이어의 매치 목록(최신 매치가 앞)을 player_matches 테이블에 반영하는 (쿼리, 파라미터, executemany 여부) 목록을 반환합니다.
+        목록에서 빠진 매치는 삭제하고, 새 매치는 오래된 것부터 기존 매치들의 뒤에 이어 붙이므로 이미 저장된 행은 다시 쓰지 않습니다.
+        '''
+        match_ids = list(dict.fromkeys(match['id'] for match in match_list))
+        if not match_ids:
+            return [("DELETE FROM player_matches WHERE player_id = ?", (normalized_id,), False)]
+
+        placeholders_str = ', '.join(['?' for _ in match_ids])
+        return [
+            (f"DELETE FROM player_matches WHERE player_id = ? AND match_id NOT IN ({placeholders_str})", (normalized_id, *match_ids), False),
+            (
+                "INSERT INTO player_matches (player_id, match_id, position) "
+                "SELECT ?, ?, COALESCE(MAX(position), -1) + 1 FROM player_matches WHERE player_id = ? "
+                "ON CONFLICT(player_id, match_id) DO NOTHING",
+                [(normalized_id, match_id, normalized_id) for match_id in reversed(match_ids)],
+                True,
+            ),
+        ]
+
+    #### cache functions
+
+    def get_cache_stats(self) -> Dict[str, LRUCacheStats]:
+        return {'player': self._player_cache.get_stats(), 'player_match_stats': self._player_match_stats_cache.get_stats()}
+
+    def _remove_player_name(self, normalized_id: str, player_db: Player_DB) -> None:
+        if self._player_ids_by_name.get(player_db.player.name) == normalized_id:
+            del self._player_ids_by_name[player_db.player.name]
+
+    def _invalidate_player(self, normalized_id: str = None, player_name: str = None) -> None:
+        self._player_cache.invalidate(normalized_id or self._player_ids_by_name.get(player_name))
+
+    def _invalidate_player_match_stats(self, player_match_stats_list: Iterable[PlayerMatchStats]) -> None:
+        for player_match_stats in player_match_stats_list:
+            self._player_match_stats_cache.invalidate((player_match_stats.player_name, player_match_stats.match_id))
+
+    @contextmanager
+    def _invalidating_players(self, normalized_ids: Iterable[str] = (), player_name: str = None):
+        '''
+        감싼 쓰기의 전후로 플레이어 캐시를 무효화합니다. 쓰기가 커밋되기 전에 시작된 조회는 이전 행을 읽을 수 있으므로,
+        커밋이 끝난 뒤 한 번 더 무효화해 그 사이에 캐시된 행을 지우고 아직 진행 중인 조회의 `put`도 무시되게 합니다.
+        write-behind 모드에서는 조회가 대기 중인 쓰기를 먼저 반영하므로 대기열에 넣은 뒤의 무효화로 충분합니다.
+        '''
+        normalized_ids = list(normalized_ids)
+        for normalized_id in normalized_ids or [None]:
+            self._invalidate_player(normalized_id, player_name)
+        try:
+            yield
+        finally:
+            for normalized_id in normalized_ids or [None]:
+                self._invalidate_player(normalized_id, player_name)
+
+    @contextmanager
+    def _invalidating_player_match_stats(self, player_match_stats_list: List[PlayerMatchStats]):
+        '''
+        `_invalidating_players`와 같은 이유로 감싼 쓰기의 전후로 매치 스탯 캐시를 무효화합니다.
+        '''
+        self._invalidate_player_match_stats(player_match_stats_list)
+        try:
+            yield
+        finally:
+            self._invalidate_player_match_stats(player_match_stats_list)
+
+    async def _get_player_db(self, normalized_id: str = None, player_name: str = None) -> Player_DB:
+        '''
+        플레이어 행 전체를 한 번에 조회하여 캐시합니다. 플레이어 정보, 존재 여부, 갱신 시각, sync_cursor, discord_id 조회가 모두 이 결과를 사용합니다.
+        '''
         if normalized_id is None and player_name is None:
             raise ValueError("Either 'normalized_id' or 'player_name' must be provided.")
 
-        query = "SELECT updated_date FROM players WHERE "
-        params = ()
+        player_db = self._player_cache.get(normalized_id or self._player_ids_by_name.get(player_name))
+        if player_db is not None:
+            return player_db
+
+        generation = self._player_cache.generation
+        row_codec = self._get_row_codec(Player, ['match_list'])
+        extra_column_names = [field.name for field in fields(Player_DB) if field.name != 'player']
         if normalized_id:
-            query += "normalized_id = ?"
-            params = (normalized_id,)
-        elif player_name:
-            query += "name = ?"
-            params = (player_name,)
+            query, params = SQLiteDBHandler.HOT_QUERIES['get_player_by_normalized_id'], (normalized_id,)
+        else:
+            query, params = SQLiteDBHandler.HOT_QUERIES['get_player_by_name'], (player_name,)
 
-        async with self.conn.execute(query, params) as cursor:
+        async with self._read(query, params) as cursor:
             row = await cursor.fetchone()
-
-        if row:
-            return parse_utc_to_datetime(row[0], Timezone.KST)
-        else:
+        if not row:
             raise PlayerNotFoundError_Balancer
 
-    async def compare_and_update_structure(self, table_name: str, create_table_sql: str):
-        # 기존 테이블 구조를 가져오는 SQL
-        query = f"PRAGMA table_info({table_name})"
-        existing_columns = [row[1] for row in await self._execute_query(query)]
-
-        # 새로운 테이블 구조에서 컬럼 추출
-        new_columns = [part.split()[0] for part in create_table_sql.split('(')[1].split(')')[0].split(',')]
-
-        # 컬럼 추가 확인 및 실행
-        for column_definition in new_columns:
-            column_name = column_definition.split()[0]
-            if column_name not in existing_columns:
-                # 새로운 컬럼 추가
-                alter_query = f"ALTER TABLE {table_name} ADD COLUMN {column_definition}"
-                await self._execute_query(alter_query)
+        player_data = dict(zip(row_codec.column_names, row[: len(row_codec.column_names)]))
+        lazy_json_fields = {name: player_data.pop(name) or '{}' for name in SQLiteDBHandler.PLAYER_LAZY_JSON_COLUMNS}
+        player_data['match_list'] = await self.get_player_match_list(player_data['normalized_id'])
+        extra_data = dict(zip(extra_column_names, row[len(row_codec.column_names) :]))
+        for entity in FreshnessEntity:
+            extra_data[entity.value] = parse_utc_to_datetime(extra_data[entity.value], Timezone.KST) if extra_data[entity.value] else None
+        player_db = Player_DB(player=Player.from_lazy_json_fields(lazy_json_fields, **player_data), **extra_data)
+
+        self._player_cache.put(player_db.player.normalized_id, player_db, generation)
+        if player_db.player.normalized_id in self._player_cache:
+            self._player_ids_by_name[player_db.player.name] = player_db.player.normalized_id
+        return player_db
+
+    async def get_player_match_list(self, normalized_id: str) -> List[dict]:
+        async with self._read(SQLiteDBHandler.HOT_QUERIES['get_player_match_list'], (normalized_id,)) as cursor:
+            rows = await cursor.fetchall()
+        return [{'type': 'match', 'id': row[0]} for row in rows]
+
+    async def verify_query_plans(self) -> Dict[str, List[str]]:
+        '''
+        `HOT_QUERIES`의 실행 계획을 확인하여 테이블 전체를 훑는(SCAN) 쿼리를 경고하고 {쿼리 이름: SCAN 단계 목록}으로 반환합니다.
+        '''
+        full_scan_plans = {}
+        for query_name, query in SQLiteDBHandler.HOT_QUERIES.items():
+            async with self.conn.execute(f"EXPLAIN QUERY PLAN {query}", tuple(None for _ in range(query.count('?')))) as cursor:
+                plan_details = [row[3] for row in await cursor.fetchall()]
+
+            scan_details = [plan_detail for plan_detail in plan_details if plan_detail.startswith('SCAN')]
+            if scan_details:
+                full_scan_plans[query_name] = scan_details
+                cprint(f'Query {query_name} scans the whole table. plan: {scan_details}', 'yellow')
+
+        return full_scan_plans
+
+    @staticmethod
+    def _expand_in_clause(query: str, value_num: int) -> str:
+        # HOT_QUERIES의 IN 절 placeholder를 실제 값 개수만큼 늘립니다.
+        return query.replace("IN (?)", f"IN ({', '.join(['?'] * value_num)})")
+
+    async def get_player_update_date(
+        self, normalized_id: str = None, player_name: str = None, entity: FreshnessEntity = FreshnessEntity.PLAYER
+    ) -> Union[datetime, None]:
+        player_db = await self._get_player_db(normalized_id, player_name)
+        return getattr(player_db, entity.value)
+
+    #### migration functions
+
+    async def get_schema_version(self) -> int:
+        await self._execute_query(SQLiteDBHandler.SQL_CREATE_SCHEMA_VERSION_TABLE)
+        rows = await self._execute_query("SELECT MAX(version) FROM schema_version")
+        return rows[0][0] or 0
+
+    async def _run_in_transaction(self, method_name: str = '', migration: Migration = None) -> Any:
+        '''
+        `method_name` 메서드를 하나의 트랜잭션 안에서 실행하고, `migration`이 주어지면 해당 버전을 같은 트랜잭션에서 기록합니다.
+        '''
+        await self.conn.execute("BEGIN")
+        try:
+            result = await getattr(self, method_name)() if method_name else None
+            if migration:
+                await self.conn.execute(
+                    "INSERT INTO schema_version (version, description, applied_date) VALUES (?, ?, ?)",
+                    (migration.version, migration.description, datetime_now()),
+                )
+            await self.conn.commit()
+        except Exception:
+            await self.conn.rollback()
+            raise
+        return result
+
+    async def migrate(self) -> List[int]:
+        '''
+        현재 스키마 버전보다 높은 마이그레이션을 순서대로 적용하고, 적용한 버전 목록을 반환합니다.
+        '''
+        schema_version = await self.get_schema_version()
+        applied_versions = []
+        for migration in sorted(self.MIGRATIONS, key=lambda migration: migration.version):
+            if migration.version <= schema_version:
+                continue
+
+            cprint(f'Migrating DB schema to version {migration.version}: {migration.description}', 'green')
+            is_recorded_with_migrate = migration.transactional and not migration.backfill
+            if migration.transactional:
+                await self._run_in_transaction(migration.migrate, migration if is_recorded_with_migrate else None)
             else:
-                # 기존 컬럼이 있으므로, 변경 없음
-                pass
+                await getattr(self, migration.migrate)()
+            if migration.backfill:
+                while await self._run_in_transaction(migration.backfill):
+                    pass
+            if not is_recorded_with_migrate:
+                await self._run_in_transaction(migration=migration)
+            applied_versions.append(migration.version)
+
+        return applied_versions
+
+    async def _add_missing_columns(self, table_name: str, dataclass_type) -> None:
+        async with self.conn.execute(f"PRAGMA table_info({table_name})") as cursor:
+            existing_column_names = {row[1] for row in await cursor.fetchall()}
+
+        for column_name, column_type in get_columns_for_dataclass(dataclass_type):
+            if column_name not in existing_column_names:
+                await self.conn.execute(f"ALTER TABLE {table_name} ADD COLUMN {column_name} {column_type}")
+
+    async def _migration_create_tables(self) -> None:
+        for create_table_query in [
+            SQLiteDBHandler.SQL_CREATE_PLAYERS_TABLE,
+            SQLiteDBHandler.SQL_CREATE_PLAYER_MATCH_STATS_TABLE,
+            SQLiteDBHandler.SQL_CREATE_MATCHES_TABLE,
+            SQLiteDBHandler.SQL_CREATE_PLAYER_MATCHES_TABLE,
+        ]:
+            await self.conn.execute(create_table_query)
+
+    async def _migration_add_missing_columns(self) -> None:
+        await self._add_missing_columns('players', Player_DB)
+        await self._add_missing_columns('player_match_stats', PlayerMatchStats_DB)
+        await self._add_missing_columns('matches', Match_DB)
+        await self._add_missing_columns('player_matches', PlayerMatch_DB)
+
+    async def _migration_create_indexes(self) -> None:
+        for drop_index_query in SQLiteDBHandler.SQL_DROP_LEGACY_INDEXES:
+            await self.conn.execute(drop_index_query)
+        if not await self._is_index_exists(SQLiteDBHandler.PLAYER_MATCH_STATS_UNIQUE_INDEX):
+            await self.conn.execute(SQLiteDBHandler.SQL_DEDUPE_PLAYER_MATCH_STATS)
+
+        for index_queries in [
+            SQLiteDBHandler.SQL_CREATE_PLAYERS_INDEXES,
+            SQLiteDBHandler.SQL_CREATE_PLAYER_MATCH_STATS_INDEXES,
+            SQLiteDBHandler.SQL_CREATE_MATCHES_INDEXES,
+            SQLiteDBHandler.SQL_CREATE_PLAYER_MATCHES_INDEXES,
+        ]:
+            for index_query in index_queries.values():
+                await self.conn.execute(index_query)
+
+    async def _backfill_player_matches(self) -> int:
+        '''
+        players.match_list 컬럼에 JSON으로 저장되어 있던 매치 목록을 `MIGRATION_BATCH_SIZE`명씩 player_matches 테이블로 옮깁니다.
+        '''
+        async with self.conn.execute(
+            "SELECT normalized_id, match_list FROM players WHERE match_list IS NOT NULL LIMIT ?", (self.MIGRATION_BATCH_SIZE,)
+        ) as cursor:
+            rows = await cursor.fetchall()
+
+        for normalized_id, match_list_json in rows:
+            try:
+                match_list = json.loads(match_list_json)['data']
+            except (TypeError, ValueError, KeyError):
+                cprint(f'Broken match list is dropped. normalized_id: {normalized_id}', 'yellow')
+                continue
+
+            for query, params, is_many in self._get_player_matches_queries(normalized_id, match_list):
+                if is_many:
+                    await self.conn.executemany(query, params)
+                else:
+                    await self.conn.execute(query, params)
+
+        if rows:
+            placeholders_str = ', '.join(['?' for _ in rows])
+            await self.conn.execute(f"UPDATE players SET match_list = NULL WHERE normalized_id IN ({placeholders_str})", [row[0] for row in rows])
+        return len(rows)
+
+    async def _migration_enable_incremental_vacuum(self) -> None:
+        async with self.conn.execute("PRAGMA auto_vacuum") as cursor:
+            auto_vacuum = (await cursor.fetchone())[0]
+        # 0: NONE, 1: FULL, 2: INCREMENTAL
+        if auto_vacuum != 2:
+            cprint('Rebuilding DB once to enable incremental auto vacuum...', 'yellow')
+            await self.conn.execute("PRAGMA auto_vacuum = INCREMENTAL;")
+            await self.conn.execute("VACUUM")
+
+    async def _migration_create_player_rolling_stats(self) -> None:
+        await self.conn.execute(SQLiteDBHandler.SQL_CREATE_PLAYER_ROLLING_STATS_TABLE)
+        for index_query in SQLiteDBHandler.SQL_CREATE_PLAYER_ROLLING_STATS_INDEXES.values():
+            await self.conn.execute(index_query)
+
+    async def _migration_create_leaderboard(self) -> None:
+        await self.conn.execute(SQLiteDBHandler.SQL_CREATE_LEADERBOARD_TABLE)
+        for index_query in SQLiteDBHandler.SQL_CREATE_LEADERBOARD_INDEXES.values():
+            await self.conn.execute(index_query)
+
+    async def _migration_add_player_match_stats_seq(self) -> None:
+        '''
+        rowid는 지워진 행의 값이 재사용되고 VACUUM으로 바뀔 수도 있어 롤링 스탯과 리더보드의 기준점으로 쓸 수 없으므로,
+        player_match_stats를 AUTOINCREMENT 키인 seq 컬럼이 있는 테이블로 다시 만들고 기존 rowid를 seq로 옮깁니다.
+        기존 롤링 스탯의 기준점은 이미 재사용된 rowid를 가리킬 수 있으므로 테이블을 비우고, 다음 조회 때 저장된 매치 스탯으로 다시 계산합니다.
+        '''
+        async with self.conn.execute("PRAGMA table_info(player_match_stats)") as cursor:
+            existing_column_names = {row[1] for row in await cursor.fetchall()}
+
+        if 'seq' not in existing_column_names:
+            columns_str = ', '.join([column_name for column_name, _ in get_columns_for_dataclass(PlayerMatchStats_DB)])
+            await self.conn.execute(SQLiteDBHandler.SQL_CREATE_PLAYER_MATCH_STATS_TABLE.replace("player_match_stats", "player_match_stats_new", 1))
+            await self.conn.execute(
+                f"INSERT INTO player_match_stats_new (seq, {columns_str}) SELECT rowid, {columns_str} FROM player_match_stats ORDER BY rowid"
+            )
+            await self.conn.execute(SQLiteDBHandler.SQL_DROP_PLAYER_MATCH_STATS_TABLE)
+            await self.conn.execute("ALTER TABLE player_match_stats_new RENAME TO player_match_stats")
+            for index_query in SQLiteDBHandler.SQL_CREATE_PLAYER_MATCH_STATS_INDEXES.values():
+                await self.conn.execute(index_query)
+
+        await self.conn.execute(SQLiteDBHandler.SQL_DROP_PLAYER_ROLLING_STATS_TABLE)
+        await self._migration_create_player_rolling_stats()
+
+    async def _migration_create_leaderboard_watermark(self) -> None:
+        await self.conn.execute(SQLiteDBHandler.SQL_CREATE_LEADERBOARD_WATERMARK_TABLE)
+
+    #### maintenance functions
+
+    async def prune_player_match_stats(self, retention_policy: RetentionPolicy) -> int:
+        '''
+        `retention_policy`의 보관 범위를 벗어난 매치 스탯을 `PRUNE_BATCH_SIZE`개씩 나누어 지우고, 지운 행 수를 반환합니다.
+        정리할 행은 읽기 연결에서 한 번에 찾으므로 쓰기 연결은 배치를 지우는 동안에만 사용됩니다.
+        '''
+        cutoff_date = datetime_now() - retention_policy.max_age if retention_policy.max_age else None
+        async with self._read(SQLiteDBHandler.SQL_SELECT_PRUNABLE_PLAYER_MATCH_STATS, (retention_policy.max_match_num, cutoff_date)) as cursor:
+            rows = await cursor.fetchall()
+        rowids = [row[0] for row in rows]
+        if not rowids:
+            return 0
+
+        if retention_policy.archive_db_file:
+            await self.flush()
+            await self.conn.execute("ATTACH DATABASE ? AS archive", (os.path.abspath(retention_policy.archive_db_file),))
+            await self.conn.execute(SQLiteDBHandler.SQL_CREATE_ARCHIVE_PLAYER_MATCH_STATS_TABLE)
+            await self.conn.execute(SQLiteDBHandler.SQL_CREATE_ARCHIVE_PLAYER_MATCH_STATS_INDEX)
+            await self.conn.commit()
 
-        # 컬럼 삭제 확인 (에러 발생)
-        for existing_column in existing_columns:
-            if existing_column not in new_columns:
-                raise Exception(f"자동 DB 마이그레이션에 실패하였습니다. 삭제되는 컬럼: {existing_column} in {table_name}")
+        columns_str = ', '.join([column_name for column_name, _ in get_columns_for_dataclass(PlayerMatchStats_DB)])
+        try:
+            for idx in range(0, len(rowids), self.PRUNE_BATCH_SIZE):
+                rowid_batch = rowids[idx : idx + self.PRUNE_BATCH_SIZE]
+                placeholders_str = ', '.join(['?' for _ in rowid_batch])
+                if retention_policy.archive_db_file:
+                    # 보관 DB에 이미 옮겨진 행은 건너뛰므로, 옮긴 뒤 지우기 전에 종료되었더라도 다시 실행할 수 있습니다.
+                    await self._write(
+                        f"INSERT OR IGNORE INTO archive.player_match_stats ({columns_str}) "
+                        f"SELECT {columns_str} FROM player_match_stats WHERE rowid IN ({placeholders_str})",
+                        rowid_batch,
+                    )
+                await self._write(f"DELETE FROM player_match_stats WHERE rowid IN ({placeholders_str})", rowid_batch)
+                await self._write(SQLiteDBHandler.SQL_DELETE_ROLLING_STATS_WITH_MATCH, [row[1:] for row in rows[idx : idx + self.PRUNE_BATCH_SIZE]], is_many=True)
+                await asyncio.sleep(0)
+        finally:
+            if retention_policy.archive_db_file:
+                await self.flush()
+                await self.conn.execute("DETACH DATABASE archive")
+
+        self._player_match_stats_cache.clear()
+        return len(rowids)
+
+    async def incremental_vacuum(self, page_num: int = 256) -> int:
+        '''
+        비어 있는 페이지를 최대 `page_num`개까지 DB 파일에서 반환하고, 반환한 페이지 수를 반환합니다.
+        전체 VACUUM과 달리 조금씩 나누어 실행할 수 있으므로 한가한 시간에 여러 번 호출합니다.
+        '''
+        freelist_count = (await self._execute_query("PRAGMA freelist_count"))[0][0]
+        # execute는 결과 컬럼이 없는 PRAGMA를 한 단계만 실행하여 페이지를 하나만 반환하므로, 끝까지 실행하는 executescript를 사용합니다.
+        await self.conn.executescript(f"PRAGMA incremental_vacuum({int(page_num)});")
+        return freelist_count - (await self._execute_query("PRAGMA freelist_count"))[0][0]
 
     #### DBHandler methods
 
@@ -198,11 +1083,15 @@ class SQLiteDBHandler:
         os.makedirs(os.path.dirname(self.db_file), exist_ok=True)
         await self._create_connection()
 
+        await self._execute_query(SQLiteDBHandler.SQL_DROP_PLAYER_MATCHES_TABLE)
+        await self._execute_query(SQLiteDBHandler.SQL_DROP_PLAYER_ROLLING_STATS_TABLE)
+        await self._execute_query(SQLiteDBHandler.SQL_DROP_LEADERBOARD_TABLE)
+        await self._execute_query(SQLiteDBHandler.SQL_DROP_LEADERBOARD_WATERMARK_TABLE)
         await self._execute_query(SQLiteDBHandler.SQL_DROP_PLAYERS_TABLE)
         await self._execute_query(SQLiteDBHandler.SQL_DROP_PLAYER_MATCH_STATS_TABLE)
-
-        await self._execute_query(SQLiteDBHandler.SQL_CREATE_PLAYERS_TABLE)
-        await self._execute_query(SQLiteDBHandler.SQL_CREATE_PLAYER_MATCH_STATS_TABLE)
+        await self._execute_query(SQLiteDBHandler.SQL_DROP_MATCHES_TABLE)
+        await self._execute_query(SQLiteDBHandler.SQL_DROP_SCHEMA_VERSION_TABLE)
+        await self.migrate()
 
         return self
 
@@ -210,9 +1099,8 @@ class SQLiteDBHandler:
         os.makedirs(os.path.dirname(self.db_file), exist_ok=True)
         await self._create_connection()
 
-        await self.compare_and_update_structure('players', SQLiteDBHandler.SQL_CREATE_PLAYERS_TABLE)
-        await self._execute_query(SQLiteDBHandler.SQL_CREATE_PLAYERS_TABLE)
-        await self._execute_query(SQLiteDBHandler.SQL_CREATE_PLAYER_MATCH_STATS_TABLE)
+        await self.migrate()
+        await self.verify_query_plans()
 
         return self
 
@@ -220,140 +1108,331 @@ class SQLiteDBHandler:
         await self._close_connection()
 
     async def is_player_exists(self, normalized_id: str = None, player_name: str = None) -> bool:
-        if normalized_id is None and player_name is None:
-            raise ValueError("Either 'normalized_id' or 'player_name' must be provided.")
-
-        query = "SELECT COUNT(*) FROM players WHERE "
-        params = ()
-        if normalized_id:
-            query += "normalized_id = ?"
-            params = (normalized_id,)
-        elif player_name:
-            query += "name = ?"
-            params = (player_name,)
-
-        async with self.conn.execute(query, params) as cursor:
-            count = (await cursor.fetchone())[0]
-
-        return count > 0
+        try:
+            await self._get_player_db(normalized_id, player_name)
+        except PlayerNotFoundError_Balancer:
+            return False
+        return True
 
     async def get_player(self, normalized_id: str = None, player_name: str = None) -> Player:
-        if normalized_id is None and player_name is None:
-            raise ValueError("Either 'normalized_id' or 'player_name' must be provided.")
-
-        query = "SELECT * FROM players WHERE "
-        params = ()
-        if normalized_id:
-            query += "normalized_id = ?"
-            params = (normalized_id,)
-        elif player_name:
-            query += "name = ?"
-            params = (player_name,)
-
-        async with self.conn.execute(query, params) as cursor:
-            row = await cursor.fetchone()
-
-        if row:
-            player_data = {field[0]: row[idx] for idx, field in enumerate(cursor.description) if field[0] in Player.__annotations__}
-            player = Player(**player_data)
-            player.match_list = json.loads(player.match_list)['data']
-            player.normal_stats = json.loads(player.normal_stats)
-            player.rank_stats = json.loads(player.rank_stats)
-            return player
-        else:
-            raise PlayerNotFoundError_Balancer
+        return (await self._get_player_db(normalized_id, player_name)).player
 
     async def is_player_match_stats_exists(self, player_name: str, match_id: str) -> bool:
         if not match_id or not player_name:
             raise ValueError("Both 'player_name' and 'match_id' must be provided.")
+        if (player_name, match_id) in self._player_match_stats_cache:
+            return True
 
-        query = "SELECT COUNT(*) FROM player_match_stats WHERE player_name = ? AND match_id = ?"
-        params = (
-            player_name,
-            match_id,
-        )
-
-        async with self.conn.execute(query, params) as cursor:
+        async with self._read(SQLiteDBHandler.HOT_QUERIES['is_player_match_stats_exists'], (player_name, match_id)) as cursor:
             count = (await cursor.fetchone())[0]
 
         return count > 0
 
     async def get_player_match_stats(self, player_name: str, match_id: str) -> PlayerMatchStats:
-        async with self.conn.execute(
-            "SELECT * FROM player_match_stats WHERE player_name = ? AND match_id = ?",
-            (
-                player_name,
-                match_id,
-            ),
-        ) as cursor:
+        player_match_stats = self._player_match_stats_cache.get((player_name, match_id))
+        if player_match_stats is not None:
+            return player_match_stats
+
+        generation = self._player_match_stats_cache.generation
+        row_codec = self._get_row_codec(PlayerMatchStats)
+        async with self._read(SQLiteDBHandler.HOT_QUERIES['get_player_match_stats'], (player_name, match_id)) as cursor:
             row = await cursor.fetchone()
 
         if row:
-            match_stats_data = {field[0]: row[idx] for idx, field in enumerate(cursor.description) if field[0] in PlayerMatchStats.__annotations__}
-            player_match_stats = PlayerMatchStats(**match_stats_data)
-            player_match_stats.is_custom_match = True if player_match_stats.is_custom_match == '1' else False
-            player_match_stats.game_mode = GameMode(player_match_stats.game_mode)
-            player_match_stats.match_type = MatchType(player_match_stats.match_type)
+            player_match_stats = row_codec.decode(row)
+            self._player_match_stats_cache.put((player_name, match_id), player_match_stats, generation)
             return player_match_stats
         else:
             raise PlayerMatchStatsNotFoundError_Balancer
 
+    async def get_player_match_ids(self, player_name: str, match_ids: List[str]) -> Set[str]:
+        '''
+        `match_ids` 중 플레이어의 매치 스탯이 저장되어 있고 매치 정보도 함께 저장된 매치 id를 반환합니다.
+        '''
+        if not match_ids:
+            return set()
+
+        query = self._expand_in_clause(SQLiteDBHandler.HOT_QUERIES['get_player_match_ids'], len(match_ids))
+        async with self._read(query, (player_name, *match_ids)) as cursor:
+            rows = await cursor.fetchall()
+        return {row[0] for row in rows}
+
+    async def get_latest_player_match_stats_list(
+        self, player_name: str, game_mode: GameMode, match_types: List[MatchType], max_match_num: int
+    ) -> List[PlayerMatchStats]:
+        generation = self._player_match_stats_cache.generation
+        row_codec = self._get_row_codec(PlayerMatchStats)
+        # CROSS JOIN으로 player_match_stats를 바깥 루프에 고정하여 게임 모드의 전체 매치가 아닌 해당 플레이어의 매치만 탐색합니다.
+        query = self._expand_in_clause(SQLiteDBHandler.HOT_QUERIES['get_latest_player_match_stats_list'], len(match_types))
+        async with self._read(query, (player_name, game_mode.value, *[match_type.value for match_type in match_types], max_match_num)) as cursor:
+            rows = await cursor.fetchall()
+
+        player_match_stats_list = [row_codec.decode(row) for row in rows]
+        for player_match_stats in player_match_stats_list:
+            self._player_match_stats_cache.put((player_match_stats.player_name, player_match_stats.match_id), player_match_stats, generation)
+        return player_match_stats_list
+
+    async def get_new_player_match_stats_rows(self, player_name: str, last_seq: int) -> List[tuple]:
+        '''
+        seq가 `last_seq`보다 큰, 즉 `last_seq` 행 이후에 저장된 플레이어의 매치 스탯을 저장된 순서대로 조회합니다.
+        각 행은 (seq, match_id, date, game_mode, match_type, win_place, damage_dealt, kills, assists)이며 매치 정보가 저장된 행만 포함됩니다.
+        '''
+        async with self._read(SQLiteDBHandler.HOT_QUERIES['get_new_player_match_stats_rows'], (player_name, last_seq)) as cursor:
+            return await cursor.fetchall()
+
+    async def get_rolling_stats(self, player_name: str, game_mode: GameMode) -> Union[RollingStats, None]:
+        row_codec = self._get_row_codec(RollingStats)
+        async with self._read(SQLiteDBHandler.HOT_QUERIES['get_rolling_stats'], (player_name, game_mode.value)) as cursor:
+            row = await cursor.fetchone()
+        return row_codec.decode(row) if row else None
+
+    async def get_rolling_stats_with_new_match_stats(self, game_mode: GameMode, last_seq: int) -> Dict[str, RollingStats]:
+        '''
+        seq가 `last_seq`보다 큰 매치 스탯이 저장된 플레이어들의 롤링 스탯을 {플레이어 이름: 롤링 스탯}으로 한 번에 조회합니다.
+        '''
+        row_codec = self._get_row_codec(RollingStats)
+        async with self._read(
+            f"SELECT {row_codec.columns_str} FROM player_rolling_stats WHERE game_mode = ? "
+            f"AND player_name IN (SELECT player_name FROM player_match_stats WHERE seq > ?)",
+            (game_mode.value, last_seq),
+        ) as cursor:
+            rows = await cursor.fetchall()
+        return {rolling_stats.player_name: rolling_stats for rolling_stats in map(row_codec.decode, rows)}
+
+    async def upsert_rolling_stats(self, rolling_stats: RollingStats, updated_date: datetime = None) -> None:
+        await self.bulk_upsert_rolling_stats([rolling_stats], updated_date)
+
+    async def bulk_upsert_rolling_stats(self, rolling_stats_list: Iterable[RollingStats], updated_date: datetime = None) -> None:
+        await self._upsert_dataclasses(
+            "player_rolling_stats", rolling_stats_list, ["player_name", "game_mode"], extra_columns={"updated_date": updated_date or datetime_now()}
+        )
+
+    async def get_max_player_match_stats_seq(self) -> int:
+        async with self._read("SELECT MAX(seq) FROM player_match_stats") as cursor:
+            row = await cursor.fetchone()
+        return row[0] or 0
+
+    async def get_unscored_player_match_stats_rows(self, game_mode: GameMode, last_seq: int) -> Dict[str, List[tuple]]:
+        '''
+        리더보드 점수를 다시 계산해야 하는 플레이어들의 반영되지 않은 매치 스탯을 한 번에 조회하여 {플레이어 이름: 행 목록}으로 반환합니다.
+        대상은 seq가 `last_seq`보다 큰 매치 스탯이 저장된 플레이어와 롤링 스탯이 지워진 리더보드 플레이어이며, 반영할 행이 없는 플레이어는 빈 목록입니다.
+        각 행은 `get_new_player_match_stats_rows`와 같은 형태이고, 롤링 스탯의 `last_seq` 이후에 저장된 행만 저장된 순서대로 포함됩니다.
+        '''
+        rows_by_player = {player_name: [] for player_name in await self.get_leaderboard_player_names_without_rolling_stats(game_mode)}
+        async with self._read(SQLiteDBHandler.SQL_SELECT_UNSCORED_PLAYER_MATCH_STATS_ROWS, (last_seq, game_mode.value, game_mode.value)) as cursor:
+            rows = await cursor.fetchall()
+        for row in rows:
+            rows_by_player.setdefault(row[0], []).append(row[1:])
+        return rows_by_player
+
+    async def get_leaderboard_last_seq(self, game_mode: GameMode) -> int:
+        async with self._read("SELECT last_seq FROM leaderboard_watermark WHERE game_mode = ?", (game_mode.value,)) as cursor:
+            row = await cursor.fetchone()
+        return row[0] if row else 0
+
+    async def update_leaderboard_last_seq(self, game_mode: GameMode, last_seq: int, updated_date: datetime = None) -> None:
+        # 동시에 갱신되더라도 기준점이 뒤로 돌아가지 않도록 더 큰 값만 저장합니다.
+        await self._write(
+            "INSERT INTO leaderboard_watermark (game_mode, last_seq, updated_date) VALUES (?, ?, ?) "
+            "ON CONFLICT(game_mode) DO UPDATE SET last_seq = MAX(last_seq, excluded.last_seq), updated_date = excluded.updated_date",
+            (game_mode.value, last_seq, updated_date or datetime_now()),
+        )
+
+    async def get_leaderboard_entries(self, game_mode: GameMode) -> List[LeaderboardEntry]:
+        row_codec = self._get_row_codec(LeaderboardEntry)
+        async with self._read(f"SELECT {row_codec.columns_str} FROM leaderboard WHERE game_mode = ?", (game_mode.value,)) as cursor:
+            rows = await cursor.fetchall()
+        return [row_codec.decode(row) for row in rows]
+
+    async def get_leaderboard_player_names_without_rolling_stats(self, game_mode: GameMode) -> Set[str]:
+        '''
+        리더보드에는 있지만 매치 스탯 정리로 롤링 스탯이 지워져 점수를 다시 계산해야 하는 플레이어 이름들을 반환합니다.
+        '''
+        async with self._read(
+            "SELECT l.player_name FROM leaderboard l WHERE l.game_mode = ? "
+            "AND NOT EXISTS (SELECT 1 FROM player_rolling_stats r WHERE r.player_name = l.player_name AND r.game_mode = l.game_mode)",
+            (game_mode.value,),
+        ) as cursor:
+            rows = await cursor.fetchall()
+        return {row[0] for row in rows}
+
+    async def bulk_upsert_leaderboard_entries(self, leaderboard_entries: Iterable[LeaderboardEntry], updated_date: datetime = None) -> None:
+        await self._upsert_dataclasses(
+            "leaderboard", leaderboard_entries, ["player_name", "game_mode"], extra_columns={"updated_date": updated_date or datetime_now()}
+        )
+
+    async def delete_leaderboard_entries(self, player_names: Iterable[str], game_mode: GameMode) -> None:
+        rows = [(player_name, game_mode.value) for player_name in player_names]
+        if rows:
+            await self._write("DELETE FROM leaderboard WHERE player_name = ? AND game_mode = ?", rows, is_many=True)
+
+    async def insert_match(self, match: Match, updated_date: datetime = None) -> None:
+        match_db = Match_DB(
+            id=match.id,
+            is_custom_match=match.is_custom_match,
+            game_mode=match.game_mode,
+            match_type=match.match_type,
+            map_name=match.map_name,
+            duration=match.duration,
+            season_state=match.season_state,
+            date=match.date,
+            updated_date=updated_date or datetime_now(),
+        )
+        column_names, column_values = self._encode_dataclass(match_db)
+
+        columns_str = ', '.join(column_names)
+        placeholders_str = ', '.join(['?' for _ in column_values])
+        await self._write(f'INSERT OR IGNORE INTO matches ({columns_str}) VALUES ({placeholders_str})', column_values)
+
+    async def get_match_relevance(self, match_ids: List[str], game_mode: GameMode, match_types: List[MatchType]) -> Dict[str, bool]:
+        '''
+        이미 저장된 매치들에 대해 게임 모드와 매치 타입이 조건에 맞는지 여부를 반환합니다. 저장되지 않은 매치는 결과에 포함되지 않습니다.
+        '''
+        if not match_ids:
+            return {}
+
+        query = self._expand_in_clause(SQLiteDBHandler.HOT_QUERIES['get_match_relevance'], len(match_ids))
+        async with self._read(query, match_ids) as cursor:
+            rows = await cursor.fetchall()
+
+        match_type_values = [match_type.value for match_type in match_types]
+        return {match_id: mode == game_mode.value and match_type in match_type_values for match_id, mode, match_type in rows}
+
     async def is_player_data_outdated(
-        self, normalized_id: str = None, player_name: str = None, expiration_period: timedelta = timedelta(days=7)
+        self,
+        normalized_id: str = None,
+        player_name: str = None,
+        expiration_period: timedelta = timedelta(days=7),
+        entity: FreshnessEntity = FreshnessEntity.PLAYER,
     ) -> bool:
-        last_update = await self._get_player_update_date(normalized_id, player_name)
-        if isinstance(last_update, Error_Balancer):
-            return True  # 에러가 발생한 경우 데이터를 업데이트해야 한다고 가정
-
+        last_update = await self.get_player_update_date(normalized_id, player_name, entity)
         if last_update is None:
             return True
         else:
             return datetime_now() - last_update > expiration_period
 
-    async def insert_player(self, player: Player, updated_date: datetime = datetime_now()) -> None:
-        player_copy = Player(**asdict(player))
-        player_copy.match_list = json.dumps({'data': player.match_list})
-
-        await self._insert_dataclass('players', player_copy)
-        await self.conn.execute("UPDATE players SET updated_date = ?", (updated_date,))
-        await self.conn.commit()
-
-    async def insert_player_match_stats(self, player_match_stats: PlayerMatchStats, updated_date: datetime = datetime_now()) -> None:
-        player_match_stats_copy = PlayerMatchStats(**asdict(player_match_stats))
+    async def touch_player(self, player_name: str, entities: List[FreshnessEntity], updated_date: datetime = None) -> None:
+        '''
+        데이터가 바뀌지 않았더라도 최신 상태임을 확인했을 때, 해당 플레이어 행의 갱신 시각만 기록합니다.
+        '''
+        updated_date = updated_date or datetime_now()
+        update_columns_str = ', '.join([f"{entity.value} = ?" for entity in entities])
+        with self._invalidating_players(player_name=player_name):
+            await self._write(f"UPDATE players SET {update_columns_str} WHERE name = ?", (*[updated_date for _ in entities], player_name))
+
+    async def insert_player(self, player: Player, updated_date: datetime = None) -> None:
+        updated_date = updated_date or datetime_now()
+        insert_query = self._get_insert_dataclass_query(
+            'players',
+            player,
+            extra_columns={FreshnessEntity.PLAYER.value: updated_date, FreshnessEntity.MATCH_LIST.value: updated_date},
+            exclude_fields=['match_list'],
+        )
+        # 플레이어 행과 매치 목록은 하나의 트랜잭션으로 저장하므로, 매치 목록 없이 플레이어만 저장되는 일은 없습니다.
+        with self._invalidating_players([player.normalized_id]):
+            await self._write_many([insert_query, *self._get_player_matches_queries(player.normalized_id, player.match_list)])
+
+    async def insert_player_match_stats(self, player_match_stats: PlayerMatchStats, updated_date: datetime = None) -> None:
+        await self._insert_dataclass('player_match_stats', player_match_stats, extra_columns={'updated_date': updated_date or datetime_now()})
+
+    async def insert_player_match_stats_list(self, player_match_stats_list: Iterable[PlayerMatchStats], updated_date: datetime = None) -> int:
+        '''
+        여러 플레이어의 매치 스탯을 하나의 트랜잭션으로 저장합니다. 이미 저장된 (player_name, match_id) 행은 건너뜁니다.
+        '''
+        return await self._upsert_dataclasses(
+            'player_match_stats',
+            player_match_stats_list,
+            ['player_name', 'match_id'],
+            extra_columns={'updated_date': updated_date or datetime_now()},
+            update_on_conflict=False,
+        )
 
-        await self._insert_dataclass('player_match_stats', player_match_stats_copy)
-        await self.conn.execute("UPDATE player_match_stats SET updated_date = ?", (updated_date,))
-        await self.conn.commit()
+    async def bulk_upsert_player_match_stats(self, player_match_stats_list: Iterable[PlayerMatchStats], updated_date: datetime = None) -> int:
+        '''
+        여러 매치 스탯을 하나의 트랜잭션으로 저장합니다. 이미 저장된 (player_name, match_id) 행은 새 값으로 갱신합니다.
+        '''
+        player_match_stats_list = list(player_match_stats_list)
+        with self._invalidating_player_match_stats(player_match_stats_list):
+            return await self._upsert_dataclasses(
+                'player_match_stats', player_match_stats_list, ['player_name', 'match_id'], extra_columns={'updated_date': updated_date or datetime_now()}
+            )
+
+    async def bulk_upsert_players(self, players: Iterable[Player], updated_date: datetime = None) -> int:
+        '''
+        여러 플레이어를 하나의 트랜잭션으로 저장합니다. 이미 저장된 normalized_id의 행은 새 값으로 갱신하며,
+        discord_id와 sync_cursor처럼 Player에 없는 컬럼은 그대로 유지됩니다.
+        '''
+        updated_date = updated_date or datetime_now()
+        players = list(players)
+        upsert_query = self._get_upsert_dataclasses_query(
+            'players',
+            players,
+            ['normalized_id'],
+            extra_columns={FreshnessEntity.PLAYER.value: updated_date, FreshnessEntity.MATCH_LIST.value: updated_date},
+            exclude_fields=['match_list'],
+        )
+        if upsert_query is None:
+            return 0
+
+        player_matches_queries = [query for player in players for query in self._get_player_matches_queries(player.normalized_id, player.match_list)]
+        with self._invalidating_players([player.normalized_id for player in players]):
+            return (await self._write_many([upsert_query, *player_matches_queries]))[0]
+
+    async def update_player(self, player: Player, updated_date: datetime = None, include_stats: bool = True) -> None:
+        '''
+        `include_stats`가 False이면 `PLAYER_STATS_COLUMNS`는 저장된 값을 그대로 둡니다.
+        '''
+        updated_date = updated_date or datetime_now()
+        exclude_fields = ['match_list'] if include_stats else ['match_list', *SQLiteDBHandler.PLAYER_STATS_COLUMNS]
+        update_query = self._get_update_dataclass_query(
+            'players',
+            player,
+            'normalized_id',
+            extra_columns={FreshnessEntity.PLAYER.value: updated_date, FreshnessEntity.MATCH_LIST.value: updated_date},
+            exclude_fields=exclude_fields,
+        )
+        with self._invalidating_players([player.normalized_id]):
+            await self._write_many([update_query, *self._get_player_matches_queries(player.normalized_id, player.match_list)])
+
+    async def update_player_match_stats(self, player_match_stats: PlayerMatchStats, updated_date: datetime = None) -> None:
+        with self._invalidating_player_match_stats([player_match_stats]):
+            await self._update_dataclass(
+                'player_match_stats', player_match_stats, ['player_name', 'match_id'], extra_columns={'updated_date': updated_date or datetime_now()}
+            )
+
+    async def update_rank_stats(self, player_name: str, rank_stats: dict, updated_date: datetime = None) -> None:
+        with self._invalidating_players(player_name=player_name):
+            await self._write(
+                f"UPDATE players SET rank_stats = ?, {FreshnessEntity.RANKED_STATS.value} = ? WHERE name = ?",
+                (json.dumps(rank_stats), updated_date or datetime_now(), player_name),
+            )
 
-    async def update_player(self, player: Player, updated_date: datetime = datetime_now()) -> None:
-        player_copy = Player(**asdict(player))
-        player_copy.match_list = json.dumps({'data': player.match_list})
+    async def update_discord_id(self, player_name: str, discord_id: str) -> None:
+        with self._invalidating_players(player_name=player_name):
+            await self._write("UPDATE players SET discord_id = ? WHERE name = ?", (discord_id, player_name))
 
-        await self._update_dataclass('players', player_copy, 'normalized_id')
-        await self.conn.execute("UPDATE players SET updated_date = ?", (updated_date,))
-        await self.conn.commit()
+    async def get_sync_cursor(self, player_name: str) -> str:
+        return (await self._get_player_db(player_name=player_name)).sync_cursor or ''
 
-    async def update_player_match_stats(self, player_match_stats: PlayerMatchStats, updated_date: datetime = datetime_now()) -> None:
-        player_match_stats_copy = PlayerMatchStats(**asdict(player_match_stats))
+    async def update_sync_cursor(self, player_name: str, sync_cursor: str) -> None:
+        with self._invalidating_players(player_name=player_name):
+            await self._write("UPDATE players SET sync_cursor = ? WHERE name = ?", (sync_cursor, player_name))
 
-        await self._update_dataclass('player_match_stats', player_match_stats_copy, 'match_id')
-        await self.conn.execute("UPDATE player_match_stats SET updated_date = ?", (updated_date,))
-        await self.conn.commit()
+    async def get_discord_id(self, player_name: str) -> str:
+        return (await self._get_player_db(player_name=player_name)).discord_id
 
-    async def update_discord_id(self, player_name: str, discord_id: str) -> None:
-        await self.conn.execute("UPDATE players SET discord_id = ? WHERE name = ?", (discord_id, player_name))
-        await self.conn.commit()
+    async def get_existing_player_names(self, player_names: Iterable[str]) -> Set[str]:
+        player_names = list(player_names)
+        if not player_names:
+            return set()
 
-    async def get_discord_id(self, player_name: str) -> str:
-        async with self.conn.execute("SELECT discord_id FROM players WHERE name = ?", (player_name,)) as cursor:
-            row = await cursor.fetchone()
-        if row:
-            return row[0]
-        else:
-            raise PlayerNotFoundError_Balancer
+        query = self._expand_in_clause(SQLiteDBHandler.HOT_QUERIES['get_existing_player_names'], len(player_names))
+        async with self._read(query, player_names) as cursor:
+            rows = await cursor.fetchall()
+        return {row[0] for row in rows}
 
     async def get_player_name_by_discord_id(self, discord_id: str) -> str:
-        async with self.conn.execute("SELECT name FROM players WHERE discord_id = ?", (discord_id,)) as cursor:
+        async with self._read(SQLiteDBHandler.HOT_QUERIES['get_player_name_by_discord_id'], (discord_id,)) as cursor:
             row = await cursor.fetchone()
         if row:
             return row[0]
@@ -0,0 +1,106 @@
+from dataclasses import dataclass, field
+import bisect
+from typing import Dict, Iterable, List, Tuple
+
+from ks_bot.common.enum import GameMode
+from ks_bot.common.error import LeaderboardEntryNotFoundError_Balancer
+
+
+@dataclass
+class LeaderboardEntry:
+    player_name: str = ''
+    game_mode: GameMode = field(default_factory=GameMode.from_string)
+    score: float = 0.0
+    rounds_played: int = 0
+
+
+@dataclass
+class LeaderboardRank:
+    '''
+    리더보드에서의 순위입니다. 점수가 같은 플레이어는 같은 순위이며, `lower_player_num`은 점수가 더 낮은 플레이어 수입니다.
+    '''
+
+    entry: LeaderboardEntry = field(default_factory=LeaderboardEntry)
+    rank: int = 0
+    player_num: int = 0
+    lower_player_num: int = 0
+
+    @property
+    def percentile(self) -> float:
+        # 점수가 더 낮은 플레이어의 비율(%)입니다.
+        return 100 * self.lower_player_num / self.player_num if self.player_num else 0.0
+
+    @property
+    def top_ratio(self) -> float:
+        # '상위 n%'로 표시할 때의 비율(%)입니다.
+        return 100 * self.rank / self.player_num if self.player_num else 0.0
+
+
+class Leaderboard:
+    '''
+    한 게임 모드의 플레이어 점수를 내림차순으로 정렬해 둔 메모리 인덱스입니다. DB의 leaderboard 테이블에서 읽어 만들고,
+    점수가 바뀐 플레이어만 `update`로 반영합니다. 순위와 백분위는 이진 탐색으로 O(log n)에 찾습니다.
+    '''
+
+    def __init__(self, game_mode: GameMode = GameMode.SQUAD, entries: Iterable[LeaderboardEntry] = ()):
+        self.game_mode = game_mode
+        self._entries: Dict[str, LeaderboardEntry] = {entry.player_name: entry for entry in entries}
+        # (-score, player_name) 오름차순, 즉 점수 내림차순으로 정렬되어 있습니다.
+        self._keys: List[Tuple[float, str]] = sorted(Leaderboard._get_key(entry) for entry in self._entries.values())
+
+    @staticmethod
+    def _get_key(entry: LeaderboardEntry) -> Tuple[float, str]:
+        return -entry.score, entry.player_name
+
+    def _get_rank_of_key(self, key: Tuple[float, str], entry: LeaderboardEntry) -> LeaderboardRank:
+        # (-score,)는 같은 점수의 어떤 키보다도 앞에 정렬되고, (-score, chr(0x10FFFF))는 뒤에 정렬됩니다.
+        higher_player_num = bisect.bisect_left(self._keys, (key[0],))
+        not_lower_player_num = bisect.bisect_right(self._keys, (key[0], chr(0x10FFFF)))
+        return LeaderboardRank(
+            entry=entry, rank=higher_player_num + 1, player_num=len(self._keys), lower_player_num=len(self._keys) - not_lower_player_num
+        )
+
+    def update(self, entry: LeaderboardEntry) -> bool:
+        '''
+        플레이어의 점수를 반영하고, 순위가 바뀔 수 있는 변경이 있었는지 반환합니다.
+        '''
+        stored_entry = self._entries.get(entry.player_name)
+        if stored_entry == entry:
+            return False
+
+        if stored_entry is not None:
+            self.remove(entry.player_name)
+        self._entries[entry.player_name] = entry
+        bisect.insort(self._keys, Leaderboard._get_key(entry))
+        return True
+
+    def remove(self, player_name: str) -> bool:
+        entry = self._entries.pop(player_name, None)
+        if entry is None:
+            return False
+
+        key = Leaderboard._get_key(entry)
+        del self._keys[bisect.bisect_left(self._keys, key)]
+        return True
+
+    def get_rank(self, player_name: str) -> LeaderboardRank:
+        entry = self._entries.get(player_name)
+        if entry is None:
+            raise LeaderboardEntryNotFoundError_Balancer(player_name=player_name)
+        return self._get_rank_of_key(Leaderboard._get_key(entry), entry)
+
+    def get_page(self, page: int = 1, page_size: int = 10) -> List[LeaderboardRank]:
+        '''
+        점수 순으로 `page`번째 페이지(1부터 시작)의 플레이어들을 반환합니다.
+        '''
+        start_idx = max(page - 1, 0) * page_size
+        return [self._get_rank_of_key(key, self._entries[key[1]]) for key in self._keys[start_idx : start_idx + page_size]]
+
+    def get_page_num(self, page_size: int = 10) -> int:
+        return max((len(self._keys) + page_size - 1) // page_size, 1)
+
+    def __contains__(self, player_name: str) -> bool:
+        return player_name in self._entries
+
+    def __len__(self) -> int:
+        return len(self._keys)
@@ -0,0 +1,121 @@
+from collections import OrderedDict
+from dataclasses import dataclass
+from enum import Enum
+import sys
+from typing import Any, Callable, Hashable
+
+
+@dataclass
+class LRUCacheStats:
+    entries: int = 0
+    size: int = 0
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    invalidations: int = 0
+
+
+def estimate_size(value: Any) -> int:
+    '''
+    객체가 차지하는 메모리를 대략적으로 계산합니다. 딕셔너리, 리스트와 객체의 속성을 재귀적으로 더하며, Enum 멤버처럼 공유되는 객체는 세지 않습니다.
+    '''
+    if isinstance(value, Enum):
+        return 0
+
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        size += sum(estimate_size(key) + estimate_size(item) for key, item in value.items())
+    elif isinstance(value, (list, tuple, set, frozenset)):
+        size += sum(estimate_size(item) for item in value)
+    elif hasattr(value, '__dict__') and not isinstance(value, type):
+        size += estimate_size(vars(value))
+    return size
+
+
+class LRUCache:
+    '''
+    항목 수(`max_entries`)와 대략적인 메모리 크기(`max_size`, byte) 두 가지 기준으로 크기가 제한되는 메모리 LRU 캐시입니다.
+
+    조회한 값을 캐시에 넣는 동안 같은 데이터에 쓰기가 일어나면 오래된 값이 캐시에 남을 수 있으므로, 조회 전에 `generation`을 읽어 두었다가
+    `put`에 함께 넘기면 그 사이에 무효화가 있었던 경우 값을 저장하지 않습니다.
+    '''
+
+    def __init__(
+        self,
+        max_entries: int = 1024,
+        max_size: int = 16 * 1024 * 1024,
+        sizeof: Callable[[Any], int] = estimate_size,
+        on_remove: Callable[[Hashable, Any], None] = None,
+    ):
+        self.max_entries = max_entries
+        self.max_size = max_size
+        self.generation = 0
+        self._sizeof = sizeof
+        self._on_remove = on_remove
+        self._entries: OrderedDict[Hashable, Any] = OrderedDict()
+        self._sizes: dict = {}
+        self._total_size = 0
+        self._stats = LRUCacheStats()
+
+    def _remove(self, key: Hashable) -> Any:
+        value = self._entries.pop(key)
+        self._total_size -= self._sizes.pop(key)
+        if self._on_remove:
+            self._on_remove(key, value)
+        return value
+
+    def _evict(self) -> None:
+        while self._entries and (len(self._entries) > self.max_entries or self._total_size > self.max_size):
+            self._remove(next(iter(self._entries)))
+            self._stats.evictions += 1
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        if key not in self._entries:
+            self._stats.misses += 1
+            return default
+
+        self._entries.move_to_end(key)
+        self._stats.hits += 1
+        return self._entries[key]
+
+    def put(self, key: Hashable, value: Any, generation: int = None) -> None:
+        if generation is not None and generation != self.generation:
+            return
+
+        if key in self._entries:
+            self._remove(key)
+        size = self._sizeof(value)
+        if size > self.max_size:
+            return
+
+        self._entries[key] = value
+        self._sizes[key] = size
+        self._total_size += size
+        self._evict()
+
+    def invalidate(self, key: Hashable) -> None:
+        self.generation += 1
+        if key in self._entries:
+            self._remove(key)
+            self._stats.invalidations += 1
+
+    def clear(self) -> None:
+        self.generation += 1
+        for key in list(self._entries):
+            self._remove(key)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._entries
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get_stats(self) -> LRUCacheStats:
+        return LRUCacheStats(
+            entries=len(self._entries),
+            size=self._total_size,
+            hits=self._stats.hits,
+            misses=self._stats.misses,
+            evictions=self._stats.evictions,
+            invalidations=self._stats.invalidations,
+        )
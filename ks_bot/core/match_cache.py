@@ -0,0 +1,142 @@
+from collections import OrderedDict
+from dataclasses import dataclass
+import asyncio
+import gzip
+import json
+import os
+import re
+import tempfile
+from termcolor import cprint
+from typing import Union
+
+
+@dataclass
+class MatchCacheStats:
+    entries: int = 0
+    size: int = 0
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+
+
+class MatchCache:
+    '''
+    PUBG `matches/{id}` 응답을 gzip으로 압축하여 디스크에 저장하는 LRU 캐시입니다.
+
+    매치 응답은 한 번 생성되면 바뀌지 않으므로 매치 id를 그대로 키로 사용합니다. 전체 크기가 `max_size`를 넘으면
+    가장 오래 사용되지 않은 매치부터 삭제하며, 사용 순서는 파일의 mtime으로 기록되어 재시작 후에도 유지됩니다.
+    '''
+
+    FILE_EXTENSION = '.json.gz'
+    MATCH_ID_PATTERN = re.compile(r'^[0-9A-Za-z-]+$')
+
+    def __init__(self, cache_dir: str, max_size: int = 512 * 1024 * 1024, compress_level: int = 6):
+        self.cache_dir = os.path.abspath(cache_dir)
+        self.max_size = max_size
+        self.compress_level = compress_level
+        self._entries: OrderedDict[str, int] = OrderedDict()
+        self._total_size = 0
+        self._stats = MatchCacheStats()
+
+    def _get_path(self, match_id: str) -> str:
+        return os.path.join(self.cache_dir, f'{match_id}{MatchCache.FILE_EXTENSION}')
+
+    def _scan(self) -> OrderedDict:
+        entries = []
+        for file_name in os.listdir(self.cache_dir):
+            if not file_name.endswith(MatchCache.FILE_EXTENSION):
+                continue
+            stat = os.stat(os.path.join(self.cache_dir, file_name))
+            entries.append((stat.st_mtime, file_name[: -len(MatchCache.FILE_EXTENSION)], stat.st_size))
+
+        return OrderedDict((match_id, size) for _, match_id, size in sorted(entries))
+
+    def _load(self, match_id: str) -> dict:
+        path = self._get_path(match_id)
+        with gzip.open(path, 'rt', encoding='utf-8') as f:
+            match_data = json.load(f)
+        os.utime(path)
+        return match_data
+
+    def _store(self, match_id: str, match_data: dict) -> int:
+        # 같은 매치를 동시에 저장하더라도 서로의 임시 파일을 덮어쓰지 않도록 호출마다 고유한 임시 파일에 쓴 뒤 교체합니다.
+        fd, temp_path = tempfile.mkstemp(dir=self.cache_dir, prefix=f'{match_id}.', suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as raw_file, gzip.open(raw_file, 'wt', encoding='utf-8', compresslevel=self.compress_level) as f:
+                json.dump(match_data, f, separators=(',', ':'))
+            size = os.path.getsize(temp_path)
+            os.replace(temp_path, self._get_path(match_id))
+        except BaseException:
+            try:
+                os.remove(temp_path)
+            except FileNotFoundError:
+                pass
+            raise
+        return size
+
+    def _remove(self, match_id: str) -> None:
+        size = self._entries.pop(match_id, 0)
+        self._total_size -= size
+        try:
+            os.remove(self._get_path(match_id))
+        except FileNotFoundError:
+            pass
+
+    def _evict(self) -> None:
+        while self._total_size > self.max_size and self._entries:
+            match_id = next(iter(self._entries))
+            self._remove(match_id)
+            self._stats.evictions += 1
+
+    def _is_valid_match_id(self, match_id: str) -> bool:
+        return bool(match_id) and MatchCache.MATCH_ID_PATTERN.match(match_id) is not None
+
+    async def open(self) -> 'MatchCache':
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self._entries = await asyncio.to_thread(self._scan)
+        self._total_size = sum(self._entries.values())
+        self._evict()
+        return self
+
+    async def get(self, match_id: str) -> Union[dict, None]:
+        if match_id not in self._entries:
+            self._stats.misses += 1
+            return None
+
+        try:
+            match_data = await asyncio.to_thread(self._load, match_id)
+        except (OSError, EOFError, ValueError) as e:
+            cprint(f'Broken match cache is removed. match_id: {match_id}, error: {e}', 'yellow')
+            self._remove(match_id)
+            self._stats.misses += 1
+            return None
+
+        self._entries.move_to_end(match_id)
+        self._stats.hits += 1
+        return match_data
+
+    async def put(self, match_id: str, match_data: dict) -> None:
+        if not self._is_valid_match_id(match_id):
+            return
+
+        try:
+            size = await asyncio.to_thread(self._store, match_id, match_data)
+        except OSError as e:
+            cprint(f'Failed to store match cache. match_id: {match_id}, error: {e}', 'yellow')
+            return
+
+        self._total_size += size - self._entries.pop(match_id, 0)
+        self._entries[match_id] = size
+        self._evict()
+
+    def __contains__(self, match_id: str) -> bool:
+        return match_id in self._entries
+
+    def get_stats(self) -> MatchCacheStats:
+        return MatchCacheStats(
+            entries=len(self._entries),
+            size=self._total_size,
+            hits=self._stats.hits,
+            misses=self._stats.misses,
+            evictions=self._stats.evictions,
+        )
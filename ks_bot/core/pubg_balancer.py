@@ -1,29 +1,102 @@
 import asyncio
 import os
+import time
+from collections import deque
+from dataclasses import dataclass, field, fields, replace
 from termcolor import colored, cprint
-from typing import List, Dict, Union, Tuple
+from typing import Deque, List, Dict, Union, Tuple
 from datetime import datetime, timedelta
 
-from ks_bot.core.request_handler import HttpMethod, APIRequestHandler
+from ks_bot.core.request_handler import HttpMethod, APIRequestHandler, ConnectionPoolStats, RequestPriority, SchedulerStats
 from ks_bot.common.error import *
 from ks_bot.common.common import *
 from ks_bot.common.enum import GameMode, MatchType, Tier
 from ks_bot.common.dataclass import Player, Match, Stats, PlayerMatchStats
-from ks_bot.core.db_handler import SQLiteDBHandler
+from ks_bot.core.db_handler import SQLiteDBHandler, FreshnessEntity, FreshnessPolicy, RetentionPolicy
+from ks_bot.core.leaderboard import Leaderboard, LeaderboardEntry, LeaderboardRank
+from ks_bot.core.lru_cache import LRUCache, LRUCacheStats
+from ks_bot.core.match_cache import MatchCache
+from ks_bot.core.single_flight import SingleFlight
+from ks_bot.core.stats_scorer import RollingStats, StatsScorer
+from ks_bot.core.team_balancer import TeamBalancer, TeamBalanceResult
+from ks_bot.utils import datetime_now
+
+
+@dataclass
+class FreshnessStats:
+    hits: int = 0
+    refreshes: int = 0
+
+
+@dataclass
+class StatsCachePolicy:
+    '''
+    계산한 점수를 메모리에 보관하는 기준입니다. `ttl`이 지나지 않은 점수는 그대로 사용하고, `max_stale`이 지나지 않은 점수는
+    먼저 보여 준 뒤 백그라운드에서 다시 계산합니다.
+    '''
+
+    ttl: timedelta = timedelta(minutes=5)
+    max_stale: timedelta = timedelta(days=1)
+    max_entries: int = 1024
+
+
+@dataclass
+class CachedStats:
+    '''
+    `get_cached_stats`의 결과입니다. `updated_date`는 점수를 계산한 시각(DB 매치만으로 계산한 경우 매치 목록을 마지막으로 받은 시각)이며,
+    `is_stale`이면 오래된 점수이므로 백그라운드에서 다시 계산하고 있습니다.
+    '''
+
+    stats: Stats = field(default_factory=Stats)
+    updated_date: datetime = field(default_factory=datetime_now)
+    is_stale: bool = False
+
+    @property
+    def age(self) -> timedelta:
+        return datetime_now() - self.updated_date
 
 
 class PUBG_Balancer:
     DEFAULT_MAX_MATCH_NUM = 40
+    DEFAULT_MAX_CONCURRENT_MATCH_FETCHES = 8
     DEFAULT_DB_PATH = 'res/history.db'
-
-    def __init__(self, api_key: str, platform: str = 'steam', db_init: bool = False):
+    DEFAULT_MATCH_CACHE_PATH = 'res/match_cache'
+    PLAYER_FILTER_MAX_NUM = 10
+    DB_MAINTENANCE_QUIET_PERIOD = 300  # sec
+    DB_VACUUM_PAGE_NUM = 256
+    DB_VACUUM_STEP_NUM = 16
+    DEFAULT_LEADERBOARD_PAGE_SIZE = 10
+
+    def __init__(
+        self,
+        api_key: str,
+        platform: str = 'steam',
+        db_init: bool = False,
+        max_concurrent_match_fetches: int = DEFAULT_MAX_CONCURRENT_MATCH_FETCHES,
+        freshness_policy: FreshnessPolicy = None,
+        retention_policy: RetentionPolicy = None,
+        stats_cache_policy: StatsCachePolicy = None,
+    ):
         self._api_key = api_key
         self._platform = platform
         self._header = {"Authorization": f"Bearer {self._api_key}", "Accept": "application/vnd.api+json"}
         self._base_url = f'https://api.pubg.com/shards/{self._platform}'
         self._api_request_handler = APIRequestHandler(api_key=self._api_key, base_url=self._base_url)
         self._db_handler = SQLiteDBHandler(PUBG_Balancer.DEFAULT_DB_PATH)
+        self._match_cache = MatchCache(PUBG_Balancer.DEFAULT_MATCH_CACHE_PATH)
         self._db_init = db_init
+        self._max_concurrent_match_fetches = max_concurrent_match_fetches
+        self._freshness_policy = freshness_policy or FreshnessPolicy()
+        self._freshness_stats = {entity: FreshnessStats() for entity in FreshnessEntity}
+        # 점수 계산에 사용하는 매치 수의 두 배까지 남겨 새 매치가 들어와도 계산 범위가 유지되도록 합니다.
+        self._retention_policy = retention_policy or RetentionPolicy(max_match_num=PUBG_Balancer.DEFAULT_MAX_MATCH_NUM * 2)
+        self._last_activity_time = 0.0
+        self._team_balancer = TeamBalancer()
+        self._stats_scorer = StatsScorer()
+        self._leaderboards: Dict[GameMode, Leaderboard] = {}
+        self._stats_cache_policy = stats_cache_policy or StatsCachePolicy()
+        self._stats_cache = LRUCache(max_entries=self._stats_cache_policy.max_entries)
+        self._stats_tasks = SingleFlight()
 
     async def __aenter__(self):
         await self.connect_db()
@@ -34,44 +107,62 @@ class PUBG_Balancer:
 
     #### request functions
 
-    async def _request(self, endpoint: str, params: dict = None, data: dict = None, json: dict = None) -> dict:
+    async def _request(
+        self,
+        endpoint: str,
+        params: dict = None,
+        data: dict = None,
+        json: dict = None,
+        rate_limited: bool = True,
+        priority: RequestPriority = RequestPriority.INTERACTIVE,
+    ) -> dict:
         result = await self._api_request_handler.request(
-            endpoint=endpoint, method=HttpMethod.GET, header=self._header, params=params, data=data, json=json
+            endpoint=endpoint,
+            method=HttpMethod.GET,
+            header=self._header,
+            params=params,
+            data=data,
+            json=json,
+            rate_limited=rate_limited,
+            priority=priority,
         )
 
         return result
 
-    async def _request_player(self, player_name: str) -> Player:
+    async def _request_player(self, player_name: str, priority: RequestPriority = RequestPriority.INTERACTIVE) -> Player:
         try:
-            player_data = await self._request(f'players?filter[playerNames]={player_name}')
-            player = Player(
-                id=player_data['data'][0]['id'],
-                normalized_id=self._parse_player_id(player_data['data'][0]['id']),
-                name=player_data['data'][0]['attributes']['name'],
-                platform=player_data['data'][0]['attributes']['shardId'],
-                ban_type=player_data['data'][0]['attributes']['banType'],
-                clan_id=player_data['data'][0]['attributes']['clanId'],
-                match_list=[match for match in player_data['data'][0]['relationships']['matches']['data'] if match['type'] == 'match'],
-            )
-            return player
+            player_data = await self._request(f'players?filter[playerNames]={player_name}', priority=priority)
+            return self._parse_player(player_data['data'][0])
         except PlayerNotFoundError_Balancer:
             raise PlayerNotFoundError_Balancer(player_name=player_name)
 
-    async def _request_single_player(self, player_id: str) -> Player:
+    async def _request_single_player(self, player_id: str, priority: RequestPriority = RequestPriority.INTERACTIVE) -> Player:
         try:
-            player_data = await self._request(f'players/{player_id}')
-            player = Player(
-                id=player_data['data']['id'],
-                normalized_id=self._parse_player_id(player_data['data']['id']),
-                name=player_data['data']['attributes']['name'],
-                platform=player_data['data']['attributes']['shardId'],
-                ban_type=player_data['data']['attributes']['banType'],
-                clan_id=player_data['data']['attributes']['clanId'],
-                match_list=[match for match in player_data['data']['relationships']['matches']['data'] if match['type'] == 'match'],
-            )
-            return player
+            player_data = await self._request(f'players/{player_id}', priority=priority)
+            return self._parse_player(player_data['data'])
         except PlayerNotFoundError_Balancer:
-            raise PlayerNotFoundError_Balancer(player_name=player_name)
+            raise PlayerNotFoundError_Balancer(player_name=player_id)
+
+    async def _request_players(self, filter_name: str, filter_values: List[str], priority: RequestPriority) -> List[Player]:
+        async def request_chunk(chunk: List[str]) -> List[Player]:
+            try:
+                player_data = await self._request(f'players?filter[{filter_name}]={",".join(chunk)}', priority=priority)
+            except PlayerNotFoundError_Balancer:
+                # 청크에 포함된 플레이어를 하나도 찾지 못한 경우
+                return []
+            return [self._parse_player(data) for data in player_data['data']]
+
+        # 중복을 제거하고 한 번의 요청에 최대 PLAYER_FILTER_MAX_NUM명씩 묶어서 요청합니다.
+        filter_values = list(dict.fromkeys(filter_values))
+        chunks = [filter_values[idx : idx + PUBG_Balancer.PLAYER_FILTER_MAX_NUM] for idx in range(0, len(filter_values), PUBG_Balancer.PLAYER_FILTER_MAX_NUM)]
+        results = await asyncio.gather(*[request_chunk(chunk) for chunk in chunks])
+        return [player for players in results for player in players]
+
+    async def request_players(self, player_names: List[str], priority: RequestPriority = RequestPriority.INTERACTIVE) -> List[Player]:
+        return await self._request_players('playerNames', player_names, priority)
+
+    async def request_players_by_id(self, player_ids: List[str], priority: RequestPriority = RequestPriority.INTERACTIVE) -> List[Player]:
+        return await self._request_players('playerIds', player_ids, priority)
 
     async def _request_seasons_data(self) -> str:
         season_data = await self._request('seasons')
@@ -81,32 +172,25 @@ class PUBG_Balancer:
 
     async def _request_rank_stats(self, player_name: str, season_id: str) -> Stats:
         target_player = await self.find_player(player_name)
-        player_rank_data = await self._request(f'players/{target_player.id}/seasons/{season_id}/ranked')
+        if target_player.rank_stats and await self.is_fresh(player_name, FreshnessEntity.RANKED_STATS):
+            return self._parse_rank_stats(target_player.rank_stats)
 
+        player_rank_data = await self._request(f'players/{target_player.id}/seasons/{season_id}/ranked')
         squad_stats = player_rank_data['data']['attributes']['rankedGameModeStats']['squad']
-        stats = Stats(
-            type=MatchType.RANKED,
-            tier=Tier.from_string(squad_stats['currentTier']['tier']),
-            sub_tier=squad_stats['currentTier']['subTier'],
-            rank_point=squad_stats['currentRankPoint'],
-            rounds_played=squad_stats['roundsPlayed'],
-            avg_rank=squad_stats['avgRank'],
-            top10_ratio=squad_stats['top10Ratio'],
-            win_ratio=squad_stats['winRatio'],
-            damage_dealt=squad_stats['damageDealt'],
-            kills=squad_stats['kills'],
-            assists=squad_stats['assists'],
-            deaths=squad_stats['deaths'],
-            kda=squad_stats['kda'],
-        )
-        return stats
+        await self._db_handler.update_rank_stats(player_name, squad_stats)
+        return self._parse_rank_stats(squad_stats)
 
     async def _request_clan_data(self, clan_id: str = 'clan.fab1814f906d49b08d77b3adb783cc24') -> str:
         clan_data = await self._request(f'clans/{clan_id}')
         return clan_data
 
     async def _request_match(self, match_id: str) -> Match:
-        match_data = await self._request(f'matches/{match_id}')
+        match_data = await self._match_cache.get(match_id)
+        if match_data is None:
+            # matches 엔드포인트는 rate limit에 포함되지 않습니다.
+            match_data = await self._request(f'matches/{match_id}', rate_limited=False)
+            await self._match_cache.put(match_id, match_data)
+
         match = Match(
             id=match_id,
             is_custom_match=match_data['data']['attributes']['isCustomMatch'],
@@ -120,15 +204,54 @@ class PUBG_Balancer:
         )
         return match
 
-    async def _request_player_match_stats(self, player_name: str, match_id: str) -> PlayerMatchStats:
-        if await self._db_handler.is_player_exists(player_name):
-            match = await self._request_match(match_id)
-        else:
-            raise PlayerNotFoundError_Balancer
+    #### util functions
 
-        return match.get_match_by_player_name(player_name)
+    def get_connection_pool_stats(self) -> ConnectionPoolStats:
+        return self._api_request_handler.get_pool_stats()
 
-    #### util functions
+    def get_scheduler_stats(self) -> Dict[RequestPriority, SchedulerStats]:
+        return self._api_request_handler.get_scheduler_stats()
+
+    def get_freshness_stats(self) -> Dict[FreshnessEntity, FreshnessStats]:
+        return {entity: FreshnessStats(**vars(stats)) for entity, stats in self._freshness_stats.items()}
+
+    def get_db_cache_stats(self) -> Dict[str, LRUCacheStats]:
+        return self._db_handler.get_cache_stats()
+
+    def get_stats_cache_stats(self) -> LRUCacheStats:
+        return self._stats_cache.get_stats()
+
+    @property
+    def stats_coalesced_count(self) -> int:
+        return self._stats_tasks.coalesced_count
+
+    def _parse_player(self, player_data: dict) -> Player:
+        return Player(
+            id=player_data['id'],
+            normalized_id=self._parse_player_id(player_data['id']),
+            name=player_data['attributes']['name'],
+            platform=player_data['attributes']['shardId'],
+            ban_type=player_data['attributes']['banType'],
+            clan_id=player_data['attributes']['clanId'],
+            match_list=[match for match in player_data['relationships']['matches']['data'] if match['type'] == 'match'],
+        )
+
+    def _parse_rank_stats(self, squad_stats: dict) -> Stats:
+        return Stats(
+            type=MatchType.RANKED,
+            tier=Tier.from_string(squad_stats['currentTier']['tier']),
+            sub_tier=squad_stats['currentTier']['subTier'],
+            rank_point=squad_stats['currentRankPoint'],
+            rounds_played=squad_stats['roundsPlayed'],
+            avg_rank=squad_stats['avgRank'],
+            top10_ratio=squad_stats['top10Ratio'],
+            win_ratio=squad_stats['winRatio'],
+            damage_dealt=squad_stats['damageDealt'],
+            kills=squad_stats['kills'],
+            assists=squad_stats['assists'],
+            deaths=squad_stats['deaths'],
+            kda=squad_stats['kda'],
+        )
 
     def _parse_player_id(self, player_id: str) -> str:
         if 'account.' in player_id:
@@ -136,38 +259,21 @@ class PUBG_Balancer:
         elif '-' in player_id:
             return player_id.replace('-', '')
 
-    def _calculate_stats_score(self, latest_player_match_stats_list: List[PlayerMatchStats]) -> float:
-        total_score = 0
-        A = -2.7557
-        B = 13.2481
-        C = 3.5403
-        D = 1.4424
-        E = 1.2
-
-        for player_match_stats in latest_player_match_stats_list:
-            match_type = player_match_stats.match_type
-            if not match_type in [MatchType.NORMAL, MatchType.RANKED]:
-                cprint(f"알 수 없는 매치 타입입니다. match_type: {match_type}", 'red')
-                continue
-
-            match_score = (
-                (A + B * (1 / player_match_stats.win_place) + C * (player_match_stats.damage_dealt / 100) + D * player_match_stats.assists) * 1
-                if match_type == MatchType.NORMAL
-                else E
-            )
-            total_score += match_score
-
-        return total_score / len(latest_player_match_stats_list)
-
     #### DB functions
 
     async def connect_db(self) -> None:
+        await self._api_request_handler.open()
+        await self._match_cache.open()
         if self._db_init:
             await self._db_handler.init()
         else:
             await self._db_handler.open()
 
     async def close_db(self) -> None:
+        # 백그라운드에서 다시 계산하던 점수는 버립니다.
+        await self._stats_tasks.cancel_all()
+
+        await self._api_request_handler.close()
         await self._db_handler.close()
 
     async def find_player(self, player_name: str) -> Player:
@@ -179,8 +285,18 @@ class PUBG_Balancer:
     async def is_player_data_outdated(self, player_name: str, update_interval: timedelta = timedelta(days=7)) -> bool:
         return await self._db_handler.is_player_data_outdated(player_name=player_name, expiration_period=update_interval)
 
-    async def update_player(self, player: Player) -> None:
-        await self._db_handler.update_player(player=player)
+    async def is_fresh(self, player_name: str, entity: FreshnessEntity) -> bool:
+        is_outdated = await self._db_handler.is_player_data_outdated(
+            player_name=player_name, expiration_period=self._freshness_policy.get_ttl(entity), entity=entity
+        )
+        if is_outdated:
+            self._freshness_stats[entity].refreshes += 1
+        else:
+            self._freshness_stats[entity].hits += 1
+        return not is_outdated
+
+    async def update_player(self, player: Player, include_stats: bool = True) -> None:
+        await self._db_handler.update_player(player=player, include_stats=include_stats)
 
     async def insert_player(self, player: Player) -> None:
         await self._db_handler.insert_player(player=player)
@@ -194,91 +310,354 @@ class PUBG_Balancer:
     async def get_player_name_by_discord_id(self, discord_id: int) -> str:
         return await self._db_handler.get_player_name_by_discord_id(discord_id=discord_id)
 
-    # TODO: 아래 함수는 유저 밸런스 조정을 위해 사용자를 추가하기 위해 사용하는 것으로 변경해야함
-    # def add_player(self, player_name: str) -> None:
-    #     pass
+    def _is_quiet(self) -> bool:
+        return time.monotonic() - self._last_activity_time >= PUBG_Balancer.DB_MAINTENANCE_QUIET_PERIOD
+
+    async def maintain_db(self) -> bool:
+        '''
+        보관 범위를 벗어난 매치 스탯을 정리하고, 비어 있는 페이지를 조금씩 DB 파일에서 반환합니다.
+        최근 `DB_MAINTENANCE_QUIET_PERIOD`초 동안 점수 요청이 없었을 때만 실행하며, 실행했는지 여부를 반환합니다.
+        '''
+        if not self._is_quiet():
+            return False
+
+        pruned_num = await self._db_handler.prune_player_match_stats(self._retention_policy)
+        vacuumed_page_num = 0
+        for _ in range(PUBG_Balancer.DB_VACUUM_STEP_NUM):
+            # 점수 요청이 들어오면 남은 VACUUM은 다음 실행으로 미룹니다.
+            if not self._is_quiet():
+                break
+            page_num = await self._db_handler.incremental_vacuum(PUBG_Balancer.DB_VACUUM_PAGE_NUM)
+            if page_num == 0:
+                break
+            vacuumed_page_num += page_num
+            await asyncio.sleep(0)
 
-    # def remove_player(self, player_name: str) -> None:
-    #     pass
+        if pruned_num or vacuumed_page_num:
+            cprint(f'DB maintenance done. pruned match stats: {pruned_num}, vacuumed pages: {vacuumed_page_num}', 'green')
+        return True
 
     #### public functions
 
+    async def sync_player(self, player: Player) -> List[str]:
+        '''
+        API로 받은 플레이어 정보를 DB에 반영하고, 저장된 매치 목록에 없던 새 매치 id 목록을 반환합니다.
+        저장된 정보와 달라진 것이 없다면 갱신 시각만 기록합니다.
+        '''
+        try:
+            stored_player = await self._db_handler.get_player(normalized_id=player.normalized_id)
+        except PlayerNotFoundError_Balancer:
+            await self.insert_player(player)
+            return [match['id'] for match in player.match_list]
+
+        stored_match_ids = {match['id'] for match in stored_player.match_list}
+        new_match_ids = [match['id'] for match in player.match_list if match['id'] not in stored_match_ids]
+        # 플레이어 API 응답에는 스탯이 비어 있으므로, 저장된 스탯을 지우지 않도록 플레이어 API가 주는 필드만 비교하고 저장합니다.
+        if any(
+            getattr(player, player_field.name) != getattr(stored_player, player_field.name)
+            for player_field in fields(Player)
+            if player_field.name not in SQLiteDBHandler.PLAYER_STATS_COLUMNS
+        ):
+            await self.update_player(player, include_stats=False)
+        else:
+            await self._db_handler.touch_player(player.name, [FreshnessEntity.PLAYER, FreshnessEntity.MATCH_LIST])
+
+        return new_match_ids
+
     async def get_player(self, player_name: str, request_api: bool = False) -> Player:
-        player = await self._request_player(player_name) if request_api else await self.find_player(player_name)
+        if request_api:
+            player = await self._request_player(player_name)
+            await self.sync_player(player)
+            return player
 
-        if not await self.is_player_exist(player_name):
-            await self.insert_player(player)
-        if await self.is_player_data_outdated(player_name, update_interval=timedelta(hours=1)) == True:
-            await self.update_player(player)
+        player = await self.find_player(player_name)
+        if not await self.is_fresh(player_name, FreshnessEntity.MATCH_LIST):
+            player = await self._request_single_player(player.id)
+            await self.sync_player(player)
 
         return player
 
     async def get_player_match_stats(self, player_name: str, match_id: str) -> PlayerMatchStats:
-        if await self._db_handler.is_player_match_stats_exists(player_name, match_id):
-            player_match_stats = await self._db_handler.get_player_match_stats(player_name, match_id)
-            return player_match_stats
+        try:
+            return await self._db_handler.get_player_match_stats(player_name, match_id)
+        except PlayerMatchStatsNotFoundError_Balancer:
+            pass
 
         match = await self._request_match(match_id)
         player_match_stats = match.get_match_by_player_name(player_name)
-        await self._db_handler.insert_player_match_stats(player_match_stats)
+        await self._ingest_match(match)
 
         return player_match_stats
 
+    async def _ingest_match(self, match: Match, tracked_players_only: bool = True) -> None:
+        '''
+        매치 정보와 매치에 참가한 모든 플레이어의 스탯을 한 번에 저장하여, 함께 플레이한 멤버의 점수를 계산할 때 매치를 다시 받지 않도록 합니다.
+        `player_match_stats`는 `players`를 외래 키로 참조하므로 기본적으로 DB에 등록된 플레이어만 저장합니다.
+        '''
+        await self._db_handler.insert_match(match)
+        player_names = await self._db_handler.get_existing_player_names(match.participant_names) if tracked_players_only else None
+        await self._db_handler.insert_player_match_stats_list(match.get_player_match_stats_list(player_names))
+
+    async def _sync_player_match(self, player_name: str, match_id: str, game_mode: GameMode, match_types: List[MatchType]) -> bool:
+        match = await self._request_match(match_id)
+        await self._ingest_match(match)
+        return match.game_mode == game_mode and match.match_type in match_types and player_name in match.participant_names
+
+    async def sync_player_matches(self, player_name: str, game_mode: GameMode = GameMode.SQUAD, max_match_num: int = 20) -> None:
+        '''
+        플레이어의 매치 목록에서 아직 처리하지 않은 매치를 받아 저장합니다. 조건에 맞는 매치를 `max_match_num`개 찾으면 멈춥니다.
+        '''
+        target_player = await self.get_player(player_name, request_api=False)
+        match_types = [MatchType.NORMAL, MatchType.RANKED]
+
+        # 매치 목록은 최신순이므로 sync_cursor 이전의 매치만 새로 처리하면 됩니다.
+        match_ids = [match['id'] for match in target_player.match_list]
+        sync_cursor = await self._db_handler.get_sync_cursor(player_name)
+        if sync_cursor in match_ids:
+            match_ids = match_ids[: match_ids.index(sync_cursor)]
+
+        # 조건에 맞지 않는 것으로 이미 알려진 매치는 다시 받지 않고, 매치 정보와 스탯이 모두 저장된 매치는 바로 사용합니다.
+        match_relevance = await self._db_handler.get_match_relevance(match_ids, game_mode, match_types)
+        stored_match_ids = await self._db_handler.get_player_match_ids(player_name, match_ids)
+        match_id_iter = iter([match_id for match_id in match_ids if match_relevance.get(match_id, True)])
+
+        # 최대 max_concurrent_match_fetches개의 매치를 동시에 가져오되, 결과는 매치 목록 순서대로 확인합니다.
+        pending_tasks: Deque[asyncio.Future] = deque()
+
+        def fill_pending_tasks() -> None:
+            while len(pending_tasks) < self._max_concurrent_match_fetches:
+                match_id = next(match_id_iter, None)
+                if match_id is None:
+                    break
+                elif match_id in stored_match_ids:
+                    stored_match = asyncio.get_running_loop().create_future()
+                    stored_match.set_result(True)
+                    pending_tasks.append(stored_match)
+                else:
+                    pending_tasks.append(asyncio.create_task(self._sync_player_match(player_name, match_id, game_mode, match_types)))
+
+        valid_match_count = 0
+        is_all_synced = False
+        try:
+            fill_pending_tasks()
+            while pending_tasks and valid_match_count < max_match_num:
+                is_valid_match = await pending_tasks.popleft()
+                fill_pending_tasks()
+                if is_valid_match:
+                    valid_match_count += 1
+            is_all_synced = not pending_tasks
+        finally:
+            # 필요한 매치를 모두 찾았다면 남은 요청은 취소합니다.
+            for task in pending_tasks:
+                task.cancel()
+            await asyncio.gather(*pending_tasks, return_exceptions=True)
+
+        # 결과는 최신 매치부터 확인하므로, 중간에 멈췄다면 처리한 매치와 sync_cursor 사이에 처리하지 않은 매치가 남습니다.
+        # 그런 매치를 다음 동기화에서 건너뛰지 않도록 모든 매치를 처리했을 때만 sync_cursor를 옮깁니다.
+        if match_ids and is_all_synced:
+            await self._db_handler.update_sync_cursor(player_name, match_ids[0])
+
     async def get_latest_player_match_stats_list(
         self, player_name: str, game_mode: GameMode = GameMode.SQUAD, max_match_num: int = 20
     ) -> List[PlayerMatchStats]:
-        target_player = await self.get_player(player_name, request_api=False)
+        await self.sync_player_matches(player_name, game_mode, max_match_num)
 
         # Get latest valid match player data
-        latest_player_match_stats_list: List[PlayerMatchStats] = []
-        match_count = 0
-        for match_id in [match['id'] for match in target_player.match_list]:
-            if match_count == max_match_num:
-                break
+        return await self._db_handler.get_latest_player_match_stats_list(player_name, game_mode, [MatchType.NORMAL, MatchType.RANKED], max_match_num)
+
+    async def get_rolling_stats(self, player_name: str, game_mode: GameMode = GameMode.SQUAD) -> RollingStats:
+        '''
+        DB에 저장된 플레이어의 롤링 스탯에 그 이후 저장된 매치 스탯만 반영하여 반환합니다. 새로 저장된 매치가 없으면 저장된 값을 그대로 사용합니다.
+        '''
+        rolling_stats = await self._db_handler.get_rolling_stats(player_name, game_mode) or RollingStats(player_name=player_name, game_mode=game_mode)
+        rows = await self._db_handler.get_new_player_match_stats_rows(player_name, rolling_stats.last_seq)
+        if self._stats_scorer.update_rolling_stats(rolling_stats, rows, [MatchType.NORMAL, MatchType.RANKED], PUBG_Balancer.DEFAULT_MAX_MATCH_NUM):
+            await self._db_handler.upsert_rolling_stats(rolling_stats)
+            await self._update_leaderboard([rolling_stats], game_mode)
+        return rolling_stats
+
+    async def get_leaderboard(self, game_mode: GameMode = GameMode.SQUAD) -> Leaderboard:
+        if game_mode not in self._leaderboards:
+            leaderboard_entries = await self._db_handler.get_leaderboard_entries(game_mode)
+            # 불러오는 동안 다른 요청이 먼저 만든 인덱스가 있다면 그것을 사용합니다.
+            return self._leaderboards.setdefault(game_mode, Leaderboard(game_mode, leaderboard_entries))
+        return self._leaderboards[game_mode]
+
+    async def _update_leaderboard(self, rolling_stats_list: List[RollingStats], game_mode: GameMode = GameMode.SQUAD) -> None:
+        '''
+        롤링 스탯들의 점수를 리더보드 테이블과 메모리 인덱스에 반영합니다. 판 수가 `DEFAULT_MAX_MATCH_NUM`의 절반보다 적으면 리더보드에서 뺍니다.
+        점수가 바뀐 플레이어만 모아 한 번에 저장합니다.
+        '''
+        leaderboard = await self.get_leaderboard(game_mode)
+        updated_entries = []
+        removed_player_names = []
+        for rolling_stats in rolling_stats_list:
+            if rolling_stats.rounds_played >= int(PUBG_Balancer.DEFAULT_MAX_MATCH_NUM / 2):
+                leaderboard_entry = LeaderboardEntry(
+                    player_name=rolling_stats.player_name,
+                    game_mode=game_mode,
+                    score=rolling_stats.to_stats().score,
+                    rounds_played=rolling_stats.rounds_played,
+                )
+                if leaderboard.update(leaderboard_entry):
+                    updated_entries.append(leaderboard_entry)
+            elif leaderboard.remove(rolling_stats.player_name):
+                removed_player_names.append(rolling_stats.player_name)
+
+        await self._db_handler.bulk_upsert_leaderboard_entries(updated_entries)
+        await self._db_handler.delete_leaderboard_entries(removed_player_names, game_mode)
+
+    async def refresh_leaderboard(self, game_mode: GameMode = GameMode.SQUAD) -> int:
+        '''
+        마지막 갱신 이후 매치 스탯이 저장된 플레이어와, 매치 스탯 정리로 롤링 스탯이 지워진 플레이어의 점수만 다시 계산하여 리더보드에 반영합니다.
+        반영할 매치 스탯은 한 번에 조회하여 모든 플레이어의 점수를 한 번에 계산하고, 어디까지 반영했는지는 DB에 저장하므로 다시 시작해도 이어서 갱신합니다.
+        DB에 저장된 매치만 사용하므로 API를 호출하지 않으며, 다시 계산한 플레이어 수를 반환합니다.
+        '''
+        last_seq = await self._db_handler.get_leaderboard_last_seq(game_mode)
+        # 조회하는 동안 저장된 매치 스탯을 건너뛰지 않도록 기준점은 먼저 읽어 둡니다.
+        max_seq = await self._db_handler.get_max_player_match_stats_seq()
+        rows_by_player = await self._db_handler.get_unscored_player_match_stats_rows(game_mode, last_seq)
+        # 행을 먼저 읽었으므로 그 사이 다른 요청이 저장한 롤링 스탯에 이미 반영된 행은 `update_rolling_stats_list`가 건너뜁니다.
+        stored_rolling_stats = await self._db_handler.get_rolling_stats_with_new_match_stats(game_mode, last_seq)
+        rolling_stats_list = [
+            stored_rolling_stats.get(player_name) or RollingStats(player_name=player_name, game_mode=game_mode) for player_name in rows_by_player
+        ]
+        self._stats_scorer.update_rolling_stats_list(
+            rolling_stats_list, list(rows_by_player.values()), [MatchType.NORMAL, MatchType.RANKED], PUBG_Balancer.DEFAULT_MAX_MATCH_NUM
+        )
 
-            player_match_stats = await self.get_player_match_stats(player_name, match_id)
-            if player_match_stats.game_mode != game_mode:
-                continue
-            if player_match_stats.match_type not in [MatchType.NORMAL, MatchType.RANKED]:
-                continue
+        # 롤링 스탯이 이미 최신이어도 리더보드에 없을 수 있으므로 항상 반영합니다. 점수가 같으면 쓰지 않습니다.
+        await self._db_handler.bulk_upsert_rolling_stats(rolling_stats_list)
+        await self._update_leaderboard(rolling_stats_list, game_mode)
+        if max_seq > last_seq:
+            await self._db_handler.update_leaderboard_last_seq(game_mode, max_seq)
+        return len(rolling_stats_list)
+
+    async def get_leaderboard_rank(self, player_name: str, game_mode: GameMode = GameMode.SQUAD) -> LeaderboardRank:
+        return (await self.get_leaderboard(game_mode)).get_rank(player_name)
+
+    async def get_leaderboard_page(
+        self, page: int = 1, page_size: int = DEFAULT_LEADERBOARD_PAGE_SIZE, game_mode: GameMode = GameMode.SQUAD
+    ) -> Tuple[List[LeaderboardRank], int]:
+        '''
+        리더보드의 `page`번째 페이지와 전체 페이지 수를 반환합니다. 범위를 벗어난 페이지는 가장 가까운 페이지로 바꿉니다.
+        '''
+        leaderboard = await self.get_leaderboard(game_mode)
+        page_num = leaderboard.get_page_num(page_size)
+        return leaderboard.get_page(min(max(page, 1), page_num), page_size), page_num
+
+    def _get_stats_task(self, player_name: str) -> asyncio.Future:
+        '''
+        플레이어의 점수를 계산하는 작업을 반환합니다. 같은 플레이어의 점수를 이미 계산하고 있다면 새로 계산하지 않고 진행 중인 작업을 함께 기다립니다.
+        '''
+        return self._stats_tasks.get_task(player_name, lambda: self._calculate_stats(player_name))
 
-            latest_player_match_stats_list.append(player_match_stats)
-            match_count += 1
+    async def get_stats(self, player_name: str) -> Stats:
+        '''
+        플레이어의 점수를 반환합니다. `StatsCachePolicy.ttl` 안에 계산한 점수가 있으면 그대로 사용하고,
+        같은 플레이어의 점수를 동시에 요청하면 한 번만 계산합니다.
+        '''
+        self._last_activity_time = time.monotonic()
+        cached_stats: CachedStats = self._stats_cache.get(player_name)
+        if cached_stats is not None and cached_stats.age < self._stats_cache_policy.ttl:
+            return cached_stats.stats
+
+        # 한 호출자가 취소되더라도 같은 계산을 기다리는 다른 호출자에게는 영향이 없도록 합니다.
+        return await asyncio.shield(self._get_stats_task(player_name))
+
+    async def get_cached_stats(self, player_name: str) -> CachedStats:
+        '''
+        플레이어의 점수를 가능한 한 기다리지 않고 반환합니다.
+        `StatsCachePolicy.ttl`이 지난 점수는 `max_stale` 안이라면 바로 반환하고 백그라운드에서 다시 계산합니다(stale-while-revalidate).
+        캐시에 없더라도 API 요청 한도를 다 써서 매치 목록을 갱신하려면 기다려야 한다면, DB에 저장된 매치만으로 계산한 점수를 먼저 반환합니다.
+        '''
+        self._last_activity_time = time.monotonic()
+        cached_stats: CachedStats = self._stats_cache.get(player_name)
+        if cached_stats is not None:
+            if cached_stats.age < self._stats_cache_policy.ttl:
+                return cached_stats
+            elif cached_stats.age < self._stats_cache_policy.max_stale:
+                self._get_stats_task(player_name)
+                return replace(cached_stats, is_stale=True)
+
+        if self._api_request_handler.is_rate_limited and await self.is_player_exist(player_name):
+            is_match_list_outdated = await self._db_handler.is_player_data_outdated(
+                player_name=player_name, expiration_period=self._freshness_policy.match_list, entity=FreshnessEntity.MATCH_LIST
+            )
+            rolling_stats = await self.get_rolling_stats(player_name)
+            if is_match_list_outdated and rolling_stats.rounds_played >= int(PUBG_Balancer.DEFAULT_MAX_MATCH_NUM / 2):
+                self._get_stats_task(player_name)
+                updated_date = await self._db_handler.get_player_update_date(player_name=player_name, entity=FreshnessEntity.MATCH_LIST)
+                return CachedStats(stats=rolling_stats.to_stats(), updated_date=updated_date or datetime_now(), is_stale=True)
 
-        return latest_player_match_stats_list
+        return CachedStats(stats=await self.get_stats(player_name))
 
-    async def get_stats(self, player_name: str) -> Stats:
+    async def _calculate_stats(self, player_name: str) -> Stats:
         if not await self.is_player_exist(player_name):
             await self.get_player(player_name, request_api=True)
 
-        latest_player_match_stats_list: List[PlayerMatchStats] = await self.get_latest_player_match_stats_list(
-            player_name, max_match_num=PUBG_Balancer.DEFAULT_MAX_MATCH_NUM
-        )
-        rounds_played = len(latest_player_match_stats_list)
+        await self.sync_player_matches(player_name, max_match_num=PUBG_Balancer.DEFAULT_MAX_MATCH_NUM)
+        rolling_stats = await self.get_rolling_stats(player_name)
+        rounds_played = rolling_stats.rounds_played
         if rounds_played == 0:
             raise PlayerMatchStatsNotFoundError_Balancer
         elif rounds_played < int(PUBG_Balancer.DEFAULT_MAX_MATCH_NUM / 2):
             raise PlayerMatchStatsNotEnoughError_Balancer(match_num=rounds_played, max_match_num=int(PUBG_Balancer.DEFAULT_MAX_MATCH_NUM / 2))
 
-        stats_score = self._calculate_stats_score(latest_player_match_stats_list)
-        kills = sum([match.kills for match in latest_player_match_stats_list])
-        deaths = sum([1 if match.win_place != 1 else 0 for match in latest_player_match_stats_list])
-        assists = sum([match.assists for match in latest_player_match_stats_list])
-        kda = (kills + assists) / deaths if deaths else 0.0
-        stats = Stats(
-            rounds_played=rounds_played,
-            avg_rank=sum([match.win_place for match in latest_player_match_stats_list]) / rounds_played,
-            top10_ratio=sum([1 for match in latest_player_match_stats_list if match.win_place <= 10]) / rounds_played,
-            win_ratio=sum([1 for match in latest_player_match_stats_list if match.win_place == 1]) / rounds_played,
-            damage_dealt=sum([match.damage_dealt for match in latest_player_match_stats_list]),
-            kills=kills,
-            assists=deaths,
-            deaths=assists,
-            kda=kda,
-            score=stats_score,
-        )
+        stats = rolling_stats.to_stats()
+        self._stats_cache.put(player_name, CachedStats(stats=stats))
         return stats
 
+    async def _prefetch_players(self, player_names: List[str]) -> None:
+        '''
+        DB에 없는 플레이어들을 한 번의 `request_players` 호출로 받아 저장하여, 점수를 계산할 때 플레이어마다 API를 요청하지 않도록 합니다.
+        받아오지 못한 플레이어는 점수를 계산할 때 다시 요청하므로 플레이어별 실패 원인이 그대로 반환됩니다.
+        '''
+        unknown_player_names = []
+        for player_name in player_names:
+            cached_stats: CachedStats = self._stats_cache.get(player_name)
+            if cached_stats is not None and cached_stats.age < self._stats_cache_policy.ttl:
+                continue
+            if not await self.is_player_exist(player_name):
+                unknown_player_names.append(player_name)
+        if not unknown_player_names:
+            return
+
+        try:
+            players = await self.request_players(unknown_player_names)
+        except Exception as e:
+            cprint(f'Failed to prefetch players. player_names: {unknown_player_names}, error: {e}', 'yellow')
+            return
+        for player in players:
+            await self.sync_player(player)
+
+    async def balance_teams(
+        self, player_names: List[str], team_num: int = None, team_size: int = TeamBalancer.DEFAULT_TEAM_SIZE
+    ) -> Tuple[TeamBalanceResult, Dict[str, Exception]]:
+        '''
+        플레이어들의 점수를 동시에 계산하여 점수 합이 비슷한 팀으로 나눕니다.
+        점수를 계산하지 못한 플레이어는 나머지 플레이어의 평균 점수로 배치하며, 플레이어별 실패 원인을 함께 반환합니다.
+        '''
+        player_names = list(dict.fromkeys(player_names))
+        await self._prefetch_players(player_names)
+        results = await asyncio.gather(*[self.get_stats(player_name) for player_name in player_names], return_exceptions=True)
+
+        player_scores: Dict[str, float] = {}
+        failed_players: Dict[str, Exception] = {}
+        for player_name, result in zip(player_names, results):
+            if isinstance(result, Stats):
+                player_scores[player_name] = result.score
+            elif isinstance(result, Exception):
+                failed_players[player_name] = result
+            else:
+                raise result
+
+        default_score = sum(player_scores.values()) / len(player_scores) if player_scores else 0.0
+        for player_name in failed_players:
+            player_scores[player_name] = default_score
+
+        return self._team_balancer.balance(player_scores, team_num=team_num, team_size=team_size), failed_players
+
 
 if __name__ == '__main__':
 
@@ -1,4 +1,7 @@
+from collections import deque
+from dataclasses import dataclass
 from enum import Enum, auto
+from typing import Deque, Dict, Tuple, Union
 import time
 from termcolor import cprint
 import aiohttp
@@ -6,6 +9,7 @@ import asyncio
 from aiohttp_retry import RetryClient, ExponentialRetry
 
 from ks_bot.common.error import *
+from ks_bot.core.single_flight import SingleFlight
 
 
 class HttpMethod(Enum):
@@ -19,54 +23,435 @@ class HttpMethod(Enum):
     PATCH = auto()
 
 
+class RequestPriority(Enum):
+    INTERACTIVE = 0  # 사용자가 직접 실행한 명령어
+    BACKGROUND = 1  # 주기적으로 실행되는 백그라운드 갱신
+
+
+@dataclass
+class SchedulerStats:
+    queue_depth: int = 0
+    granted: int = 0
+    promoted: int = 0
+    total_wait_time: float = 0.0
+    max_wait_time: float = 0.0
+
+    @property
+    def avg_wait_time(self) -> float:
+        return self.total_wait_time / self.granted if self.granted else 0.0
+
+
+@dataclass
+class ConnectionPoolStats:
+    requests: int = 0
+    connections_created: int = 0
+    connections_reused: int = 0
+    dns_cache_hits: int = 0
+    dns_cache_misses: int = 0
+    open_connections: int = 0
+    idle_connections: int = 0
+
+    @property
+    def reuse_ratio(self) -> float:
+        total = self.connections_created + self.connections_reused
+        return self.connections_reused / total if total else 0.0
+
+
+class TokenBucketRateLimiter:
+    '''
+    요청 토큰을 관리하는 비동기 토큰 버킷입니다.
+
+    토큰은 `capacity / period` 속도로 채워지며, 서버가 `X-RateLimit-*` 헤더로 알려준 남은 요청 수와 리셋 시각으로
+    보정됩니다. 토큰이 없으면 대기자는 우선순위별 FIFO 큐에 들어가고, 토큰이 채워지는 시각에 정확히 한 번 깨어납니다.
+    높은 우선순위 큐가 먼저 처리되지만, `starvation_timeout`보다 오래 기다린 대기자는 우선순위와 관계없이 먼저 처리됩니다.
+    '''
+
+    def __init__(self, capacity: int, period: float = 60.0, starvation_timeout: float = 120.0):
+        self.capacity = capacity
+        self.period = period
+        self._refill_rate = capacity / period
+        self._tokens = float(capacity)
+        self._updated_at = time.monotonic()
+        self._blocked_until = 0.0
+        self._reset_timestamp = 0.0
+        # 토큰을 받았지만 아직 응답을 받지 못한 요청 수입니다. 서버가 알려준 남은 요청 수에는 아직 반영되지 않았습니다.
+        self._in_flight = 0
+        self.starvation_timeout = starvation_timeout
+        self._waiters: Dict[RequestPriority, Deque[Tuple[asyncio.Future, float]]] = {priority: deque() for priority in RequestPriority}
+        self._stats: Dict[RequestPriority, SchedulerStats] = {priority: SchedulerStats() for priority in RequestPriority}
+        self._wakeup_handle: asyncio.TimerHandle = None
+
+    @property
+    def tokens(self) -> float:
+        self._refill()
+        return self._tokens
+
+    @property
+    def waiting(self) -> int:
+        return sum(len(waiters) for waiters in self._waiters.values())
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    def get_stats(self) -> Dict[RequestPriority, SchedulerStats]:
+        stats = {priority: SchedulerStats(**vars(class_stats)) for priority, class_stats in self._stats.items()}
+        for priority, waiters in self._waiters.items():
+            stats[priority].queue_depth = len(waiters)
+        return stats
+
+    @property
+    def reset_timestamp(self) -> float:
+        return self._reset_timestamp
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        if self._blocked_until:
+            if now < self._blocked_until:
+                self._updated_at = now
+                return
+            # 서버 윈도우가 리셋되면 버킷이 가득 찬 상태로 다시 시작합니다.
+            self._blocked_until = 0.0
+            self._tokens = float(self.capacity)
+        else:
+            self._tokens = min(float(self.capacity), self._tokens + (now - self._updated_at) * self._refill_rate)
+        self._updated_at = now
+
+    def _next_refill_delay(self) -> float:
+        if self._blocked_until:
+            return max(0.0, self._blocked_until - time.monotonic())
+        return max(0.0, (1.0 - self._tokens) / self._refill_rate)
+
+    def _schedule_wakeup(self) -> None:
+        if self._wakeup_handle:
+            self._wakeup_handle.cancel()
+            self._wakeup_handle = None
+        if self.waiting:
+            self._wakeup_handle = asyncio.get_running_loop().call_later(self._next_refill_delay(), self._wakeup)
+
+    def _pop_next_waiter(self) -> Tuple[RequestPriority, asyncio.Future, float]:
+        now = time.monotonic()
+        candidates = [priority for priority in RequestPriority if self._waiters[priority]]
+        starved = [priority for priority in candidates if now - self._waiters[priority][0][1] >= self.starvation_timeout]
+        if starved:
+            # 너무 오래 기다린 대기자가 있다면 가장 오래 기다린 대기자부터 처리합니다.
+            priority = min(starved, key=lambda priority: self._waiters[priority][0][1])
+            if priority != candidates[0]:
+                self._stats[priority].promoted += 1
+        else:
+            priority = candidates[0]
+
+        waiter, enqueued_at = self._waiters[priority].popleft()
+        return priority, waiter, enqueued_at
+
+    def _wakeup(self) -> None:
+        self._wakeup_handle = None
+        self._refill()
+        while self.waiting and self._tokens >= 1.0:
+            priority, waiter, enqueued_at = self._pop_next_waiter()
+            self._tokens -= 1.0
+            waiter.set_result(None)
+
+            wait_time = time.monotonic() - enqueued_at
+            self._stats[priority].granted += 1
+            self._stats[priority].total_wait_time += wait_time
+            self._stats[priority].max_wait_time = max(self._stats[priority].max_wait_time, wait_time)
+        self._schedule_wakeup()
+
+    async def acquire(self, priority: RequestPriority = RequestPriority.INTERACTIVE) -> None:
+        self._refill()
+        if not self.waiting and self._tokens >= 1.0:
+            self._tokens -= 1.0
+            self._in_flight += 1
+            self._stats[priority].granted += 1
+            return
+
+        waiter = asyncio.get_running_loop().create_future()
+        entry = (waiter, time.monotonic())
+        self._waiters[priority].append(entry)
+        if self.waiting == 1:
+            self._schedule_wakeup()
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                # 토큰을 받은 직후 취소되었다면 다음 대기자에게 넘겨줍니다.
+                self._tokens += 1.0
+            else:
+                self._waiters[priority].remove(entry)
+            self._wakeup()
+            raise
+        self._in_flight += 1
+
+    def release(self) -> None:
+        '''
+        `acquire`로 토큰을 받은 요청의 응답을 받았거나 요청이 실패했을 때 호출합니다.
+        '''
+        self._in_flight = max(0, self._in_flight - 1)
+
+    def sync(self, remaining: int, reset_timestamp: float) -> None:
+        '''
+        서버가 응답 헤더로 알려준 남은 요청 수(`remaining`)와 리셋 시각(unix timestamp)으로 버킷을 보정합니다.
+        `acquire`로 토큰을 받고 아직 `release`하지 않은 요청은 `remaining`에 반영되지 않았으므로 그만큼 빼서 맞춥니다.
+        '''
+        self._refill()
+        available = max(0, remaining - self._in_flight)
+        if reset_timestamp > self._reset_timestamp:
+            # 새로운 윈도우가 시작되었으므로 서버 값을 따릅니다.
+            self._tokens = float(min(self.capacity, available))
+        else:
+            self._tokens = float(min(self._tokens, available))
+        self._reset_timestamp = max(self._reset_timestamp, reset_timestamp)
+
+        if remaining <= 0:
+            self._tokens = 0.0
+            self._blocked_until = time.monotonic() + max(0.0, reset_timestamp - time.time())
+        self._schedule_wakeup()
+
+
 class APIRequestHandler:
-    def __init__(self, api_key: str, base_url: str, max_retries: int = 3, timeout: float = 5.0, rate_limit_per_minute: int = 10):
+    # 429 응답에 Retry-After 헤더가 없을 때 다시 요청하기 전에 기다리는 최대 시간(초)입니다.
+    MAX_RATE_LIMIT_BACKOFF = 60.0
+
+    def __init__(
+        self,
+        api_key: str,
+        base_url: str,
+        max_retries: int = 3,
+        timeout: float = 5.0,
+        rate_limit_per_minute: int = 10,
+        starvation_timeout: float = 120.0,
+        connection_limit: int = 100,
+        connection_limit_per_host: int = 10,
+        keepalive_timeout: float = 60.0,
+        dns_cache_ttl: int = 300,
+        rate_limit_retries: int = 5,
+        rate_limit_backoff: float = 1.0,
+    ):
+        '''
+        429 응답을 받으면 `Retry-After` 헤더만큼, 헤더가 없으면 `rate_limit_backoff`초부터 두 배씩 늘어나는 시간만큼 기다렸다가 다시 요청하며,
+        `rate_limit_retries`번 다시 요청해도 429 응답을 받으면 `APIRequestError_Balancer`를 발생시킵니다.
+        '''
         self.api_key = api_key
         self.base_url = base_url
         self.timeout = aiohttp.ClientTimeout(total=timeout)
         self.rate_limit_per_minute = rate_limit_per_minute
-        self.remaining_requests = rate_limit_per_minute
-        self.rate_limit_reset_timestamp = time.time()
+        self.rate_limiter = TokenBucketRateLimiter(capacity=rate_limit_per_minute, period=60.0, starvation_timeout=starvation_timeout)
         self.retry_options = ExponentialRetry(attempts=max_retries)
+        self.rate_limit_retries = rate_limit_retries
+        self.rate_limit_backoff = rate_limit_backoff
 
-    async def wait_for_rate_limit_reset(self) -> None:
-        current_time = time.time()
-        while self.remaining_requests <= 0 and current_time < self.rate_limit_reset_timestamp:
-            sleep_time = self.rate_limit_reset_timestamp - current_time
-            print(f"\rRate limit exceeded. Waiting for {sleep_time:.0f} seconds.", end='', flush=True)
-            await asyncio.sleep(1)
-            current_time = time.time()
-        else:
-            print("\nRate limit has been reset. Continuing with the requests.")
+        self.connection_limit = connection_limit
+        self.connection_limit_per_host = connection_limit_per_host
+        self.keepalive_timeout = keepalive_timeout
+        self.dns_cache_ttl = dns_cache_ttl
+        self._session: aiohttp.ClientSession = None
+        self._client: RetryClient = None
+        self._pool_stats = ConnectionPoolStats()
+        self._inflight_requests = SingleFlight()
+
+    async def __aenter__(self):
+        await self.open()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    #### session functions
+
+    def _create_trace_config(self) -> aiohttp.TraceConfig:
+        async def on_request_start(session, context, params):
+            self._pool_stats.requests += 1
+
+        async def on_connection_create_end(session, context, params):
+            self._pool_stats.connections_created += 1
+
+        async def on_connection_reuseconn(session, context, params):
+            self._pool_stats.connections_reused += 1
+
+        async def on_dns_cache_hit(session, context, params):
+            self._pool_stats.dns_cache_hits += 1
+
+        async def on_dns_cache_miss(session, context, params):
+            self._pool_stats.dns_cache_misses += 1
+
+        trace_config = aiohttp.TraceConfig()
+        trace_config.on_request_start.append(on_request_start)
+        trace_config.on_connection_create_end.append(on_connection_create_end)
+        trace_config.on_connection_reuseconn.append(on_connection_reuseconn)
+        trace_config.on_dns_cache_hit.append(on_dns_cache_hit)
+        trace_config.on_dns_cache_miss.append(on_dns_cache_miss)
+        return trace_config
+
+    @property
+    def is_open(self) -> bool:
+        return self._session is not None and not self._session.closed
+
+    async def open(self) -> 'APIRequestHandler':
+        if self.is_open:
+            return self
+
+        connector = aiohttp.TCPConnector(
+            limit=self.connection_limit,
+            limit_per_host=self.connection_limit_per_host,
+            keepalive_timeout=self.keepalive_timeout,
+            ttl_dns_cache=self.dns_cache_ttl,
+            use_dns_cache=True,
+        )
+        self._session = aiohttp.ClientSession(connector=connector, timeout=self.timeout, trace_configs=[self._create_trace_config()])
+        self._client = RetryClient(client_session=self._session, retry_options=self.retry_options, raise_for_status=False)
+        return self
+
+    async def close(self) -> None:
+        if self._client:
+            await self._client.close()
+        self._session = None
+        self._client = None
+
+    def get_pool_stats(self) -> ConnectionPoolStats:
+        stats = ConnectionPoolStats(**vars(self._pool_stats))
+        connector = self._session.connector if self.is_open else None
+        if connector:
+            # aiohttp은 풀 상태를 공개 API로 제공하지 않으므로 내부 속성을 조심스럽게 읽습니다.
+            acquired = len(getattr(connector, '_acquired', ()))
+            idle = sum(len(conns) for conns in getattr(connector, '_conns', {}).values())
+            stats.open_connections = acquired + idle
+            stats.idle_connections = idle
+        return stats
+
+    def get_scheduler_stats(self) -> Dict[RequestPriority, SchedulerStats]:
+        return self.rate_limiter.get_stats()
+
+    @property
+    def remaining_requests(self) -> int:
+        return int(self.rate_limiter.tokens)
+
+    @property
+    def rate_limit_reset_timestamp(self) -> float:
+        return self.rate_limiter.reset_timestamp
+
+    @property
+    def is_rate_limited(self) -> bool:
+        # 지금 요청하면 토큰이 채워질 때까지 기다려야 하는지 여부입니다.
+        return self.rate_limiter.waiting > 0 or self.rate_limiter.tokens < 1.0
+
+    def _get_retry_after(self, response: aiohttp.ClientResponse) -> Union[float, None]:
+        # HTTP 날짜 형식의 Retry-After 헤더는 지원하지 않으므로 헤더가 없는 경우와 같이 처리합니다.
+        try:
+            return max(0.0, float(response.headers['Retry-After']))
+        except (KeyError, ValueError):
+            return None
+
+    def _sync_rate_limit(self, response: aiohttp.ClientResponse) -> None:
+        remaining = response.headers.get('X-RateLimit-Remaining')
+        reset_timestamp = response.headers.get('X-RateLimit-Reset')
+        if response.status == 429:
+            # 헤더가 없으면 Retry-After 헤더만큼, 그마저 없으면 한 주기 동안 기다립니다.
+            retry_after = self._get_retry_after(response)
+            remaining = 0
+            reset_timestamp = reset_timestamp or time.time() + (self.rate_limiter.period if retry_after is None else retry_after)
+        if remaining is None or reset_timestamp is None:
+            return
+
+        self.rate_limiter.sync(remaining=int(remaining), reset_timestamp=float(reset_timestamp))
+
+    def _get_rate_limit_backoff(self, response: aiohttp.ClientResponse, retry_num: int, rate_limited: bool) -> float:
+        '''
+        429 응답을 받은 뒤 다시 요청하기 전에 기다릴 시간(초)을 반환합니다.
+        `rate_limited` 요청은 `rate_limiter`가 초기화 시각까지 기다리게 하므로 바로 다시 요청합니다.
+        `rate_limiter`를 거치지 않는 요청은 `Retry-After` 헤더가 있으면 그만큼, 없으면 `retry_num`에 따라 두 배씩 늘어나는 시간만큼 기다리며,
+        어느 경우든 `MAX_RATE_LIMIT_BACKOFF`를 넘지 않습니다.
+        '''
+        if rate_limited:
+            return 0.0
+        retry_after = self._get_retry_after(response)
+        if retry_after is None:
+            retry_after = self.rate_limit_backoff * 2**retry_num
+        return min(retry_after, APIRequestHandler.MAX_RATE_LIMIT_BACKOFF)
+
+    @property
+    def coalesced_count(self) -> int:
+        return self._inflight_requests.coalesced_count
+
+    def _get_inflight_key(self, endpoint: str, method: HttpMethod, params: dict = None, priority: RequestPriority = RequestPriority.INTERACTIVE) -> Tuple:
+        return (method.value, endpoint, tuple(sorted((params or {}).items())), priority)
 
     async def request(
-        self, endpoint: str, method: HttpMethod = HttpMethod.GET, header: dict = None, params: dict = None, data: dict = None, json: dict = None
+        self,
+        endpoint: str,
+        method: HttpMethod = HttpMethod.GET,
+        header: dict = None,
+        params: dict = None,
+        data: dict = None,
+        json: dict = None,
+        rate_limited: bool = True,
+        priority: RequestPriority = RequestPriority.INTERACTIVE,
+    ) -> dict:
+        '''
+        동일한 GET 요청이 같은 `priority`로 이미 진행 중이라면 새로 요청하지 않고 진행 중인 요청의 결과를 함께 기다립니다.
+        이 경우 반환되는 dict는 호출자끼리 공유되므로 수정하지 않아야 합니다.
+        우선순위가 다르면 합치지 않으므로, 사용자가 실행한 요청이 대기열 뒤쪽의 백그라운드 요청을 기다리는 일은 없습니다.
+        '''
+        if method != HttpMethod.GET or data or json:
+            return await self._request(endpoint, method, header, params, data, json, rate_limited, priority)
+
+        return await self._inflight_requests.run(
+            self._get_inflight_key(endpoint, method, params, priority),
+            lambda: self._request(endpoint, method, header, params, data, json, rate_limited, priority),
+        )
+
+    async def _request(
+        self,
+        endpoint: str,
+        method: HttpMethod,
+        header: dict,
+        params: dict,
+        data: dict,
+        json: dict,
+        rate_limited: bool,
+        priority: RequestPriority,
     ) -> dict:
         url = f'{self.base_url}/{endpoint}'
+        if not self.is_open:
+            await self.open()
+
+        retry_num = 0
+        while True:
+            is_in_flight = False
+            if rate_limited:
+                await self.rate_limiter.acquire(priority)
+                is_in_flight = True
 
-        async with aiohttp.ClientSession() as session:
-            client = RetryClient(client_session=session, retry_options=self.retry_options, raise_for_status=False)
             try:
-                async with client.request(method.value, url, headers=header, params=params, json=json, data=data) as response:
+                async with self._client.request(method.value, url, headers=header, params=params, json=json, data=data) as response:
+                    if is_in_flight:
+                        # 응답을 받은 요청은 응답 헤더의 남은 요청 수에 이미 반영되어 있습니다.
+                        self.rate_limiter.release()
+                        is_in_flight = False
+                    self._sync_rate_limit(response)
                     if response.status == 429:
-                        self.remaining_requests = 0
-                        self.rate_limit_reset_timestamp = float(response.headers.get('X-RateLimit-Reset', time.time())) + 1
-                        await self.wait_for_rate_limit_reset()
-                        return await self.request(endpoint, method, header, params, data, json)
+                        if retry_num >= self.rate_limit_retries:
+                            raise APIRequestError_Balancer(f"Rate limit exceeded after {retry_num} retries. endpoint: {endpoint}")
+                        sleep_time = self._get_rate_limit_backoff(response, retry_num, rate_limited)
+                        retry_num += 1
+                        cprint(f'Rate limit exceeded. endpoint: {endpoint}, Retrying in {sleep_time:.0f} seconds. ({retry_num}/{self.rate_limit_retries})', 'yellow')
                     elif response.status == 404:
                         raise PlayerNotFoundError_Balancer
                     else:
-                        self.remaining_requests = int(response.headers.get('X-RateLimit-Remaining', self.remaining_requests))
-                        self.rate_limit_reset_timestamp = float(response.headers.get('X-RateLimit-Reset', self.rate_limit_reset_timestamp))
-
                         cprint(f'API request success! endpoint: {endpoint}, Remaining requests: {self.remaining_requests}', 'green')
                         return await response.json()
             except aiohttp.ClientError as e:
                 raise APIRequestError_Balancer(f"HTTP error occurred while API request: {e}")
-            except PlayerNotFoundError_Balancer as e:
+            except (PlayerNotFoundError_Balancer, APIRequestError_Balancer) as e:
                 raise e
             except Exception as e:
                 raise APIRequestError_Balancer(f"Unknown error occurred: {e}")
+            finally:
+                if is_in_flight:
+                    self.rate_limiter.release()
+
+            # 응답을 닫아 연결을 반환한 뒤에 기다립니다.
+            await asyncio.sleep(sleep_time)
 
 
 if __name__ == "__main__":
@@ -77,10 +462,10 @@ if __name__ == "__main__":
         api_key = os.environ.get('PUBG_TOKEN')
         platform = 'steam'
         base_url = f'https://api.pubg.com/shards/{platform}'
-        api_request_handler = APIRequestHandler(api_key=api_key, base_url=base_url)
-
-        headers = {"Authorization": f"Bearer {api_request_handler.api_key}", "Accept": "application/vnd.api+json"}
-        response = await api_request_handler.request(endpoint='seasonss', method=HttpMethod.GET, header=headers)
-        print(response)
+        async with APIRequestHandler(api_key=api_key, base_url=base_url) as api_request_handler:
+            headers = {"Authorization": f"Bearer {api_request_handler.api_key}", "Accept": "application/vnd.api+json"}
+            response = await api_request_handler.request(endpoint='seasonss', method=HttpMethod.GET, header=headers)
+            print(response)
+            print(api_request_handler.get_pool_stats())
 
     asyncio.run(main())
@@ -0,0 +1,54 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable, List
+
+
+class SingleFlight:
+    '''
+    같은 키의 작업이 이미 진행 중이라면 새로 시작하지 않고 진행 중인 작업을 함께 기다리게 합니다(single-flight).
+    키마다 작업은 하나만 실행되며, 작업이 끝나면 목록에서 빠지므로 그 다음 호출은 새로 시작합니다.
+    '''
+
+    def __init__(self):
+        self._tasks: Dict[Hashable, asyncio.Future] = {}
+        self.coalesced_count = 0
+
+    def get_task(self, key: Hashable, coroutine_function: Callable[[], Awaitable[Any]]) -> asyncio.Future:
+        '''
+        `key`의 작업을 반환합니다. 진행 중인 작업이 없을 때만 `coroutine_function()`으로 새 작업을 시작합니다.
+        '''
+        task = self._tasks.get(key)
+        if task:
+            self.coalesced_count += 1
+            return task
+
+        task = asyncio.ensure_future(coroutine_function())
+        self._tasks[key] = task
+
+        def on_done(future: asyncio.Future) -> None:
+            if self._tasks.get(key) is future:
+                del self._tasks[key]
+            if not future.cancelled():
+                # 기다리는 호출자가 모두 취소되었거나 백그라운드에서 실행하다 실패해도 예외가 처리되지 않았다는 경고가 뜨지 않도록 합니다.
+                future.exception()
+
+        task.add_done_callback(on_done)
+        return task
+
+    async def run(self, key: Hashable, coroutine_function: Callable[[], Awaitable[Any]]) -> Any:
+        # 한 호출자가 취소되더라도 같은 작업을 기다리는 다른 호출자에게는 영향이 없도록 합니다.
+        return await asyncio.shield(self.get_task(key, coroutine_function))
+
+    def get(self, key: Hashable) -> asyncio.Future:
+        return self._tasks.get(key)
+
+    async def cancel_all(self) -> None:
+        tasks: List[asyncio.Future] = list(self._tasks.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._tasks
+
+    def __len__(self) -> int:
+        return len(self._tasks)
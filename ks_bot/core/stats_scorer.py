@@ -0,0 +1,187 @@
+from dataclasses import dataclass, field
+import bisect
+from operator import itemgetter
+import numpy as np
+from termcolor import cprint
+from typing import Iterable, List
+
+from ks_bot.common.enum import GameMode, MatchType
+from ks_bot.common.dataclass import Stats
+
+
+@dataclass
+class MatchStatsColumns:
+    '''
+    매치 스탯을 컬럼별 NumPy 배열로 담아 `StatsScorer.calculate_match_scores`로 점수를 한 번에 계산할 수 있게 합니다.
+    배열의 순서는 입력한 행의 순서와 같습니다.
+    '''
+
+    # 컬럼 배열을 만들 때 사용하는 행의 컬럼 순서입니다.
+    COLUMN_NAMES = ['match_type', 'win_place', 'damage_dealt', 'assists', 'kills']
+    # 문자열 비교를 피하기 위해 match_type은 정수 코드로 저장합니다. 그 밖의 매치 타입은 0입니다.
+    MATCH_TYPE_CODES = {MatchType.NORMAL.value: 1, MatchType.RANKED.value: 2}
+
+    match_type: np.ndarray = field(default_factory=lambda: np.zeros(0, dtype=np.int8))
+    win_place: np.ndarray = field(default_factory=lambda: np.zeros(0))
+    damage_dealt: np.ndarray = field(default_factory=lambda: np.zeros(0))
+    assists: np.ndarray = field(default_factory=lambda: np.zeros(0))
+    kills: np.ndarray = field(default_factory=lambda: np.zeros(0))
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[tuple]) -> 'MatchStatsColumns':
+        '''
+        `COLUMN_NAMES` 순서의 행들로 컬럼 배열을 만듭니다. match_type은 DB에 저장된 문자열 값입니다.
+        '''
+        rows = list(rows)
+        if not rows:
+            return cls()
+
+        match_types, win_places, damage_dealts, assists, kills = zip(*rows)
+        match_type_codes = np.fromiter(map(lambda match_type: MatchStatsColumns.MATCH_TYPE_CODES.get(match_type, 0), match_types), dtype=np.int8, count=len(rows))
+        numeric_columns = np.array([win_places, damage_dealts, assists, kills], dtype=np.float64)
+        return cls(
+            match_type=match_type_codes,
+            win_place=numeric_columns[0],
+            damage_dealt=numeric_columns[1],
+            assists=numeric_columns[2],
+            kills=numeric_columns[3],
+        )
+
+
+@dataclass
+class RollingStats:
+    '''
+    플레이어의 최신 매치 window에 대한 `Stats` 합계입니다. 매치가 window에 들어오거나 밀려날 때 그 매치의 값만 더하고 빼므로,
+    매치 하나를 반영하는 비용은 window 크기와 관계없이 일정합니다.
+
+    `window_matches`는 오래된 매치부터 날짜순으로 정렬된 `[match_id, date, score, win_place, damage_dealt, kills, assists]` 목록이고,
+    `last_seq`는 마지막으로 반영한 player_match_stats 행의 seq입니다.
+    '''
+
+    player_name: str = ''
+    game_mode: GameMode = field(default_factory=GameMode.from_string)
+    last_seq: int = 0
+    window_matches: list = field(default_factory=list)
+    score_sum: float = 0.0
+    win_place_sum: float = 0.0
+    top10_count: int = 0
+    win_count: int = 0
+    death_count: int = 0
+    damage_dealt_sum: float = 0.0
+    kills: int = 0
+    assists: int = 0
+
+    @property
+    def rounds_played(self) -> int:
+        return len(self.window_matches)
+
+    def _apply(self, window_match: list, sign: int) -> None:
+        _, _, score, win_place, damage_dealt, kills, assists = window_match
+        self.score_sum += sign * score
+        self.win_place_sum += sign * win_place
+        self.top10_count += sign * (win_place <= 10)
+        self.win_count += sign * (win_place == 1)
+        self.death_count += sign * (win_place != 1)
+        self.damage_dealt_sum += sign * damage_dealt
+        self.kills += sign * kills
+        self.assists += sign * assists
+
+    def push(self, window_match: list, max_match_num: int) -> None:
+        '''
+        매치를 window에 넣고, window가 `max_match_num`개를 넘으면 가장 오래된 매치부터 뺍니다.
+        새 매치는 대부분 가장 최근 매치이므로 뒤에 붙이고, 늦게 저장된 예전 매치만 날짜 순서에 맞게 끼워 넣습니다.
+        '''
+        if not self.window_matches or window_match[1] >= self.window_matches[-1][1]:
+            self.window_matches.append(window_match)
+        else:
+            bisect.insort(self.window_matches, window_match, key=itemgetter(1))
+        self._apply(window_match, 1)
+
+        while len(self.window_matches) > max_match_num:
+            self._apply(self.window_matches.pop(0), -1)
+
+    def to_stats(self) -> Stats:
+        rounds_played = self.rounds_played
+        if not rounds_played:
+            return Stats()
+
+        return Stats(
+            rounds_played=rounds_played,
+            avg_rank=self.win_place_sum / rounds_played,
+            top10_ratio=self.top10_count / rounds_played,
+            win_ratio=self.win_count / rounds_played,
+            damage_dealt=self.damage_dealt_sum,
+            kills=self.kills,
+            assists=self.assists,
+            deaths=self.death_count,
+            kda=(self.kills + self.assists) / self.death_count if self.death_count else 0.0,
+            score=self.score_sum / rounds_played,
+        )
+
+
+class StatsScorer:
+    '''
+    `MatchStatsColumns`에 담긴 매치들의 점수를 한 번에 계산하고, 그 점수로 플레이어의 `RollingStats`를 갱신합니다.
+
+    일반 매치의 점수는 `A + B / win_place + C * damage_dealt / 100 + D * assists`이고, 랭크 매치는 `E`점입니다.
+    그 밖의 매치 타입은 0점이지만 판 수에는 포함됩니다. 플레이어의 점수는 매치 점수의 평균입니다.
+    '''
+
+    A = -2.7557
+    B = 13.2481
+    C = 3.5403
+    D = 1.4424
+    E = 1.2
+
+    def calculate_match_scores(self, columns: MatchStatsColumns) -> np.ndarray:
+        is_normal = columns.match_type == MatchStatsColumns.MATCH_TYPE_CODES[MatchType.NORMAL.value]
+        is_ranked = columns.match_type == MatchStatsColumns.MATCH_TYPE_CODES[MatchType.RANKED.value]
+        unknown_match_num = int(np.count_nonzero(~(is_normal | is_ranked)))
+        if unknown_match_num:
+            cprint(f"알 수 없는 매치 타입의 매치 {unknown_match_num}개는 0점으로 계산합니다.", 'red')
+
+        inverse_win_place = np.divide(1.0, columns.win_place, out=np.zeros_like(columns.win_place), where=columns.win_place > 0)
+        normal_scores = StatsScorer.A + StatsScorer.B * inverse_win_place + StatsScorer.C * (columns.damage_dealt / 100) + StatsScorer.D * columns.assists
+        return np.where(is_normal, normal_scores, np.where(is_ranked, StatsScorer.E, 0.0))
+
+    def update_rolling_stats(self, rolling_stats: RollingStats, rows: Iterable[tuple], match_types: List[MatchType], max_match_num: int) -> bool:
+        '''
+        `SQLiteDBHandler.get_new_player_match_stats_rows`로 조회한 행들을 `rolling_stats`에 반영하고, 바뀐 내용이 있는지 반환합니다.
+        게임 모드나 매치 타입이 다른 행은 점수에 반영하지 않지만 `last_seq`는 넘어가므로 다음에 다시 조회하지 않습니다.
+        '''
+        return self.update_rolling_stats_list([rolling_stats], [rows], match_types, max_match_num)[0]
+
+    def update_rolling_stats_list(
+        self, rolling_stats_list: List[RollingStats], rows_list: List[Iterable[tuple]], match_types: List[MatchType], max_match_num: int
+    ) -> List[bool]:
+        '''
+        여러 플레이어의 롤링 스탯에 각자의 행들을 반영하고, 플레이어마다 바뀐 내용이 있는지 반환합니다.
+        모든 플레이어의 매치 점수는 `calculate_match_scores` 한 번으로 계산하므로 점수 공식은 한 곳에만 있습니다.
+        `last_seq` 이하의 행은 이미 반영된 행이므로 건너뜁니다.
+        '''
+        window_rows_list = []
+        is_updated_list = []
+        for rolling_stats, rows in zip(rolling_stats_list, rows_list):
+            last_seq = rolling_stats.last_seq
+            window_rows = []
+            for seq, match_id, date, game_mode, match_type, win_place, damage_dealt, kills, assists in rows:
+                if seq <= last_seq:
+                    continue
+                rolling_stats.last_seq = max(rolling_stats.last_seq, seq)
+                match_type = MatchType.from_string(match_type)
+                if game_mode == rolling_stats.game_mode.value and match_type in match_types:
+                    window_rows.append((match_id, date, match_type, win_place, damage_dealt, kills, assists))
+            window_rows_list.append(window_rows)
+            is_updated_list.append(rolling_stats.last_seq > last_seq)
+
+        # 플레이어별로 모인 순서 그대로 컬럼 배열을 만드므로 점수도 같은 순서로 나옵니다.
+        columns = MatchStatsColumns.from_rows(
+            (match_type.value, win_place, damage_dealt, assists, kills)
+            for window_rows in window_rows_list
+            for _, _, match_type, win_place, damage_dealt, kills, assists in window_rows
+        )
+        scores = iter(self.calculate_match_scores(columns).tolist())
+        for rolling_stats, window_rows in zip(rolling_stats_list, window_rows_list):
+            for (match_id, date, _, win_place, damage_dealt, kills, assists), score in zip(window_rows, scores):
+                rolling_stats.push([match_id, date or '', score, win_place, damage_dealt, kills, assists], max_match_num)
+        return is_updated_list
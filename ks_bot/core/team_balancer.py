@@ -0,0 +1,211 @@
+from dataclasses import dataclass, field
+import math
+import random
+import time
+from typing import Dict, List, Tuple
+
+from ks_bot.common.error import *
+
+
+@dataclass
+class Team:
+    player_names: List[str] = field(default_factory=list)
+    score: float = 0.0
+
+
+@dataclass
+class TeamBalanceResult:
+    teams: List[Team] = field(default_factory=list)
+    spread: float = 0.0  # 점수 합이 가장 높은 팀과 가장 낮은 팀의 차이
+    is_optimal: bool = False  # 완전 탐색을 시간 안에 끝마쳐 최적해임이 보장되는지 여부
+    elapsed_time: float = 0.0  # sec
+
+
+class TeamBalancer:
+    '''
+    플레이어별 점수를 받아, 팀 점수 합이 가장 높은 팀과 가장 낮은 팀의 차이(spread)가 가장 작아지도록 플레이어를 팀으로 나눕니다.
+
+    먼저 점수가 높은 플레이어부터 점수 합이 가장 낮은 팀에 배치한 뒤, 두 팀 사이의 플레이어 교환으로 차이를 줄입니다.
+    교환으로 더 줄일 수 없으면 무작위로 몇 명을 맞바꾼 뒤 다시 교환하는 과정을 반복하여 지역 최적해를 벗어납니다.
+    플레이어가 `EXACT_SEARCH_MAX_PLAYER_NUM`명 이하이면 이 결과를 상한으로 삼아 모든 분할을 분기 한정법으로 탐색합니다.
+    어느 경우든 `time_budget`초가 지나면 그때까지 찾은 가장 좋은 결과를 반환합니다.
+    '''
+
+    DEFAULT_TIME_BUDGET = 0.05  # sec
+    DEFAULT_TEAM_SIZE = 4
+    EXACT_SEARCH_MAX_PLAYER_NUM = 12
+    EPSILON = 1e-9
+    DEADLINE_CHECK_INTERVAL = 1024
+    PERTURBATION_SWAP_NUM = 2
+    MAX_STALE_PERTURBATION_NUM = 300
+
+    def __init__(self, time_budget: float = DEFAULT_TIME_BUDGET, seed: int = None):
+        self.time_budget = time_budget
+        self._random = random.Random(seed)
+
+    def get_team_sizes(self, player_num: int, team_num: int = None, team_size: int = DEFAULT_TEAM_SIZE) -> List[int]:
+        '''
+        `team_num`개의 팀 인원을 최대한 고르게 나눈 목록을 반환합니다. `team_num`이 없으면 `team_size`명씩 채웠을 때 필요한 팀 수를 사용합니다.
+        '''
+        if team_num is None:
+            team_num = math.ceil(player_num / team_size) if team_size and team_size > 0 else 0
+        if team_num <= 0 or player_num < team_num or (team_size and player_num > team_num * team_size):
+            raise TeamSizeError_Balancer(player_num=player_num, team_num=team_num, team_size=team_size)
+
+        base_size, extra_num = divmod(player_num, team_num)
+        return [base_size + 1 if idx < extra_num else base_size for idx in range(team_num)]
+
+    def balance(self, player_scores: Dict[str, float], team_num: int = None, team_size: int = DEFAULT_TEAM_SIZE) -> TeamBalanceResult:
+        start_time = time.perf_counter()
+        deadline = start_time + self.time_budget
+
+        # 점수 내림차순으로 정렬한 플레이어의 인덱스로 계산합니다.
+        player_names = sorted(player_scores, key=lambda player_name: player_scores[player_name], reverse=True)
+        scores = [float(player_scores[player_name]) for player_name in player_names]
+        team_sizes = self.get_team_sizes(len(player_names), team_num, team_size)
+
+        teams = self._assign_greedy(scores, team_sizes)
+        teams = self._improve_by_swaps(scores, teams, deadline)
+        is_optimal = False
+        if len(player_names) <= TeamBalancer.EXACT_SEARCH_MAX_PLAYER_NUM:
+            teams, is_optimal = self._search_exact(scores, team_sizes, teams, deadline)
+        elif len(team_sizes) > 1:
+            teams = self._improve_by_perturbation(scores, teams, deadline)
+
+        return TeamBalanceResult(
+            teams=[Team(player_names=[player_names[idx] for idx in sorted(team)], score=sum(scores[idx] for idx in team)) for team in teams],
+            spread=self._get_spread(scores, teams),
+            is_optimal=is_optimal,
+            elapsed_time=time.perf_counter() - start_time,
+        )
+
+    def _get_spread(self, scores: List[float], teams: List[List[int]]) -> float:
+        team_scores = [sum(scores[idx] for idx in team) for team in teams]
+        return max(team_scores) - min(team_scores)
+
+    def _assign_greedy(self, scores: List[float], team_sizes: List[int]) -> List[List[int]]:
+        teams = [[] for _ in team_sizes]
+        team_scores = [0.0 for _ in team_sizes]
+        for idx, score in enumerate(scores):
+            team_idx = min(
+                (team_idx for team_idx, team_size in enumerate(team_sizes) if len(teams[team_idx]) < team_size),
+                key=lambda team_idx: team_scores[team_idx],
+            )
+            teams[team_idx].append(idx)
+            team_scores[team_idx] += score
+        return teams
+
+    def _improve_by_swaps(self, scores: List[float], teams: List[List[int]], deadline: float) -> List[List[int]]:
+        '''
+        점수 합이 높은 팀의 플레이어와 낮은 팀의 플레이어를 맞바꿔 두 팀의 차이를 줄이는 교환을 더 이상 없을 때까지 반복합니다.
+        차이가 d인 두 팀에서 점수 차이가 0과 d 사이인 두 플레이어를 바꾸면 팀 점수 제곱합이 항상 줄어들므로 반복은 반드시 끝납니다.
+        '''
+        teams = [list(team) for team in teams]
+        team_scores = [sum(scores[idx] for idx in team) for team in teams]
+        is_improved = True
+        while is_improved and time.perf_counter() < deadline:
+            is_improved = False
+            team_order = sorted(range(len(teams)), key=lambda team_idx: team_scores[team_idx], reverse=True)
+            for high_order, high_team_idx in enumerate(team_order):
+                # 가장 낮은 팀부터 비교하며, 차이가 없어지면 더 높은 팀들과도 교환할 필요가 없습니다.
+                for low_team_idx in reversed(team_order[high_order + 1 :]):
+                    gap = team_scores[high_team_idx] - team_scores[low_team_idx]
+                    if gap <= TeamBalancer.EPSILON:
+                        break
+
+                    best_swap: Tuple[int, int] = None
+                    best_error = gap / 2
+                    for high_pos, high_idx in enumerate(teams[high_team_idx]):
+                        for low_pos, low_idx in enumerate(teams[low_team_idx]):
+                            diff = scores[high_idx] - scores[low_idx]
+                            error = abs(gap / 2 - diff)
+                            if TeamBalancer.EPSILON < diff < gap - TeamBalancer.EPSILON and error < best_error:
+                                best_swap, best_error = (high_pos, low_pos), error
+
+                    if best_swap:
+                        high_pos, low_pos = best_swap
+                        high_idx, low_idx = teams[high_team_idx][high_pos], teams[low_team_idx][low_pos]
+                        teams[high_team_idx][high_pos], teams[low_team_idx][low_pos] = low_idx, high_idx
+                        team_scores[high_team_idx] -= scores[high_idx] - scores[low_idx]
+                        team_scores[low_team_idx] += scores[high_idx] - scores[low_idx]
+                        is_improved = True
+                        break
+                if is_improved:
+                    break
+        return teams
+
+    def _improve_by_perturbation(self, scores: List[float], teams: List[List[int]], deadline: float) -> List[List[int]]:
+        '''
+        가장 좋은 분할에서 무작위로 `PERTURBATION_SWAP_NUM`쌍의 플레이어를 맞바꾸고 다시 교환으로 개선하여, spread가 줄어든 경우에만 받아들입니다.
+        시간이 다 되거나 `MAX_STALE_PERTURBATION_NUM`번 연속으로 개선되지 않으면 멈춥니다.
+        '''
+        best_teams = teams
+        best_spread = self._get_spread(scores, teams)
+        stale_num = 0
+        while best_spread > TeamBalancer.EPSILON and stale_num < TeamBalancer.MAX_STALE_PERTURBATION_NUM and time.perf_counter() < deadline:
+            candidate_teams = [list(team) for team in best_teams]
+            for _ in range(TeamBalancer.PERTURBATION_SWAP_NUM):
+                team_idx1, team_idx2 = self._random.sample(range(len(candidate_teams)), 2)
+                pos1, pos2 = self._random.randrange(len(candidate_teams[team_idx1])), self._random.randrange(len(candidate_teams[team_idx2]))
+                candidate_teams[team_idx1][pos1], candidate_teams[team_idx2][pos2] = candidate_teams[team_idx2][pos2], candidate_teams[team_idx1][pos1]
+
+            candidate_teams = self._improve_by_swaps(scores, candidate_teams, deadline)
+            candidate_spread = self._get_spread(scores, candidate_teams)
+            if candidate_spread < best_spread - TeamBalancer.EPSILON:
+                best_teams, best_spread = candidate_teams, candidate_spread
+                stale_num = 0
+            else:
+                stale_num += 1
+        return best_teams
+
+    def _search_exact(self, scores: List[float], team_sizes: List[int], best_teams: List[List[int]], deadline: float) -> Tuple[List[List[int]], bool]:
+        '''
+        점수가 높은 플레이어부터 각 팀에 배치하는 모든 경우를 탐색합니다. 인원이 같은 빈 팀들은 서로 바꿔도 같은 분할이므로 그중 하나에만 배치하고,
+        남은 플레이어로 만들 수 있는 최소 spread가 지금까지의 최선보다 작지 않으면 더 탐색하지 않습니다.
+        시간 안에 탐색을 마쳤는지 여부를 함께 반환합니다.
+        '''
+        best_spread = self._get_spread(scores, best_teams)
+        best_teams = [list(team) for team in best_teams]
+        teams = [[] for _ in team_sizes]
+        team_scores = [0.0 for _ in team_sizes]
+        node_count = 0
+        is_timeout = False
+
+        def search(idx: int) -> None:
+            nonlocal best_spread, best_teams, node_count, is_timeout
+            node_count += 1
+            if node_count % TeamBalancer.DEADLINE_CHECK_INTERVAL == 0 and time.perf_counter() > deadline:
+                is_timeout = True
+            if is_timeout:
+                return
+
+            if idx == len(scores):
+                spread = max(team_scores) - min(team_scores)
+                if spread < best_spread - TeamBalancer.EPSILON:
+                    best_spread, best_teams = spread, [list(team) for team in teams]
+                return
+
+            # 남은 플레이어는 점수 내림차순이므로 scores[idx]가 최댓값, scores[-1]이 최솟값입니다.
+            max_remaining_score, min_remaining_score = scores[idx], scores[-1]
+            lowest_max_score = max(team_scores[team_idx] + (team_sizes[team_idx] - len(teams[team_idx])) * min_remaining_score for team_idx in range(len(teams)))
+            highest_min_score = min(team_scores[team_idx] + (team_sizes[team_idx] - len(teams[team_idx])) * max_remaining_score for team_idx in range(len(teams)))
+            if lowest_max_score - highest_min_score >= best_spread - TeamBalancer.EPSILON:
+                return
+
+            tried_empty_team_sizes = set()
+            for team_idx, team in enumerate(teams):
+                if len(team) == team_sizes[team_idx]:
+                    continue
+                if not team:
+                    if team_sizes[team_idx] in tried_empty_team_sizes:
+                        continue
+                    tried_empty_team_sizes.add(team_sizes[team_idx])
+
+                team.append(idx)
+                team_scores[team_idx] += scores[idx]
+                search(idx + 1)
+                team.pop()
+                team_scores[team_idx] -= scores[idx]
+
+        search(0)
+        return best_teams, not is_timeout
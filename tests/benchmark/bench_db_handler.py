@@ -0,0 +1,81 @@
+'''
+player_match_stats 저장 경로별 처리량(rows/s)을 비교하는 벤치마크입니다.
+
+    PYTHONPATH=. python tests/benchmark/bench_db_handler.py --rows 5000
+'''
+
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+from ks_bot.core.db_handler import *
+
+
+def make_player_match_stats_list(row_num: int, player_num: int = 8) -> List[PlayerMatchStats]:
+    return [
+        PlayerMatchStats(
+            player_name=f'player{idx % player_num}',
+            match_id=f'match-{idx // player_num}',
+            game_mode=GameMode.SQUAD,
+            match_type=MatchType.NORMAL,
+            damage_dealt=float(idx % 500),
+            kills=idx % 7,
+            win_place=idx % 25 + 1,
+            time_survived=idx % 1800,
+        )
+        for idx in range(row_num)
+    ]
+
+
+async def bench_per_row_insert(db_handler: SQLiteDBHandler, player_match_stats_list: List[PlayerMatchStats]) -> float:
+    start_time = time.perf_counter()
+    for player_match_stats in player_match_stats_list:
+        await db_handler.insert_player_match_stats(player_match_stats)
+    return time.perf_counter() - start_time
+
+
+async def bench_per_row_update(db_handler: SQLiteDBHandler, player_match_stats_list: List[PlayerMatchStats]) -> float:
+    start_time = time.perf_counter()
+    for player_match_stats in player_match_stats_list:
+        await db_handler.update_player_match_stats(player_match_stats)
+    return time.perf_counter() - start_time
+
+
+async def bench_bulk_upsert(db_handler: SQLiteDBHandler, player_match_stats_list: List[PlayerMatchStats]) -> float:
+    start_time = time.perf_counter()
+    await db_handler.bulk_upsert_player_match_stats(player_match_stats_list)
+    return time.perf_counter() - start_time
+
+
+async def main(row_num: int):
+    player_match_stats_list = make_player_match_stats_list(row_num)
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        results = {}
+        for name, bench_funcs in [
+            ('per-row insert + update', [bench_per_row_insert, bench_per_row_update]),
+            ('bulk upsert (insert + update)', [bench_bulk_upsert, bench_bulk_upsert]),
+        ]:
+            db_handler = SQLiteDBHandler(os.path.join(temp_dir, f'{len(results)}.db'))
+            await db_handler.init()
+            try:
+                player_names = {player_match_stats.player_name for player_match_stats in player_match_stats_list}
+                await db_handler.bulk_upsert_players([Player(id=f'account.{player_name}', normalized_id=player_name, name=player_name) for player_name in player_names])
+                results[name] = [await bench_func(db_handler, player_match_stats_list) for bench_func in bench_funcs]
+            finally:
+                await db_handler.close()
+
+    print(f'rows: {row_num}')
+    for name, elapsed_times in results.items():
+        rows_per_sec_str = ', '.join([f'{row_num / elapsed_time:,.0f} rows/s' for elapsed_time in elapsed_times])
+        print(f'{name:<32}{rows_per_sec_str}')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, default=5000)
+    args = parser.parse_args()
+
+    asyncio.run(main(args.rows))
@@ -0,0 +1,95 @@
+'''
+PlayerMatchStats 한 행을 SQLite 값으로 인코딩/디코딩하는 비용을 RowCodec 도입 전후로 비교하는 마이크로 벤치마크입니다.
+
+    PYTHONPATH=. python tests/benchmark/bench_row_codec.py --rows 100000
+'''
+
+from dataclasses import asdict
+import argparse
+import sqlite3
+import time
+
+from ks_bot.core.db_handler import *
+
+
+def make_player_match_stats(idx: int) -> PlayerMatchStats:
+    return PlayerMatchStats(
+        player_name=f'player{idx % 8}',
+        match_id=f'match-{idx // 8}',
+        is_custom_match=bool(idx % 2),
+        game_mode=GameMode.SQUAD,
+        match_type=MatchType.NORMAL,
+        damage_dealt=float(idx % 500),
+        kills=idx % 7,
+        win_place=idx % 25 + 1,
+        time_survived=idx % 1800,
+    )
+
+
+#### RowCodec 도입 전의 행 변환 방식
+
+
+def legacy_encode_value(value: Any) -> Any:
+    if isinstance(value, (list, dict, bool)) or is_dataclass(value):
+        return json.dumps(value if not isinstance(value, bool) else int(value))
+    elif hasattr(value, 'value'):  # Enum 처리
+        return value.value
+    return value
+
+
+def legacy_encode(player_match_stats: PlayerMatchStats) -> List[Any]:
+    player_match_stats_copy = PlayerMatchStats(**asdict(player_match_stats))
+    return [legacy_encode_value(getattr(player_match_stats_copy, field.name)) for field in fields(player_match_stats_copy)]
+
+
+def legacy_decode(row: tuple, description: tuple) -> PlayerMatchStats:
+    match_stats_data = {field[0]: row[idx] for idx, field in enumerate(description) if field[0] in PlayerMatchStats.__annotations__}
+    player_match_stats = PlayerMatchStats(**match_stats_data)
+    player_match_stats.is_custom_match = True if str(player_match_stats.is_custom_match) == '1' else False
+    player_match_stats.game_mode = GameMode(player_match_stats.game_mode)
+    player_match_stats.match_type = MatchType(player_match_stats.match_type)
+    return player_match_stats
+
+
+def bench(func, args_list: List[tuple]) -> float:
+    start_time = time.perf_counter()
+    for args in args_list:
+        func(*args)
+    return (time.perf_counter() - start_time) / len(args_list) * 1e6
+
+
+def main(row_num: int):
+    player_match_stats_list = [make_player_match_stats(idx) for idx in range(row_num)]
+    row_codec = RowCodec(PlayerMatchStats)
+
+    # 실제 조회와 같은 형태의 행과 cursor.description을 얻기 위해 메모리 DB에 저장한 뒤 다시 읽습니다.
+    conn = sqlite3.connect(':memory:')
+    conn.execute(SQLiteDBHandler.SQL_CREATE_PLAYER_MATCH_STATS_TABLE)
+    conn.executemany(row_codec.get_insert_query('player_match_stats'), [row_codec.encode(stats) for stats in player_match_stats_list])
+    cursor = conn.execute(f'SELECT {row_codec.columns_str} FROM player_match_stats')
+    rows = cursor.fetchall()
+    description = cursor.description
+    assert all(legacy_decode(row, description) == row_codec.decode(row) for row in rows[:100])
+
+    results = {
+        'encode': (
+            bench(legacy_encode, [(stats,) for stats in player_match_stats_list]),
+            bench(row_codec.encode, [(stats,) for stats in player_match_stats_list]),
+        ),
+        'decode': (
+            bench(legacy_decode, [(row, description) for row in rows]),
+            bench(row_codec.decode, [(row,) for row in rows]),
+        ),
+    }
+
+    print(f'rows: {row_num}')
+    for name, (legacy_cost, codec_cost) in results.items():
+        print(f'{name:<8}before {legacy_cost:6.2f} us/row    after {codec_cost:6.2f} us/row    ({legacy_cost / codec_cost:.1f}x)')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, default=100000)
+    args = parser.parse_args()
+
+    main(args.rows)
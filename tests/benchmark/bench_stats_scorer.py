@@ -0,0 +1,91 @@
+'''
+여러 플레이어의 매치 점수를 매치 객체를 하나씩 순회하여 계산하는 방식과 StatsScorer의 벡터 연산을 비교하는 벤치마크입니다.
+
+    PYTHONPATH=. python tests/benchmark/bench_stats_scorer.py --players 500
+'''
+
+import argparse
+import time
+from typing import Dict
+
+from ks_bot.common.dataclass import PlayerMatchStats
+from ks_bot.core.stats_scorer import *
+
+
+def make_rows(player_num: int, match_num: int) -> List[tuple]:
+    match_types = [MatchType.NORMAL.value, MatchType.RANKED.value]
+    return [
+        (f'player{player_idx}', match_types[match_idx % 4 == 0], match_idx % 25 + 1, float(37 * match_idx % 500), match_idx % 3, match_idx % 5)
+        for player_idx in range(player_num)
+        for match_idx in range(match_num)
+    ]
+
+
+def make_new_player_match_stats_rows(rows: List[tuple]) -> Dict[str, List[tuple]]:
+    # SQLiteDBHandler.get_new_player_match_stats_rows와 같은 형태의 행을 플레이어별로 만듭니다.
+    new_rows: Dict[str, List[tuple]] = {}
+    for seq, (player_name, match_type, win_place, damage_dealt, assists, kills) in enumerate(rows):
+        date = f'2024-01-01 00:{seq // 60 % 60:02d}:{seq % 60:02d}'
+        new_rows.setdefault(player_name, []).append(
+            (seq + 1, f'match-{seq}', date, GameMode.SQUAD.value, match_type, win_place, damage_dealt, kills, assists)
+        )
+    return new_rows
+
+
+def calculate_match_scores_by_loop(rows: List[tuple]) -> List[float]:
+    # StatsScorer 도입 전 get_stats의 계산 방식입니다.
+    scores = []
+    for player_name, match_type, win_place, damage_dealt, assists, kills in rows:
+        player_match_stats = PlayerMatchStats(
+            player_name=player_name, match_type=MatchType(match_type), win_place=win_place, damage_dealt=damage_dealt, assists=assists, kills=kills
+        )
+        if player_match_stats.match_type == MatchType.NORMAL:
+            scores.append(
+                StatsScorer.A
+                + StatsScorer.B * (1 / player_match_stats.win_place)
+                + StatsScorer.C * (player_match_stats.damage_dealt / 100)
+                + StatsScorer.D * player_match_stats.assists
+            )
+        else:
+            scores.append(StatsScorer.E)
+    return scores
+
+
+def update_rolling_stats(stats_scorer: StatsScorer, new_rows: Dict[str, List[tuple]], match_num: int) -> None:
+    for player_name, rows in new_rows.items():
+        rolling_stats = RollingStats(player_name=player_name, game_mode=GameMode.SQUAD)
+        stats_scorer.update_rolling_stats(rolling_stats, rows, [MatchType.NORMAL, MatchType.RANKED], match_num)
+
+
+def bench(func, *args) -> float:
+    start_time = time.perf_counter()
+    func(*args)
+    return (time.perf_counter() - start_time) * 1000
+
+
+def main(player_num: int, match_num: int):
+    rows = make_rows(player_num, match_num)
+    stats_scorer = StatsScorer()
+    new_rows = make_new_player_match_stats_rows(rows)
+
+    # DB에서 읽은 행부터 매치 점수까지의 경로와, 롤링 스탯을 처음부터 만드는 경로를 측정합니다.
+    results = {
+        'rows -> scores': (
+            bench(calculate_match_scores_by_loop, rows),
+            bench(lambda: stats_scorer.calculate_match_scores(MatchStatsColumns.from_rows(row[1:] for row in rows))),
+        ),
+    }
+
+    print(f'players: {player_num}, matches per player: {match_num}')
+    for name, (loop_time, vectorized_time) in results.items():
+        print(f'{name:<18}loop {loop_time:8.2f} ms    vectorized {vectorized_time:8.2f} ms    ({loop_time / vectorized_time:.1f}x)')
+    print(f'{"rolling stats":<18}{bench(update_rolling_stats, stats_scorer, new_rows, match_num):8.2f} ms')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--players', type=int, default=500)
+    parser.add_argument('--matches', type=int, default=40)
+    args = parser.parse_args()
+
+    main(args.players, args.matches)
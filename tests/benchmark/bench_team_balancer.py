@@ -0,0 +1,41 @@
+'''
+로비 크기별로 TeamBalancer가 팀을 나누는 데 걸리는 시간과 팀 점수 합의 차이(spread)를 측정하는 벤치마크입니다.
+
+    PYTHONPATH=. python tests/benchmark/bench_team_balancer.py --repeat 20
+'''
+
+import argparse
+import random
+import statistics
+
+from ks_bot.core.team_balancer import *
+
+
+def make_player_scores(player_num: int, score_random: random.Random) -> Dict[str, float]:
+    return {f'player{idx}': max(0.0, score_random.gauss(8, 4)) for idx in range(player_num)}
+
+
+def main(repeat: int, time_budget: float):
+    score_random = random.Random(0)
+    team_balancer = TeamBalancer(time_budget=time_budget, seed=0)
+
+    print(f'time budget: {time_budget * 1000:.0f} ms, repeat: {repeat}')
+    for player_num, team_size in [(8, 4), (12, 4), (16, 4), (32, 4), (64, 4), (100, 4), (100, 2)]:
+        results = [team_balancer.balance(make_player_scores(player_num, score_random), team_size=team_size) for _ in range(repeat)]
+        elapsed_times = [result.elapsed_time * 1000 for result in results]
+        spreads = [result.spread for result in results]
+        optimal_num = sum(result.is_optimal for result in results)
+        print(
+            f'{player_num:>3} players / {team_size} per team    '
+            f'avg {statistics.mean(elapsed_times):6.2f} ms    max {max(elapsed_times):6.2f} ms    '
+            f'avg spread {statistics.mean(spreads):6.3f}    optimal {optimal_num}/{repeat}'
+        )
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--time-budget', type=float, default=TeamBalancer.DEFAULT_TIME_BUDGET)
+    args = parser.parse_args()
+
+    main(args.repeat, args.time_budget)
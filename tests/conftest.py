@@ -1,10 +1,14 @@
+import asyncio
 import pytest
 import re
+import time
 from functools import wraps
+from aiohttp import web
 
 from ks_bot.core.db_handler import SQLiteDBHandler
 from ks_bot.core.request_handler import APIRequestHandler, HttpMethod
 from ks_bot.core.pubg_balancer import PUBG_Balancer
+from ks_bot.core.match_cache import MatchCache
 from ks_bot.utils import *
 
 TEST_DB = 'test_history.db'
@@ -24,8 +28,75 @@ async def api_request_handler():
     api_key = get_pubg_token()
     platform = 'steam'
     base_url = f'https://api.pubg.com/shards/{platform}'
-    api_request_handler = APIRequestHandler(api_key=api_key, base_url=base_url)
-    return api_request_handler
+    async with APIRequestHandler(api_key=api_key, base_url=base_url) as api_request_handler:
+        yield api_request_handler
+
+
+@pytest.fixture
+async def local_api_server():
+    async def handle_seasons(request: web.Request) -> web.Response:
+        return web.json_response({'data': [], 'links': {'self': str(request.url)}, 'meta': {}})
+
+    async def handle_limited(request: web.Request) -> web.Response:
+        # 첫 요청은 429로 거절하고, 이후 요청은 남은 요청 수를 헤더로 알려줍니다.
+        request_count['limited'] += 1
+        reset_timestamp = str(time.time() + 0.3)
+        if request_count['limited'] == 1:
+            return web.json_response({}, status=429, headers={'X-RateLimit-Remaining': '0', 'X-RateLimit-Reset': reset_timestamp})
+        return web.json_response({'count': request_count['limited']}, headers={'X-RateLimit-Remaining': '9', 'X-RateLimit-Reset': reset_timestamp})
+
+    async def handle_always_limited(request: web.Request) -> web.Response:
+        # 항상 429로 거절하며, 쿼리로 retry_after를 주면 Retry-After 헤더로 알려줍니다.
+        request_count['always_limited'] += 1
+        headers = {'Retry-After': request.query['retry_after']} if 'retry_after' in request.query else {}
+        return web.json_response({}, status=429, headers=headers)
+
+    async def handle_slow(request: web.Request) -> web.Response:
+        request_count['slow'] += 1
+        await asyncio.sleep(0.1)
+        return web.json_response({'count': request_count['slow']})
+
+    async def handle_players(request: web.Request) -> web.Response:
+        request_count['players'] += 1
+        filter_value = request.query.get('filter[playerNames]') or request.query.get('filter[playerIds]')
+        player_names = [player_name for player_name in filter_value.split(',') if not player_name.startswith('unknown')]
+        if not player_names:
+            return web.json_response({'errors': [{'title': 'Not Found'}]}, status=404)
+        return web.json_response({'data': [make_player_data(player_name) for player_name in player_names]})
+
+    async def handle_player(request: web.Request) -> web.Response:
+        request_count['players'] += 1
+        return web.json_response({'data': make_player_data(request.match_info['player_id'].replace('account.', ''))})
+
+    async def handle_match(request: web.Request) -> web.Response:
+        request_count['matches'] += 1
+        return web.json_response(make_match_data(request.match_info['match_id']))
+
+    request_count = {'limited': 0, 'always_limited': 0, 'slow': 0, 'players': 0, 'matches': 0}
+    app = web.Application()
+    app.router.add_get('/shards/steam/matches/{match_id}', handle_match)
+    app.router.add_get('/shards/steam/players', handle_players)
+    app.router.add_get('/shards/steam/players/{player_id}', handle_player)
+    app.router.add_get('/shards/steam/slow', handle_slow)
+    app.router.add_get('/shards/steam/seasons', handle_seasons)
+    app.router.add_get('/shards/steam/limited', handle_limited)
+    app.router.add_get('/shards/steam/always_limited', handle_always_limited)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, '127.0.0.1', 0)
+    await site.start()
+    port = runner.addresses[0][1]
+    yield f'http://127.0.0.1:{port}/shards/steam', request_count
+    await runner.cleanup()
+
+
+@pytest.fixture
+async def local_pubg_balancer(local_api_server, tmp_path):
+    base_url, request_count = local_api_server
+    async with PUBG_Balancer(api_key='', platform='steam', db_init=True) as pubg_balancer:
+        pubg_balancer._api_request_handler.base_url = base_url
+        pubg_balancer._match_cache = await MatchCache(str(tmp_path / 'match_cache')).open()
+        yield pubg_balancer, request_count
 
 
 @pytest.fixture
@@ -36,6 +107,69 @@ async def pubg_balancer():
         yield pubg_balancer
 
 
+def make_player_data(player_name: str) -> dict:
+    return {
+        'type': 'player',
+        'id': f'account.{player_name}',
+        'attributes': {'name': player_name, 'shardId': 'steam', 'banType': 'Innocent', 'clanId': ''},
+        'relationships': {'matches': {'data': []}},
+    }
+
+
+def make_match_id(idx: int, match_type: str = 'official', game_mode: str = 'squad') -> str:
+    return f'm{idx}-{match_type}-{game_mode}'
+
+
+def make_match_data(match_id: str, participant_num: int = 8) -> dict:
+    # make_match_id()로 만든 매치 id에서 매치 타입과 게임 모드를 읽어 매치 응답을 만듭니다.
+    idx, match_type, game_mode = match_id.split('-', 2)
+    idx = int(idx[1:])
+    participants = []
+    for participant_idx in range(participant_num):
+        stats = {
+            'name': f'player{participant_idx}',
+            'DBNOs': idx,
+            'boosts': idx,
+            'damageDealt': float(100 * idx + participant_idx),
+            'deathType': 'byplayer',
+            'headshotKills': idx,
+            'heals': idx,
+            'winPlace': participant_idx + 1,
+            'killPlace': participant_idx + 1,
+            'killStreaks': idx,
+            'kills': idx,
+            'assists': participant_idx,
+            'longestKill': 1.0,
+            'revives': idx,
+            'rideDistance': 1.0,
+            'swimDistance': 1.0,
+            'walkDistance': 1.0,
+            'roadKills': 0,
+            'teamKills': 0,
+            'timeSurvived': 100 * idx,
+            'vehicleDestroys': 0,
+            'weaponsAcquired': idx,
+        }
+        participants.append({'type': 'participant', 'id': f'{match_id}-{participant_idx}', 'attributes': {'stats': stats}})
+
+    return {
+        'data': {
+            'type': 'match',
+            'id': match_id,
+            'attributes': {
+                'isCustomMatch': match_type == 'custom',
+                'gameMode': game_mode,
+                'matchType': match_type,
+                'mapName': 'Baltic_Main',
+                'duration': 1800,
+                'seasonState': 'progress',
+                'createdAt': f'2024-01-01T00:{59 - idx % 60:02d}:00Z',
+            },
+        },
+        'included': participants + [{'type': 'roster', 'id': f'{match_id}-roster'}],
+    }
+
+
 def validate_dict_structure(schema: dict, target_dict: dict) -> bool:
     for key, value_type in schema.items():
         if key not in target_dict:
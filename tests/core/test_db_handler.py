@@ -1,4 +1,5 @@
-from typing import List, Tuple
+from dataclasses import replace
+from typing import List, Set, Tuple
 import pytest
 import asyncio
 from conftest import PARAMETRIZE_INDICATOR, async_exception_test
@@ -6,6 +7,7 @@ from testdata import *
 
 
 from ks_bot.core.db_handler import *
+from ks_bot.core.stats_scorer import StatsScorer
 
 
 @pytest.mark.asyncio
@@ -239,5 +241,702 @@ async def test_update_player_match_stats(
     assert result == expected[1]
 
 
+@pytest.mark.asyncio
+@pytest.mark.parametrize(  # normalized_id: str, player_name: str
+    PARAMETRIZE_INDICATOR,
+    [
+        (
+            (
+                (),
+                (
+                    TestData_PlayerMatchStats.EXAMPLE_PLAYER_MATCH_STATS1,
+                    TestData_PlayerMatchStats.EXAMPLE_PLAYER_MATCH_STATS2,
+                    TestData_PlayerMatchStats.EXAMPLE_PLAYER_MATCH_STATS3,
+                ),
+            ),
+            3,
+        ),
+        (
+            (
+                (TestData_PlayerMatchStats.EXAMPLE_PLAYER_MATCH_STATS1,),
+                (
+                    TestData_PlayerMatchStats.EXAMPLE_PLAYER_MATCH_STATS1,
+                    TestData_PlayerMatchStats.EXAMPLE_PLAYER_MATCH_STATS2,
+                ),
+            ),
+            1,
+        ),
+    ],
+)
+@async_exception_test()
+async def test_insert_player_match_stats_list(
+    db_handler: SQLiteDBHandler, input: Tuple[Tuple[Tuple[Player, PlayerMatchStats]], Tuple[Tuple[Player, PlayerMatchStats]]], expected: int
+):
+    for player in {player.normalized_id: player for player, _ in input[0] + input[1]}.values():
+        await db_handler.insert_player(player)
+    for _, player_match_stats in input[0]:
+        await db_handler.insert_player_match_stats(player_match_stats)
+
+    result = await db_handler.insert_player_match_stats_list([player_match_stats for _, player_match_stats in input[1]])
+    assert result == expected
+    for _, player_match_stats in input[1]:
+        assert await db_handler.get_player_match_stats(player_match_stats.player_name, player_match_stats.match_id) == player_match_stats
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(  # normalized_id: str, player_name: str
+    PARAMETRIZE_INDICATOR,
+    [
+        (
+            (
+                (
+                    TestData_PlayerMatchStats.EXAMPLE_PLAYER_MATCH_STATS1,
+                    TestData_PlayerMatchStats.EXAMPLE_PLAYER_MATCH_STATS2,
+                ),
+                (
+                    TestData_PlayerMatchStats.EXAMPLE_PLAYER_MATCH_STATS5,
+                    TestData_PlayerMatchStats.EXAMPLE_PLAYER_MATCH_STATS3,
+                ),
+            ),
+            (
+                TestData_PlayerMatchStats.EXAMPLE_PLAYER_MATCH_STATS5,
+                TestData_PlayerMatchStats.EXAMPLE_PLAYER_MATCH_STATS2,
+                TestData_PlayerMatchStats.EXAMPLE_PLAYER_MATCH_STATS3,
+            ),
+        ),
+    ],
+)
+@async_exception_test()
+async def test_bulk_upsert_player_match_stats(
+    db_handler: SQLiteDBHandler,
+    input: Tuple[Tuple[Tuple[Player, PlayerMatchStats]], Tuple[Tuple[Player, PlayerMatchStats]]],
+    expected: Tuple[Tuple[Player, PlayerMatchStats]],
+):
+    for player in {player.normalized_id: player for player, _ in input[0] + input[1]}.values():
+        await db_handler.insert_player(player)
+
+    for player_match_stats_list in input:
+        result = await db_handler.bulk_upsert_player_match_stats([player_match_stats for _, player_match_stats in player_match_stats_list])
+        assert result == len(player_match_stats_list)
+
+    for _, player_match_stats in expected:
+        assert await db_handler.get_player_match_stats(player_match_stats.player_name, player_match_stats.match_id) == player_match_stats
+    row_count = (await db_handler._execute_query("SELECT COUNT(*) FROM player_match_stats"))[0][0]
+    assert row_count == len(expected)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(  # normalized_id: str, player_name: str
+    PARAMETRIZE_INDICATOR,
+    [
+        (
+            (
+                TestData_Player.EXAMPLE_PLAYER1_4,
+                (TestData_Player.EXAMPLE_PLAYER1_3, TestData_Player.EXAMPLE_PLAYER2),
+            ),
+            (TestData_Player.EXAMPLE_PLAYER1_3, TestData_Player.EXAMPLE_PLAYER2),
+        ),
+    ],
+)
+@async_exception_test()
+async def test_bulk_upsert_players(db_handler: SQLiteDBHandler, input: Tuple[Player, Tuple[Player]], expected: Tuple[Player]):
+    await db_handler.insert_player(input[0])
+    await db_handler.update_discord_id(input[0].name, 'discord_id')
+
+    result = await db_handler.bulk_upsert_players(input[1])
+    assert result == len(input[1])
+
+    for player in expected:
+        assert await db_handler.get_player(player.normalized_id) == player
+    assert await db_handler.get_discord_id(input[0].name) == 'discord_id'
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    PARAMETRIZE_INDICATOR,
+    [
+        (
+            (TestData_Player.EXAMPLE_PLAYER1_4, TestData_Player.EXAMPLE_PLAYER2, TestData_Player.EXAMPLE_PLAYER1_1),
+            (TestData_Player.EXAMPLE_PLAYER1_4, False),
+        ),
+    ],
+)
+@async_exception_test()
+async def test_player_write_atomicity(db_handler: SQLiteDBHandler, input: Tuple[Player, Player, Player], expected: Tuple[Player, bool]):
+    player, new_player, failing_player = input
+    await db_handler.insert_player(player)
+    # 플레이어 행은 저장되더라도 매치 목록 저장이 실패하도록 트리거를 만듭니다.
+    await db_handler._write(
+        f"CREATE TRIGGER fail_player_matches BEFORE INSERT ON player_matches WHEN NEW.player_id = '{failing_player.normalized_id}' "
+        "BEGIN SELECT RAISE(ABORT, 'player_matches failure'); END"
+    )
+
+    # 매치 목록 저장이 실패하면 같은 호출에서 저장한 플레이어 행도 모두 되돌려져야 합니다.
+    with pytest.raises(sqlite3.IntegrityError):
+        await db_handler.bulk_upsert_players([new_player, failing_player])
+    with pytest.raises(sqlite3.IntegrityError):
+        await db_handler.update_player(failing_player)
+    assert await db_handler.get_player(player.normalized_id) == expected[0]
+    assert await db_handler.is_player_exists(new_player.normalized_id) == expected[1]
+    assert (await db_handler._execute_query("SELECT COUNT(*) FROM player_matches"))[0][0] == len(expected[0].match_list)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(  # normalized_id: str, player_name: str
+    PARAMETRIZE_INDICATOR,
+    [
+        (
+            (TestData_Player.EXAMPLE_PLAYER2, TestData_Player.EXAMPLE_PLAYER3, FreshnessEntity.PLAYER),
+            (False, True),
+        ),
+        (
+            (TestData_Player.EXAMPLE_PLAYER2, TestData_Player.EXAMPLE_PLAYER3, FreshnessEntity.RANKED_STATS),
+            (False, True),
+        ),
+    ],
+)
+@async_exception_test()
+async def test_row_scoped_updated_date(db_handler: SQLiteDBHandler, input: Tuple[Player, Player, FreshnessEntity], expected: Tuple[bool, bool]):
+    updated_player, other_player, entity = input
+    await db_handler.insert_player(updated_player, updated_date=datetime_now() - timedelta(days=1))
+    await db_handler.insert_player(other_player, updated_date=datetime_now() - timedelta(days=1))
+    await db_handler.touch_player(other_player.name, [FreshnessEntity.RANKED_STATS], updated_date=datetime_now() - timedelta(days=1))
+
+    if entity == FreshnessEntity.RANKED_STATS:
+        await db_handler.update_rank_stats(updated_player.name, {})
+    else:
+        await db_handler.update_player(updated_player)
+
+    for player, is_outdated in zip([updated_player, other_player], expected):
+        result = await db_handler.is_player_data_outdated(player_name=player.name, expiration_period=timedelta(hours=1), entity=entity)
+        assert result == is_outdated
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(  # dropped_index_name: str
+    PARAMETRIZE_INDICATOR,
+    [
+        (None, set()),
+        ('idx_players_discord_id', {'get_player_name_by_discord_id'}),
+        (
+            'uq_player_match_stats_player_name_match_id',
+            {'get_player_match_stats', 'is_player_match_stats_exists', 'get_player_match_ids', 'get_latest_player_match_stats_list'},
+        ),
+    ],
+)
+@async_exception_test()
+async def test_verify_query_plans(db_handler: SQLiteDBHandler, input: str, expected: Set[str]):
+    if input:
+        await db_handler._execute_query(f"DROP INDEX {input}")
+
+    result = await db_handler.verify_query_plans()
+    assert set(result.keys()) == expected
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(  # normalized_id: str, player_name: str
+    PARAMETRIZE_INDICATOR,
+    [
+        ((TestData_Player.EXAMPLE_PLAYER1_4, TestData_Player.EXAMPLE_PLAYER1_3), TestData_Player.EXAMPLE_PLAYER1_4),
+    ],
+)
+@async_exception_test()
+async def test_wal_reader_pool(db_handler: SQLiteDBHandler, input: Tuple[Player, Player], expected: Player):
+    assert (await db_handler._execute_query("PRAGMA journal_mode"))[0][0] == 'wal'
+    await db_handler.insert_player(input[0])
+
+    # 커밋되지 않은 쓰기 트랜잭션이 있어도 읽기 연결은 막히지 않고 마지막으로 커밋된 데이터를 조회합니다.
+    await db_handler.conn.execute("UPDATE players SET name = ? WHERE normalized_id = ?", ('uncommitted_name', input[1].normalized_id))
+    results = await asyncio.gather(*[db_handler.get_player(input[0].normalized_id) for _ in range(db_handler.reader_num * 4)])
+    assert all(result == expected for result in results)
+    await db_handler.conn.rollback()
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    PARAMETRIZE_INDICATOR,
+    [
+        ((TestData_Player.EXAMPLE_PLAYER1_4, 'discord_id'), (TestData_Player.EXAMPLE_PLAYER1_4, 'discord_id')),
+    ],
+)
+@async_exception_test()
+async def test_read_during_direct_write(db_handler: SQLiteDBHandler, input: Tuple[Player, str], expected: Tuple[Player, str]):
+    player, discord_id = input
+    await db_handler.insert_player(player)
+
+    # 직접 쓰기가 잠금을 잡고 있는 동안에도 읽기는 쓰기를 기다리지 않고 바로 반환되어야 합니다.
+    async with db_handler._write_lock:
+        write_task = asyncio.ensure_future(db_handler.update_discord_id(player.name, discord_id))
+        await asyncio.sleep(0)
+        assert await asyncio.wait_for(db_handler.get_player(player.normalized_id), timeout=0.5) == expected[0]
+        assert not write_task.done()
+    await write_task
+    assert await db_handler.get_discord_id(player.name) == expected[1]
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    PARAMETRIZE_INDICATOR,
+    [
+        ((TestData_Player.EXAMPLE_PLAYER1_4, 8), 8),
+    ],
+)
+@async_exception_test()
+async def test_write_concurrent_failure(db_handler: SQLiteDBHandler, input: Tuple[Player, int], expected: int):
+    player, write_num = input
+    await db_handler.insert_player(player)
+
+    # 실패한 쓰기의 롤백이 동시에 실행된 다른 쓰기를 되돌리지 않아야 합니다.
+    writes = [
+        db_handler._write("INSERT INTO player_match_stats (player_name, match_id) VALUES (?, ?)", (player.name, f'match-{idx}')) for idx in range(write_num)
+    ]
+    results = await asyncio.gather(db_handler._write("INSERT INTO missing_table VALUES (?)", (0,)), *writes, return_exceptions=True)
+    assert isinstance(results[0], sqlite3.OperationalError)
+    assert (await db_handler._execute_query("SELECT COUNT(*) FROM player_match_stats"))[0][0] == expected
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(  # normalized_id: str, player_name: str
+    PARAMETRIZE_INDICATOR,
+    [
+        ((*TestData_PlayerMatchStats.EXAMPLE_PLAYER_MATCH_STATS1, 1), ('discord_id', 1)),
+        ((*TestData_PlayerMatchStats.EXAMPLE_PLAYER_MATCH_STATS1, 100), ('discord_id', 1)),
+    ],
+)
+@async_exception_test()
+async def test_write_behind(tmp_path, input: Tuple[Player, PlayerMatchStats, int], expected: Tuple[str, int]):
+    player, player_match_stats, flush_size = input
+    db_file = str(tmp_path / 'write_behind.db')
+    db_handler = SQLiteDBHandler(db_file, write_behind=True, flush_size=flush_size, flush_interval=60)
+    await db_handler.init()
+
+    await db_handler.insert_player(player)
+    await db_handler.update_discord_id(player.name, 'discord_id')
+    await db_handler.insert_player_match_stats_list([player_match_stats])
+    await db_handler.insert_player_match_stats_list([player_match_stats])
+    if flush_size > 1:
+        assert len(db_handler._pending_writes) > 0
+
+    # 대기 중인 쓰기가 있어도 조회 결과에는 반영되어야 합니다.
+    assert await db_handler.get_discord_id(player.name) == expected[0]
+    assert len(db_handler._pending_writes) == 0
+
+    await db_handler.update_discord_id(player.name, 'pending_discord_id')
+    await db_handler.close()
+
+    # close() 시 대기 중인 쓰기가 모두 커밋되어야 합니다.
+    reopened_db_handler = await SQLiteDBHandler(db_file).open()
+    assert await reopened_db_handler.get_discord_id(player.name) == 'pending_discord_id'
+    assert (await reopened_db_handler._execute_query("SELECT COUNT(*) FROM player_match_stats"))[0][0] == expected[1]
+    await reopened_db_handler.close()
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    PARAMETRIZE_INDICATOR,
+    [
+        (TestData_PlayerMatchStats.EXAMPLE_PLAYER_MATCH_STATS1, 1),
+    ],
+)
+@async_exception_test()
+async def test_write_behind_commit_failure(tmp_path, input: Tuple[Player, PlayerMatchStats], expected: int):
+    player, player_match_stats = input
+    db_handler = SQLiteDBHandler(str(tmp_path / 'write_behind.db'), write_behind=True, flush_size=100, flush_interval=60)
+    await db_handler.init()
+
+    # 외래 키 검사를 커밋 시점으로 미루면, 플레이어가 없는 매치 스탯은 실행은 되지만 커밋에서 실패합니다.
+    await db_handler._write("PRAGMA defer_foreign_keys = ON")
+    await db_handler.insert_player_match_stats_list([player_match_stats])
+    pending_writes = list(db_handler._pending_writes)
+    with pytest.raises(sqlite3.IntegrityError):
+        await db_handler.flush()
+    assert db_handler._pending_writes == pending_writes
+
+    # 되돌려 놓은 배치는 다음 flush에서 새로 들어온 쓰기와 함께 다시 커밋됩니다.
+    await db_handler.insert_player(player)
+    await db_handler.flush()
+    assert db_handler._pending_writes == []
+    assert (await db_handler._execute_query("SELECT COUNT(*) FROM player_match_stats"))[0][0] == expected
+    await db_handler.close()
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(  # normalized_id: str, player_name: str
+    PARAMETRIZE_INDICATOR,
+    [
+        (
+            (
+                replace(TestData_Player.EXAMPLE_PLAYER1_1, match_list=TestData_Player.EXAMPLE_PLAYER1_1.match_list[10:18]),
+                replace(TestData_Player.EXAMPLE_PLAYER1_1, match_list=TestData_Player.EXAMPLE_PLAYER1_1.match_list[7:16]),
+            ),
+            [10, 9, 8, 7, 6, 5, 4, 3, 2],
+        ),
+        (
+            (
+                replace(TestData_Player.EXAMPLE_PLAYER1_1, match_list=TestData_Player.EXAMPLE_PLAYER1_1.match_list[10:18]),
+                TestData_Player.EXAMPLE_PLAYER1_4,
+            ),
+            [],
+        ),
+    ],
+)
+@async_exception_test()
+async def test_player_matches(db_handler: SQLiteDBHandler, input: Tuple[Player, Player], expected: List[int]):
+    await db_handler.insert_player(input[0])
+    await db_handler.update_player(input[1])
+
+    result = await db_handler.get_player(input[1].normalized_id)
+    assert result == input[1]
+
+    # 이미 저장된 매치의 position은 유지되고 새 매치만 뒤에 이어 붙습니다.
+    rows = await db_handler._execute_query(
+        "SELECT position FROM player_matches WHERE player_id = ? ORDER BY position DESC", (input[1].normalized_id,)
+    )
+    assert [row[0] for row in rows] == expected
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(  # normalized_id: str, player_name: str
+    PARAMETRIZE_INDICATOR,
+    [
+        (
+            replace(TestData_Player.EXAMPLE_PLAYER1_3, rank_stats={'squad': {'roundsPlayed': 10}}, normal_stats={'squad': {'kills': 3}}),
+            replace(TestData_Player.EXAMPLE_PLAYER1_3, rank_stats={'squad': {'roundsPlayed': 10}}, normal_stats={'squad': {'kills': 3}}),
+        ),
+    ],
+)
+@async_exception_test()
+async def test_lazy_player_stats(db_handler: SQLiteDBHandler, input: Player, expected: Player):
+    await db_handler.insert_player(input)
+
+    result = await db_handler.get_player(input.normalized_id)
+    assert result.get_raw_json_field('rank_stats') is not None
+    assert result.get_raw_json_field('normal_stats') is not None
+
+    # 파싱하지 않은 스탯은 JSON 문자열 그대로 다시 저장됩니다.
+    await db_handler.update_player(result)
+    assert result.get_raw_json_field('rank_stats') is not None
+
+    assert result.rank_stats == expected.rank_stats
+    assert result.get_raw_json_field('rank_stats') is None
+    assert await db_handler.get_player(input.normalized_id) == expected
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(  # normalized_id: str, player_name: str
+    PARAMETRIZE_INDICATOR,
+    [
+        (TestData_Player.EXAMPLE_PLAYER1_3, TestData_Player.EXAMPLE_PLAYER1_3),
+    ],
+)
+@async_exception_test()
+async def test_migrate_legacy_db(tmp_path, input: Player, expected: Player):
+    # schema_version 테이블이 없고, players 테이블에 새 컬럼이 없으며 match_list를 JSON으로 저장하고 player_match_stats에 seq가 없던 이전 버전의 DB를 만듭니다.
+    db_file = str(tmp_path / 'history.db')
+    conn = sqlite3.connect(db_file)
+    conn.execute(
+        'CREATE TABLE players (id TEXT, normalized_id TEXT UNIQUE, name TEXT UNIQUE, platform TEXT, ban_type TEXT, clan_id TEXT, '
+        'rank_stats TEXT, normal_stats TEXT, match_list TEXT, updated_date DATETIME)'
+    )
+    conn.execute(create_table_query_for_dataclass_with_constraints(PlayerMatchStats_DB, 'player_match_stats'))
+    conn.execute(
+        'INSERT INTO players (id, normalized_id, name, platform, ban_type, clan_id, rank_stats, normal_stats, match_list, updated_date) '
+        'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+        (
+            input.id,
+            input.normalized_id,
+            input.name,
+            input.platform,
+            input.ban_type,
+            input.clan_id,
+            json.dumps(input.rank_stats),
+            json.dumps(input.normal_stats),
+            json.dumps({'data': input.match_list}),
+            datetime_now(),
+        ),
+    )
+    conn.executemany('INSERT INTO player_match_stats (player_name, match_id) VALUES (?, ?)', [(input.name, 'match-1'), (input.name, 'match-1')])
+    conn.commit()
+    conn.close()
+
+    db_handler = SQLiteDBHandler(db_file)
+    db_handler.MIGRATION_BATCH_SIZE = 1
+    await db_handler.open()
+    try:
+        assert await db_handler.get_schema_version() == SQLiteDBHandler.MIGRATIONS[-1].version
+        assert await db_handler.get_player(input.normalized_id) == expected
+        assert (await db_handler._execute_query("SELECT match_list FROM players WHERE normalized_id = ?", (input.normalized_id,)))[0][0] is None
+        assert (await db_handler._execute_query("SELECT COUNT(*) FROM player_match_stats"))[0][0] == 1
+        assert await db_handler._is_index_exists(SQLiteDBHandler.PLAYER_MATCH_STATS_UNIQUE_INDEX)
+
+        # 남은 행의 rowid는 seq로 옮겨지고, 지워진 행의 seq는 다시 사용되지 않습니다.
+        assert await db_handler._execute_query("SELECT seq FROM player_match_stats") == [(2,)]
+        await db_handler._execute_query("DELETE FROM player_match_stats")
+        await db_handler.insert_player_match_stats(PlayerMatchStats(player_name=input.name, match_id='match-2'))
+        assert await db_handler._execute_query("SELECT seq FROM player_match_stats") == [(3,)]
+
+        # 이미 최신 버전인 DB를 다시 열면 아무 마이그레이션도 적용하지 않습니다.
+        assert await db_handler.migrate() == []
+    finally:
+        await db_handler.close()
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(  # normalized_id: str, player_name: str
+    PARAMETRIZE_INDICATOR,
+    [
+        (TestData_Player.EXAMPLE_PLAYER1_3, (TestData_Player.EXAMPLE_PLAYER1_3, SQLiteDBHandler.MIGRATIONS[-1].version)),
+    ],
+)
+@async_exception_test()
+async def test_migration_rollback(db_handler: SQLiteDBHandler, input: Player, expected: Tuple[Player, int]):
+    async def failing_migration():
+        await db_handler.conn.execute("DELETE FROM players")
+        await db_handler.conn.execute("CREATE TABLE broken_table (id TEXT)")
+        raise sqlite3.OperationalError('failing migration')
+
+    await db_handler.insert_player(input)
+    db_handler.failing_migration = failing_migration
+    db_handler.MIGRATIONS = SQLiteDBHandler.MIGRATIONS + [Migration(99, 'failing migration', migrate='failing_migration')]
+    with pytest.raises(sqlite3.OperationalError):
+        await db_handler.migrate()
+
+    expected_player, expected_version = expected
+    assert await db_handler.get_player(input.normalized_id) == expected_player
+    assert await db_handler.get_schema_version() == expected_version
+    assert (await db_handler._execute_query("SELECT COUNT(*) FROM sqlite_master WHERE name = 'broken_table'"))[0][0] == 0
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(  # normalized_id: str, player_name: str
+    PARAMETRIZE_INDICATOR,
+    [
+        (
+            (TestData_Player.EXAMPLE_PLAYER1_3, TestData_PlayerMatchStats.EXAMPLE_PLAYER_MATCH_STATS1[1]),
+            ('1234', replace(TestData_PlayerMatchStats.EXAMPLE_PLAYER_MATCH_STATS1[1], kills=99)),
+        ),
+    ],
+)
+@async_exception_test()
+async def test_read_cache(db_handler: SQLiteDBHandler, input: Tuple[Player, PlayerMatchStats], expected: Tuple[str, PlayerMatchStats]):
+    player, player_match_stats = input
+    expected_discord_id, expected_player_match_stats = expected
+    await db_handler.insert_player(replace(player, name=player_match_stats.player_name))
+    await db_handler.insert_player_match_stats(player_match_stats)
+
+    # 플레이어 행은 한 번만 조회하고, 존재 여부와 갱신 시각은 캐시된 행으로 확인합니다.
+    await db_handler.get_player(player.normalized_id)
+    assert await db_handler.is_player_exists(player_name=player_match_stats.player_name)
+    assert not await db_handler.is_player_data_outdated(player_name=player_match_stats.player_name)
+    assert db_handler.get_cache_stats()['player'].misses == 1
+    assert db_handler.get_cache_stats()['player'].hits == 2
+
+    await db_handler.update_discord_id(player_match_stats.player_name, expected_discord_id)
+    assert await db_handler.get_discord_id(player_match_stats.player_name) == expected_discord_id
+    assert db_handler.get_cache_stats()['player'].invalidations == 1
+
+    assert await db_handler.get_player_match_stats(player_match_stats.player_name, player_match_stats.match_id) == player_match_stats
+    assert await db_handler.is_player_match_stats_exists(player_match_stats.player_name, player_match_stats.match_id)
+    await db_handler.update_player_match_stats(expected_player_match_stats)
+    assert await db_handler.get_player_match_stats(player_match_stats.player_name, player_match_stats.match_id) == expected_player_match_stats
+    assert db_handler.get_cache_stats()['player_match_stats'].misses == 2
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(  # normalized_id: str, player_name: str
+    PARAMETRIZE_INDICATOR,
+    [
+        ((TestData_Player.EXAMPLE_PLAYER1_3, ['111', '222', '333']), ['222', '333']),
+    ],
+)
+@async_exception_test()
+async def test_read_cache_concurrent_write(db_handler: SQLiteDBHandler, input: Tuple[Player, List[str]], expected: List[str]):
+    player, discord_ids = input
+    await db_handler.insert_player(player)
+    await db_handler.update_discord_id(player.name, discord_ids[0])
+
+    # 쓰기가 커밋되기 전에 시작된 조회가 이전 행을 캐시하더라도, 커밋 뒤의 조회는 새 값을 읽어야 합니다.
+    results = []
+    for discord_id in discord_ids[1:]:
+        await asyncio.gather(db_handler.update_discord_id(player.name, discord_id), db_handler.get_discord_id(player.name))
+        results.append(await db_handler.get_discord_id(player.name))
+    assert results == expected
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(  # normalized_id: str, player_name: str
+    PARAMETRIZE_INDICATOR,
+    [
+        ((TestData_Player.EXAMPLE_PLAYER1_3, RetentionPolicy(max_match_num=2)), (['match-4', 'match-3'], 3)),
+        ((TestData_Player.EXAMPLE_PLAYER1_3, RetentionPolicy(max_match_num=10, max_age=timedelta(days=2))), (['match-4', 'match-3'], 3)),
+        ((TestData_Player.EXAMPLE_PLAYER1_3, RetentionPolicy(max_match_num=10)), (['match-4', 'match-3', 'match-2', 'match-1', 'match-0'], 0)),
+    ],
+)
+@async_exception_test()
+async def test_prune_player_match_stats(tmp_path, db_handler: SQLiteDBHandler, input: Tuple[Player, RetentionPolicy], expected: Tuple[List[str], int]):
+    player, retention_policy = input
+    retention_policy = replace(retention_policy, archive_db_file=str(tmp_path / 'archive.db'))
+    db_handler.PRUNE_BATCH_SIZE = 2
+    await db_handler.insert_player(player)
+    for idx in range(5):
+        match = Match(id=f'match-{idx}', game_mode=GameMode.SQUAD, match_type=MatchType.NORMAL, date=datetime_now() - timedelta(days=4 - idx, hours=1))
+        await db_handler.insert_match(match)
+        await db_handler.insert_player_match_stats(
+            PlayerMatchStats(player_name=player.name, match_id=match.id, game_mode=match.game_mode, match_type=match.match_type, win_place=1)
+        )
+
+    expected_match_ids, expected_pruned_num = expected
+    assert await db_handler.prune_player_match_stats(retention_policy) == expected_pruned_num
+    result = await db_handler.get_latest_player_match_stats_list(player.name, GameMode.SQUAD, [MatchType.NORMAL], 10)
+    assert [player_match_stats.match_id for player_match_stats in result] == expected_match_ids
+
+    if expected_pruned_num:
+        archive_conn = sqlite3.connect(retention_policy.archive_db_file)
+        assert archive_conn.execute("SELECT COUNT(*) FROM player_match_stats").fetchone()[0] == expected_pruned_num
+        archive_conn.close()
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(  # normalized_id: str, player_name: str
+    PARAMETRIZE_INDICATOR,
+    [
+        (TestData_Player.EXAMPLE_PLAYER1_3, 2),
+    ],
+)
+@async_exception_test()
+async def test_incremental_vacuum(db_handler: SQLiteDBHandler, input: Player, expected: int):
+    assert (await db_handler._execute_query("PRAGMA auto_vacuum"))[0][0] == expected
+
+    await db_handler.insert_player(input)
+    await db_handler.bulk_upsert_player_match_stats(
+        [PlayerMatchStats(player_name=input.name, match_id=f'match-{idx}', death_type='x' * 1000) for idx in range(200)]
+    )
+    await db_handler._execute_query("DELETE FROM player_match_stats")
+    freelist_count = (await db_handler._execute_query("PRAGMA freelist_count"))[0][0]
+    assert freelist_count > 10
+
+    assert await db_handler.incremental_vacuum(10) == 10
+    assert (await db_handler._execute_query("PRAGMA freelist_count"))[0][0] == freelist_count - 10
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(  # normalized_id: str, player_name: str
+    PARAMETRIZE_INDICATOR,
+    [
+        ((TestData_Player.EXAMPLE_PLAYER1_3, RetentionPolicy(max_match_num=10)), (['match-1', 'match-2', 'match-3'], True)),
+        ((TestData_Player.EXAMPLE_PLAYER1_3, RetentionPolicy(max_match_num=2)), (['match-1', 'match-2', 'match-3'], False)),
+    ],
+)
+@async_exception_test()
+async def test_rolling_stats(db_handler: SQLiteDBHandler, input: Tuple[Player, RetentionPolicy], expected: Tuple[List[str], bool]):
+    player, retention_policy = input
+    await db_handler.insert_player(player)
+    for idx in range(4):
+        match = Match(id=f'match-{idx}', game_mode=GameMode.SQUAD, match_type=MatchType.NORMAL, date=datetime_now() - timedelta(days=4 - idx))
+        await db_handler.insert_match(match)
+        await db_handler.insert_player_match_stats(
+            PlayerMatchStats(player_name=player.name, match_id=match.id, game_mode=match.game_mode, match_type=match.match_type, win_place=idx + 1)
+        )
+
+    expected_match_ids, is_kept = expected
+    assert await db_handler.get_rolling_stats(player.name, GameMode.SQUAD) is None
+    rolling_stats = RollingStats(player_name=player.name, game_mode=GameMode.SQUAD)
+    rows = await db_handler.get_new_player_match_stats_rows(player.name, rolling_stats.last_seq)
+    assert StatsScorer().update_rolling_stats(rolling_stats, rows, [MatchType.NORMAL], 3)
+    assert [window_match[0] for window_match in rolling_stats.window_matches] == expected_match_ids
+    await db_handler.upsert_rolling_stats(rolling_stats)
+
+    assert await db_handler.get_rolling_stats(player.name, GameMode.SQUAD) == rolling_stats
+    assert await db_handler.get_new_player_match_stats_rows(player.name, rolling_stats.last_seq) == []
+
+    # window에 들어 있는 매치가 정리되면 롤링 스탯도 함께 지워집니다.
+    await db_handler.prune_player_match_stats(retention_policy)
+    assert (await db_handler.get_rolling_stats(player.name, GameMode.SQUAD) == rolling_stats) == is_kept
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(  # normalized_id: str, player_name: str
+    PARAMETRIZE_INDICATOR,
+    [
+        (
+            (TestData_Player.EXAMPLE_PLAYER1_3, TestData_Player.EXAMPLE_PLAYER2),
+            ({TestData_Player.EXAMPLE_PLAYER1_3.name, TestData_Player.EXAMPLE_PLAYER2.name}, {TestData_Player.EXAMPLE_PLAYER2.name}),
+        ),
+    ],
+)
+@async_exception_test()
+async def test_leaderboard_entries(db_handler: SQLiteDBHandler, input: Tuple[Player, Player], expected: Tuple[Set[str], Set[str]]):
+    await db_handler.insert_match(Match(id='match-0', game_mode=GameMode.SQUAD, match_type=MatchType.NORMAL))
+    for player in input:
+        await db_handler.insert_player(player)
+        await db_handler.insert_player_match_stats(PlayerMatchStats(player_name=player.name, match_id='match-0'))
+    expected_new_player_names, expected_player_names_without_rolling_stats = expected
+    assert await db_handler.get_max_player_match_stats_seq() == len(input)
+    rows_by_player = await db_handler.get_unscored_player_match_stats_rows(GameMode.SQUAD, 0)
+    assert set(rows_by_player) == expected_new_player_names
+    assert all(len(rows) == 1 for rows in rows_by_player.values())
+    assert await db_handler.get_unscored_player_match_stats_rows(GameMode.SQUAD, len(input)) == {}
+
+    leaderboard_entries = [LeaderboardEntry(player_name=player.name, game_mode=GameMode.SQUAD, score=float(idx), rounds_played=20) for idx, player in enumerate(input)]
+    await db_handler.bulk_upsert_leaderboard_entries(leaderboard_entries)
+    leaderboard_entries[0].score = 10.0
+    await db_handler.bulk_upsert_leaderboard_entries(leaderboard_entries[:1])
+    assert sorted(await db_handler.get_leaderboard_entries(GameMode.SQUAD), key=lambda entry: entry.player_name) == sorted(
+        leaderboard_entries, key=lambda entry: entry.player_name
+    )
+    assert await db_handler.get_leaderboard_entries(GameMode.SOLO) == []
+
+    rolling_stats = RollingStats(player_name=input[0].name, game_mode=GameMode.SQUAD, last_seq=len(input))
+    await db_handler.upsert_rolling_stats(rolling_stats)
+    assert await db_handler.get_leaderboard_player_names_without_rolling_stats(GameMode.SQUAD) == expected_player_names_without_rolling_stats
+    assert await db_handler.get_rolling_stats_with_new_match_stats(GameMode.SQUAD, 0) == {input[0].name: rolling_stats}
+    # 롤링 스탯이 지워진 리더보드 플레이어는 기준점과 관계없이 모든 행을 다시 조회하고, 롤링 스탯에 반영된 행은 조회하지 않습니다.
+    assert await db_handler.get_unscored_player_match_stats_rows(GameMode.SQUAD, len(input)) == {
+        player_name: rows_by_player[player_name] for player_name in expected_player_names_without_rolling_stats
+    }
+
+    await db_handler.delete_leaderboard_entries([input[0].name], GameMode.SQUAD)
+    assert await db_handler.get_leaderboard_entries(GameMode.SQUAD) == leaderboard_entries[1:]
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(  # last_seqs
+    PARAMETRIZE_INDICATOR,
+    [
+        ([], 0),
+        ([3], 3),
+        # 기준점은 뒤로 돌아가지 않습니다.
+        ([3, 1], 3),
+        ([3, 5], 5),
+    ],
+)
+@async_exception_test()
+async def test_leaderboard_last_seq(db_handler: SQLiteDBHandler, input: List[int], expected: int):
+    for last_seq in input:
+        await db_handler.update_leaderboard_last_seq(GameMode.SQUAD, last_seq)
+    assert await db_handler.get_leaderboard_last_seq(GameMode.SQUAD) == expected
+    assert await db_handler.get_leaderboard_last_seq(GameMode.SOLO) == 0
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(  # dataclass_instance
+    PARAMETRIZE_INDICATOR,
+    [
+        (TestData_PlayerMatchStats.EXAMPLE_PLAYER_MATCH_STATS1[1], TestData_PlayerMatchStats.EXAMPLE_PLAYER_MATCH_STATS1[1]),
+        (
+            Match_DB(id='match-1', is_custom_match=True, game_mode=GameMode.SQUAD, match_type=MatchType.RANKED, date=unix_time_start()),
+            Match_DB(id='match-1', is_custom_match=True, game_mode=GameMode.SQUAD, match_type=MatchType.RANKED, date=unix_time_start()),
+        ),
+    ],
+)
+@async_exception_test()
+async def test_row_codec(db_handler: SQLiteDBHandler, input: Any, expected: Any):
+    row_codec = db_handler._get_row_codec(type(input))
+    assert db_handler._get_row_codec(type(input)) is row_codec
+
+    result = row_codec.decode(row_codec.encode(input))
+    assert result == expected
+
+
 if __name__ == '__main__':
     pytest.main(['-sx', '-v', __file__])
@@ -0,0 +1,87 @@
+from typing import List, Tuple
+import pytest
+from conftest import PARAMETRIZE_INDICATOR, async_exception_test
+
+
+from ks_bot.core.leaderboard import *
+
+
+def make_leaderboard_entries(scores: List[float]) -> List[LeaderboardEntry]:
+    return [LeaderboardEntry(player_name=f'player{idx}', game_mode=GameMode.SQUAD, score=score, rounds_played=20) for idx, score in enumerate(scores)]
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    PARAMETRIZE_INDICATOR,
+    [
+        (([3.0, 1.0, 2.0, 5.0], 'player0'), (2, 4, 2)),
+        (([3.0, 1.0, 2.0, 5.0], 'player1'), (4, 4, 0)),
+        # 점수가 같은 플레이어는 같은 순위입니다.
+        (([2.0, 2.0, 1.0, 5.0], 'player1'), (2, 4, 1)),
+        (([3.0], 'player0'), (1, 1, 0)),
+        (([3.0], 'player1'), LeaderboardEntryNotFoundError_Balancer()),
+    ],
+)
+@async_exception_test()
+async def test_get_rank(input: Tuple[List[float], str], expected: Tuple[int, int, int]):
+    scores, player_name = input
+    leaderboard = Leaderboard(GameMode.SQUAD, make_leaderboard_entries(scores))
+
+    result = leaderboard.get_rank(player_name)
+    assert (result.rank, result.player_num, result.lower_player_num) == expected
+    assert result.percentile == pytest.approx(100 * expected[2] / expected[1])
+    assert result.top_ratio == pytest.approx(100 * expected[0] / expected[1])
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    PARAMETRIZE_INDICATOR,
+    [
+        (([3.0, 1.0, 2.0, 5.0, 4.0], 1, 2), (['player3', 'player4'], 3)),
+        (([3.0, 1.0, 2.0, 5.0, 4.0], 3, 2), (['player1'], 3)),
+        (([3.0, 1.0, 2.0, 5.0, 4.0], 4, 2), ([], 3)),
+        (([], 1, 2), ([], 1)),
+    ],
+)
+@async_exception_test()
+async def test_get_page(input: Tuple[List[float], int, int], expected: Tuple[List[str], int]):
+    scores, page, page_size = input
+    leaderboard = Leaderboard(GameMode.SQUAD, make_leaderboard_entries(scores))
+
+    result = leaderboard.get_page(page, page_size)
+    assert [leaderboard_rank.entry.player_name for leaderboard_rank in result] == expected[0]
+    assert leaderboard.get_page_num(page_size) == expected[1]
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    PARAMETRIZE_INDICATOR,
+    [
+        (
+            ([3.0, 1.0, 2.0], [('player1', 4.0), ('player3', 0.5), ('player1', 4.0)], ['player0']),
+            (['player1', 'player2', 'player3'], [True, True, False]),
+        ),
+    ],
+)
+@async_exception_test()
+async def test_update_remove(input: Tuple[List[float], List[Tuple[str, float]], List[str]], expected: Tuple[List[str], List[bool]]):
+    scores, updates, removed_player_names = input
+    leaderboard = Leaderboard(GameMode.SQUAD, make_leaderboard_entries(scores))
+
+    results = [
+        leaderboard.update(LeaderboardEntry(player_name=player_name, game_mode=GameMode.SQUAD, score=score, rounds_played=20))
+        for player_name, score in updates
+    ]
+    for player_name in removed_player_names:
+        assert leaderboard.remove(player_name)
+        assert not leaderboard.remove(player_name)
+
+    expected_player_names, expected_results = expected
+    assert results == expected_results
+    assert [leaderboard_rank.entry.player_name for leaderboard_rank in leaderboard.get_page(1, 10)] == expected_player_names
+    assert len(leaderboard) == len(expected_player_names)
+    assert all(player_name not in leaderboard for player_name in removed_player_names)
+
+
+if __name__ == '__main__':
+    pytest.main(['-sx', '-v', __file__])
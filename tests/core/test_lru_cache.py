@@ -0,0 +1,69 @@
+from typing import List, Tuple
+import pytest
+from conftest import PARAMETRIZE_INDICATOR, async_exception_test
+
+
+from ks_bot.core.lru_cache import *
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    PARAMETRIZE_INDICATOR,
+    [
+        (
+            (['key-1', 'key-2', 'key-3'], ['key-1']),
+            (['key-1', 'key-3'], ['key-2']),
+        ),
+        (
+            (['key-1', 'key-2', 'key-3'], []),
+            (['key-2', 'key-3'], ['key-1']),
+        ),
+    ],
+)
+@async_exception_test()
+async def test_lru_cache_eviction(input: Tuple[List[str], List[str]], expected: Tuple[List[str], List[str]]):
+    keys, accessed_keys = input
+    kept_keys, evicted_keys = expected
+
+    # 항목 수와 크기 제한이 각각 같은 순서로 항목을 내보내는지 확인합니다.
+    for lru_cache in [LRUCache(max_entries=2), LRUCache(max_size=250, sizeof=lambda value: 100)]:
+        for key in keys[:-1]:
+            lru_cache.put(key, {'key': key})
+        for key in accessed_keys:
+            assert lru_cache.get(key) == {'key': key}
+        lru_cache.put(keys[-1], {'key': keys[-1]})
+
+        assert all(key in lru_cache for key in kept_keys)
+        assert all(key not in lru_cache for key in evicted_keys)
+        assert lru_cache.get_stats().evictions == len(evicted_keys)
+        assert lru_cache.get_stats().hits == len(accessed_keys)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    PARAMETRIZE_INDICATOR,
+    [
+        ('key-1', (None, 1)),
+    ],
+)
+@async_exception_test()
+async def test_lru_cache_invalidate(input: str, expected: Tuple[dict, int]):
+    removed_keys = []
+    lru_cache = LRUCache(on_remove=lambda key, value: removed_keys.append(key))
+    lru_cache.put(input, {'key': input})
+
+    # 조회를 시작한 뒤 무효화된 값은 캐시에 저장하지 않습니다.
+    generation = lru_cache.generation
+    lru_cache.invalidate(input)
+    lru_cache.put(input, {'key': input}, generation)
+
+    expected_value, expected_invalidations = expected
+    assert lru_cache.get(input) == expected_value
+    assert lru_cache.get_stats().invalidations == expected_invalidations
+    assert lru_cache.get_stats().misses == 1
+    assert lru_cache.get_stats().size == 0
+    assert removed_keys == [input]
+
+
+if __name__ == '__main__':
+    pytest.main(['-sx', '-v', __file__])
@@ -0,0 +1,93 @@
+from typing import List, Tuple
+import asyncio
+import os
+import pytest
+from conftest import PARAMETRIZE_INDICATOR, async_exception_test
+
+
+from ks_bot.core.match_cache import *
+
+
+def make_match_data(match_id: str, participant_num: int = 100) -> dict:
+    return {
+        'data': {'type': 'match', 'id': match_id, 'attributes': {'gameMode': 'squad', 'matchType': 'official'}},
+        'included': [{'type': 'participant', 'id': f'{match_id}-{idx}', 'attributes': {'stats': {'name': f'player{idx}'}}} for idx in range(participant_num)],
+    }
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    PARAMETRIZE_INDICATOR,
+    [
+        ('f6a69afd-fb60-45da-8b40-a2e013db0f33', make_match_data('f6a69afd-fb60-45da-8b40-a2e013db0f33')),
+        ('../history', None),
+    ],
+)
+@async_exception_test()
+async def test_put_get_match(tmp_path, input: str, expected: dict):
+    match_cache = await MatchCache(str(tmp_path)).open()
+    await match_cache.put(input, make_match_data(input))
+
+    result = await match_cache.get(input)
+    assert result == expected
+
+    reopened_match_cache = await MatchCache(str(tmp_path)).open()
+    assert await reopened_match_cache.get(input) == expected
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    PARAMETRIZE_INDICATOR,
+    [
+        (
+            (['match-1', 'match-2', 'match-3'], ['match-1']),
+            (['match-1', 'match-3'], ['match-2']),
+        ),
+        (
+            (['match-1', 'match-2', 'match-3'], []),
+            (['match-2', 'match-3'], ['match-1']),
+        ),
+    ],
+)
+@async_exception_test()
+async def test_match_cache_lru_eviction(tmp_path, input: Tuple[List[str], List[str]], expected: Tuple[List[str], List[str]]):
+    match_ids, accessed_match_ids = input
+    match_cache = await MatchCache(str(tmp_path)).open()
+    await match_cache.put(match_ids[0], make_match_data(match_ids[0]))
+    entry_size = match_cache.get_stats().size
+    match_cache.max_size = int(entry_size * 2.5)
+
+    for match_id in match_ids[1:-1]:
+        await match_cache.put(match_id, make_match_data(match_id))
+    for match_id in accessed_match_ids:
+        await match_cache.get(match_id)
+    await match_cache.put(match_ids[-1], make_match_data(match_ids[-1]))
+
+    kept_match_ids, evicted_match_ids = expected
+    assert all(match_id in match_cache for match_id in kept_match_ids)
+    assert all(match_id not in match_cache for match_id in evicted_match_ids)
+    assert all(not os.path.exists(os.path.join(str(tmp_path), f'{match_id}{MatchCache.FILE_EXTENSION}')) for match_id in evicted_match_ids)
+    assert match_cache.get_stats().evictions == len(evicted_match_ids)
+
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    PARAMETRIZE_INDICATOR,
+    [
+        (('match-1', 16), make_match_data('match-1', 5000)),
+    ],
+)
+@async_exception_test()
+async def test_match_cache_concurrent_put(tmp_path, input: Tuple[str, int], expected: dict):
+    match_id, put_num = input
+    match_cache = await MatchCache(str(tmp_path)).open()
+
+    # 같은 매치를 동시에 저장해도 임시 파일이 충돌하지 않고, 남는 임시 파일도 없어야 합니다.
+    await asyncio.gather(*[match_cache.put(match_id, expected) for _ in range(put_num)])
+    assert await match_cache.get(match_id) == expected
+    assert os.listdir(str(tmp_path)) == [f'{match_id}{MatchCache.FILE_EXTENSION}']
+    assert match_cache.get_stats().size == os.path.getsize(os.path.join(str(tmp_path), f'{match_id}{MatchCache.FILE_EXTENSION}'))
+
+if __name__ == '__main__':
+    pytest.main(['-sx', '-v', __file__])
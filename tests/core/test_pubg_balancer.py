@@ -1,7 +1,9 @@
-from conftest import PARAMETRIZE_INDICATOR, validate_dict_structure, async_exception_test
+from conftest import PARAMETRIZE_INDICATOR, validate_dict_structure, async_exception_test, make_match_id
 import pytest
 from ks_bot.core.pubg_balancer import *
 from ks_bot.common.error import *
+from ks_bot.utils import datetime_now
+import time
 from testdata import *
 
 
@@ -61,5 +63,287 @@ async def test_request_clan_data(pubg_balancer: PUBG_Balancer, input: str, expec
     assert validate_dict_structure(schema=expected, target_dict=clan_data)
 
 
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    PARAMETRIZE_INDICATOR,
+    [
+        ([f'player{idx}' for idx in range(25)], ([f'player{idx}' for idx in range(25)], 3)),
+        (['player1', 'player1', 'unknown1', 'player2'], (['player1', 'player2'], 1)),
+        (['unknown1', 'unknown2'], ([], 1)),
+    ],
+)
+@async_exception_test()
+async def test_request_players(local_pubg_balancer: Tuple[PUBG_Balancer, dict], input: List[str], expected: Tuple[List[str], int]):
+    pubg_balancer, request_count = local_pubg_balancer
+    players = await pubg_balancer.request_players(input)
+    assert [player.name for player in players] == expected[0]
+    assert request_count['players'] == expected[1]
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    PARAMETRIZE_INDICATOR,
+    [
+        (
+            ([make_match_id(idx, game_mode='squad' if idx % 2 == 0 else 'solo') for idx in range(10)], 3, 1),
+            ([make_match_id(idx) for idx in [0, 2, 4]], 5),
+        ),
+        (
+            ([make_match_id(idx, game_mode='squad' if idx % 2 == 0 else 'solo') for idx in range(10)], 3, 8),
+            ([make_match_id(idx) for idx in [0, 2, 4]], None),
+        ),
+        (
+            ([make_match_id(idx, match_type='airoyale') for idx in range(4)] + [make_match_id(4)], 3, 2),
+            ([make_match_id(4)], 5),
+        ),
+    ],
+)
+@async_exception_test()
+async def test_get_latest_player_match_stats_list(
+    local_pubg_balancer: Tuple[PUBG_Balancer, dict], input: Tuple[List[str], int, int], expected: Tuple[List[str], int]
+):
+    pubg_balancer, request_count = local_pubg_balancer
+    match_ids, max_match_num, max_concurrent_match_fetches = input
+    pubg_balancer._max_concurrent_match_fetches = max_concurrent_match_fetches
+    await pubg_balancer.insert_player(
+        Player(id='account.player0', normalized_id='player0', name='player0', match_list=[{'type': 'match', 'id': match_id} for match_id in match_ids])
+    )
+
+    player_match_stats_list = await pubg_balancer.get_latest_player_match_stats_list('player0', max_match_num=max_match_num)
+    assert [player_match_stats.match_id for player_match_stats in player_match_stats_list] == expected[0]
+    if expected[1] is not None:
+        assert request_count['matches'] == expected[1]
+
+    # 저장된 매치 정보로 판단할 수 있는 매치는 다시 요청하지 않습니다.
+    match_request_count = request_count['matches']
+    pubg_balancer._match_cache = await MatchCache(pubg_balancer._match_cache.cache_dir + '_empty').open()
+    player_match_stats_list = await pubg_balancer.get_latest_player_match_stats_list('player0', max_match_num=max_match_num)
+    assert [player_match_stats.match_id for player_match_stats in player_match_stats_list] == expected[0]
+    assert request_count['matches'] == match_request_count
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    PARAMETRIZE_INDICATOR,
+    [
+        (
+            ([make_match_id(idx) for idx in range(2, 30)], [make_match_id(idx) for idx in range(30)]),
+            ([make_match_id(idx) for idx in range(2)], 2),
+        ),
+        (
+            ([make_match_id(idx) for idx in range(2, 30)], [make_match_id(idx) for idx in range(2, 30)]),
+            ([], 0),
+        ),
+    ],
+)
+@async_exception_test()
+async def test_sync_player_incremental(local_pubg_balancer: Tuple[PUBG_Balancer, dict], input: Tuple[List[str], List[str]], expected: Tuple[List[str], int]):
+    pubg_balancer, request_count = local_pubg_balancer
+    old_match_ids, new_match_ids = input
+    player = Player(id='account.player0', normalized_id='player0', name='player0', match_list=[{'type': 'match', 'id': match_id} for match_id in old_match_ids])
+    await pubg_balancer.sync_player(player)
+    await pubg_balancer.get_latest_player_match_stats_list('player0', max_match_num=20)
+
+    match_request_count = request_count['matches']
+    player.match_list = [{'type': 'match', 'id': match_id} for match_id in new_match_ids]
+    assert await pubg_balancer.sync_player(player) == expected[0]
+
+    player_match_stats_list = await pubg_balancer.get_latest_player_match_stats_list('player0', max_match_num=20)
+    assert [player_match_stats.match_id for player_match_stats in player_match_stats_list] == new_match_ids[:20]
+    assert request_count['matches'] - match_request_count == expected[1]
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    PARAMETRIZE_INDICATOR,
+    [
+        ((50, [5, 40]), [5, 40]),
+        ((50, [40, 5, 50]), [40, 5, 50]),
+        ((10, [20, 20]), [10, 10]),
+    ],
+)
+@async_exception_test()
+async def test_sync_player_matches_window(local_pubg_balancer: Tuple[PUBG_Balancer, dict], input: Tuple[int, List[int]], expected: List[int]):
+    pubg_balancer, _ = local_pubg_balancer
+    match_num, max_match_nums = input
+    await insert_player_with_matches(pubg_balancer, 'player0', match_num)
+
+    # 앞선 동기화가 max_match_num에서 멈췄더라도, 더 큰 max_match_num으로 다시 요청하면 그만큼의 매치를 반환해야 합니다.
+    results = []
+    for max_match_num in max_match_nums:
+        player_match_stats_list = await pubg_balancer.get_latest_player_match_stats_list('player0', max_match_num=max_match_num)
+        results.append(len(player_match_stats_list))
+    assert results == expected
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    PARAMETRIZE_INDICATOR,
+    [
+        (('', {'squad': {'currentTier': {'tier': 'Gold'}}}), ('', {'squad': {'currentTier': {'tier': 'Gold'}}})),
+        (('clan.new', {'squad': {'currentTier': {'tier': 'Gold'}}}), ('clan.new', {'squad': {'currentTier': {'tier': 'Gold'}}})),
+    ],
+)
+@async_exception_test()
+async def test_sync_player_keeps_stats(local_pubg_balancer: Tuple[PUBG_Balancer, dict], input: Tuple[str, dict], expected: Tuple[str, dict]):
+    pubg_balancer, _ = local_pubg_balancer
+    clan_id, rank_stats = input
+    match_list = [{'type': 'match', 'id': make_match_id(idx)} for idx in range(3)]
+    await pubg_balancer.insert_player(Player(id='account.player0', normalized_id='player0', name='player0', rank_stats=rank_stats, match_list=match_list))
+
+    # 플레이어 API 응답에는 스탯이 비어 있어도 저장된 스탯은 유지됩니다.
+    await pubg_balancer.sync_player(Player(id='account.player0', normalized_id='player0', name='player0', clan_id=clan_id, match_list=match_list))
+    stored_player = await pubg_balancer._db_handler.get_player(normalized_id='player0')
+    assert (stored_player.clan_id, stored_player.rank_stats) == expected
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    PARAMETRIZE_INDICATOR,
+    [
+        ((['player0', 'player1'], 'player1'), (True, 0)),
+        ((['player0'], 'player1'), (False, 1)),
+    ],
+)
+@async_exception_test()
+async def test_ingest_match_participants(local_pubg_balancer: Tuple[PUBG_Balancer, dict], input: Tuple[List[str], str], expected: Tuple[bool, int]):
+    pubg_balancer, request_count = local_pubg_balancer
+    tracked_player_names, target_player_name = input
+    match_id = make_match_id(0)
+    for player_name in tracked_player_names:
+        await pubg_balancer.insert_player(Player(id=f'account.{player_name}', normalized_id=player_name, name=player_name))
+
+    await pubg_balancer.get_player_match_stats('player0', match_id)
+    assert await pubg_balancer._db_handler.is_player_match_stats_exists(target_player_name, match_id) == expected[0]
+    assert not await pubg_balancer._db_handler.is_player_match_stats_exists('player2', match_id)
+
+    # 이미 저장된 매치라면 다시 요청하지 않습니다.
+    pubg_balancer._match_cache = await MatchCache(pubg_balancer._match_cache.cache_dir + '_empty').open()
+    if target_player_name not in tracked_player_names:
+        await pubg_balancer.insert_player(Player(id=f'account.{target_player_name}', normalized_id=target_player_name, name=target_player_name))
+    await pubg_balancer.get_player_match_stats(target_player_name, match_id)
+    assert request_count['matches'] == 1 + expected[1]
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    PARAMETRIZE_INDICATOR,
+    [
+        (timedelta(hours=1), (1, FreshnessStats(hits=1, refreshes=1))),
+        (timedelta(minutes=1), (0, FreshnessStats(hits=2, refreshes=0))),
+    ],
+)
+@async_exception_test()
+async def test_get_player_freshness(local_pubg_balancer: Tuple[PUBG_Balancer, dict], input: timedelta, expected: Tuple[int, FreshnessStats]):
+    pubg_balancer, request_count = local_pubg_balancer
+    player = Player(id='account.player0', normalized_id='player0', name='player0', platform='steam', ban_type='Innocent')
+    await pubg_balancer._db_handler.insert_player(player, updated_date=datetime_now() - input)
+
+    for _ in range(2):
+        assert await pubg_balancer.get_player('player0') == player
+    assert request_count['players'] == expected[0]
+    assert pubg_balancer.get_freshness_stats()[FreshnessEntity.MATCH_LIST] == expected[1]
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    PARAMETRIZE_INDICATOR,
+    [
+        ((['player0', 'player1', 'player2'], 20), (['player0', 'player1', 'player2'], 3)),
+        ((['player0', 'player1', 'player2'], 19), ([], 3)),
+    ],
+)
+@async_exception_test()
+async def test_refresh_leaderboard(local_pubg_balancer: Tuple[PUBG_Balancer, dict], input: Tuple[List[str], int], expected: Tuple[List[str], int]):
+    pubg_balancer, request_count = local_pubg_balancer
+    player_names, match_num = input
+    match_list = [{'type': 'match', 'id': make_match_id(idx)} for idx in range(match_num)]
+    for player_name in player_names:
+        await pubg_balancer.sync_player(Player(id=f'account.{player_name}', normalized_id=player_name, name=player_name, match_list=match_list))
+
+    # 한 플레이어의 매치를 받으면 함께 플레이한 플레이어들의 매치 스탯도 저장되므로, 리더보드 갱신은 API 없이 모든 플레이어의 점수를 계산합니다.
+    await pubg_balancer.get_latest_player_match_stats_list(player_names[0], max_match_num=PUBG_Balancer.DEFAULT_MAX_MATCH_NUM)
+    match_request_count = request_count['matches']
+    expected_player_names, expected_refreshed_num = expected
+    assert await pubg_balancer.refresh_leaderboard() == expected_refreshed_num
+    assert await pubg_balancer.refresh_leaderboard() == 0
+    assert request_count['matches'] == match_request_count
+
+    leaderboard_ranks, page_num = await pubg_balancer.get_leaderboard_page(1)
+    assert [leaderboard_rank.entry.player_name for leaderboard_rank in leaderboard_ranks] == expected_player_names
+    assert page_num == 1
+    for leaderboard_rank in leaderboard_ranks:
+        assert (await pubg_balancer.get_stats(leaderboard_rank.entry.player_name)).score == pytest.approx(leaderboard_rank.entry.score)
+
+    # 다시 연결해도 DB에 저장된 리더보드로 같은 순위를 만들고, DB에 저장된 기준점부터 이어서 갱신합니다.
+    pubg_balancer._leaderboards.clear()
+    assert [leaderboard_rank.entry.player_name for leaderboard_rank in (await pubg_balancer.get_leaderboard_page(1))[0]] == expected_player_names
+    assert await pubg_balancer.refresh_leaderboard() == 0
+
+
+async def insert_player_with_matches(pubg_balancer: PUBG_Balancer, player_name: str, match_num: int) -> None:
+    match_list = [{'type': 'match', 'id': make_match_id(idx)} for idx in range(match_num)]
+    await pubg_balancer.sync_player(Player(id=f'account.{player_name}', normalized_id=player_name, name=player_name, match_list=match_list))
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    PARAMETRIZE_INDICATOR,
+    [
+        (5, (4, 20)),
+        (1, (0, 20)),
+    ],
+)
+@async_exception_test()
+async def test_get_stats_coalescing(local_pubg_balancer: Tuple[PUBG_Balancer, dict], input: int, expected: Tuple[int, int]):
+    pubg_balancer, request_count = local_pubg_balancer
+    await insert_player_with_matches(pubg_balancer, 'player0', 20)
+
+    results = await asyncio.gather(*[pubg_balancer.get_stats('player0') for _ in range(input)])
+    assert all(result == results[0] for result in results)
+    assert (pubg_balancer.stats_coalesced_count, request_count['matches']) == expected
+
+    # TTL 안에서는 다시 계산하지 않고 캐시된 점수를 사용합니다.
+    assert await pubg_balancer.get_stats('player0') == results[0]
+    assert pubg_balancer.get_stats_cache_stats().hits == 1
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    PARAMETRIZE_INDICATOR,
+    [
+        ((timedelta(minutes=5), True, False), (False, False)),
+        ((timedelta(0), True, False), (True, True)),
+        ((timedelta(minutes=5), False, True), (True, True)),
+        ((timedelta(minutes=5), False, False), (False, False)),
+    ],
+)
+@async_exception_test()
+async def test_get_cached_stats(local_pubg_balancer: Tuple[PUBG_Balancer, dict], input: Tuple[timedelta, bool, bool], expected: Tuple[bool, bool]):
+    pubg_balancer, request_count = local_pubg_balancer
+    ttl, is_cached, is_rate_limited = input
+    await insert_player_with_matches(pubg_balancer, 'player0', 20)
+    pubg_balancer._stats_cache_policy = StatsCachePolicy(ttl=ttl)
+    if is_cached:
+        await pubg_balancer.get_stats('player0')
+    else:
+        await pubg_balancer.get_latest_player_match_stats_list('player0', max_match_num=PUBG_Balancer.DEFAULT_MAX_MATCH_NUM)
+    if is_rate_limited:
+        # API 요청 한도를 다 썼고 매치 목록도 오래되어, 새로 계산하려면 한도가 리셋될 때까지 기다려야 하는 상황입니다.
+        pubg_balancer._freshness_policy = FreshnessPolicy(match_list=timedelta(0))
+        pubg_balancer._api_request_handler.rate_limiter.sync(remaining=0, reset_timestamp=time.time() + 60)
+
+    expected_is_stale, expected_is_refreshing = expected
+    result = await asyncio.wait_for(pubg_balancer.get_cached_stats('player0'), timeout=5)
+    assert result.stats.rounds_played == 20
+    assert result.is_stale == expected_is_stale
+    assert ('player0' in pubg_balancer._stats_tasks) == expected_is_refreshing
+    assert request_count['players'] == 0
+    if expected_is_refreshing and not is_rate_limited:
+        # 백그라운드 계산이 끝나면 캐시된 점수가 새로 계산한 점수로 바뀝니다.
+        await pubg_balancer._stats_tasks.get('player0')
+        assert pubg_balancer._stats_cache.get('player0').updated_date > result.updated_date
+
+
 if __name__ == '__main__':
     pytest.main(['-sx', '-v', __file__])
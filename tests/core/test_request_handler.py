@@ -1,6 +1,8 @@
 from conftest import PARAMETRIZE_INDICATOR, validate_dict_structure, async_exception_test
 import pytest
-from typing import List, Dict, Union
+import asyncio
+import time
+from typing import List, Dict, Union, Tuple
 from ks_bot.core.request_handler import *
 from ks_bot.common.error import *
 
@@ -22,5 +24,192 @@ async def test_api_request_handler_get_request(api_request_handler: APIRequestHa
     assert validate_dict_structure(schema=expected, target_dict=result)
 
 
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    PARAMETRIZE_INDICATOR,
+    [
+        (1, (1, 0)),
+        (5, (1, 4)),
+    ],
+)
+@async_exception_test()
+async def test_api_request_handler_connection_reuse(local_api_server: Tuple[str, dict], input: int, expected: Tuple[int, int]):
+    async with APIRequestHandler(api_key='', base_url=local_api_server[0]) as api_request_handler:
+        for _ in range(input):
+            await api_request_handler.request(endpoint='seasons', method=HttpMethod.GET)
+
+        pool_stats = api_request_handler.get_pool_stats()
+        assert (pool_stats.connections_created, pool_stats.connections_reused) == expected
+        assert pool_stats.open_connections == 1
+
+    assert not api_request_handler.is_open
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    PARAMETRIZE_INDICATOR,
+    [
+        ((2, 0.2, 6), list(range(6))),
+        ((1, 0.1, 3), list(range(3))),
+    ],
+)
+@async_exception_test()
+async def test_token_bucket_rate_limiter_fifo(input: Tuple[int, float, int], expected: List[int]):
+    capacity, period, request_num = input
+    rate_limiter = TokenBucketRateLimiter(capacity=capacity, period=period)
+    order = []
+
+    async def worker(idx: int):
+        await rate_limiter.acquire()
+        order.append(idx)
+
+    start = time.monotonic()
+    await asyncio.gather(*[worker(idx) for idx in range(request_num)])
+    elapsed = time.monotonic() - start
+
+    assert order == expected
+    assert elapsed >= (request_num - capacity) * period / capacity * 0.9
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    PARAMETRIZE_INDICATOR,
+    [
+        ((0, 0.3), 0.3),
+        ((5, 0.3), 0.0),
+    ],
+)
+@async_exception_test()
+async def test_token_bucket_rate_limiter_sync(input: Tuple[int, float], expected: float):
+    remaining, reset_after = input
+    rate_limiter = TokenBucketRateLimiter(capacity=10, period=60.0)
+    rate_limiter.sync(remaining=remaining, reset_timestamp=time.time() + reset_after)
+
+    start = time.monotonic()
+    await rate_limiter.acquire()
+    assert time.monotonic() - start == pytest.approx(expected, abs=0.1)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    PARAMETRIZE_INDICATOR,
+    [
+        ((3, 0, 10), 7.0),
+        ((3, 1, 9), 7.0),
+        ((3, 3, 7), 7.0),
+        ((10, 0, 5), 0.0),
+    ],
+)
+@async_exception_test()
+async def test_token_bucket_rate_limiter_sync_in_flight(input: Tuple[int, int, int], expected: float):
+    acquire_num, release_num, remaining = input
+    rate_limiter = TokenBucketRateLimiter(capacity=10, period=60.0)
+    for _ in range(acquire_num):
+        await rate_limiter.acquire()
+    for _ in range(release_num):
+        rate_limiter.release()
+
+    # 새로운 윈도우의 값이라도 아직 응답을 받지 못한 요청만큼은 남은 요청 수에서 빠집니다.
+    rate_limiter.sync(remaining=remaining, reset_timestamp=time.time() + 60.0)
+    assert rate_limiter.in_flight == acquire_num - release_num
+    assert rate_limiter.tokens == pytest.approx(expected, abs=0.01)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    PARAMETRIZE_INDICATOR,
+    [
+        (
+            (60.0, [RequestPriority.BACKGROUND, RequestPriority.BACKGROUND, RequestPriority.INTERACTIVE]),
+            [2, 0, 1],
+        ),
+        (
+            (0.0, [RequestPriority.BACKGROUND, RequestPriority.BACKGROUND, RequestPriority.INTERACTIVE]),
+            [0, 1, 2],
+        ),
+    ],
+)
+@async_exception_test()
+async def test_token_bucket_rate_limiter_priority(input: Tuple[float, List[RequestPriority]], expected: List[int]):
+    starvation_timeout, priorities = input
+    rate_limiter = TokenBucketRateLimiter(capacity=1, period=0.05, starvation_timeout=starvation_timeout)
+    await rate_limiter.acquire()
+    order = []
+
+    async def worker(idx: int, priority: RequestPriority):
+        await rate_limiter.acquire(priority)
+        order.append(idx)
+
+    tasks = [asyncio.create_task(worker(idx, priority)) for idx, priority in enumerate(priorities)]
+    await asyncio.sleep(0)
+    assert rate_limiter.get_stats()[RequestPriority.BACKGROUND].queue_depth == priorities.count(RequestPriority.BACKGROUND)
+
+    await asyncio.gather(*tasks)
+    assert order == expected
+    assert rate_limiter.get_stats()[RequestPriority.BACKGROUND].granted == priorities.count(RequestPriority.BACKGROUND)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    PARAMETRIZE_INDICATOR,
+    [
+        ('limited', {'count': 2}),
+    ],
+)
+@async_exception_test()
+async def test_api_request_handler_rate_limit_retry(local_api_server: Tuple[str, dict], input: str, expected: dict):
+    async with APIRequestHandler(api_key='', base_url=local_api_server[0]) as api_request_handler:
+        result = await api_request_handler.request(endpoint=input, method=HttpMethod.GET)
+        assert result == expected
+        assert api_request_handler.remaining_requests == 9
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    PARAMETRIZE_INDICATOR,
+    [
+        (({'retry_after': '0'}, True, 3), 4),
+        (({'retry_after': '0'}, False, 3), 4),
+        (({}, False, 2), 3),
+        (({}, False, 0), 1),
+    ],
+)
+@async_exception_test()
+async def test_api_request_handler_rate_limit_retry_limit(local_api_server: Tuple[str, dict], input: Tuple[dict, bool, int], expected: int):
+    base_url, request_count = local_api_server
+    params, rate_limited, rate_limit_retries = input
+    async with APIRequestHandler(api_key='', base_url=base_url, rate_limit_retries=rate_limit_retries, rate_limit_backoff=0.01) as api_request_handler:
+        # rate limit을 적용하지 않는 요청도 429 응답을 계속 받으면 정해진 횟수만큼만 다시 요청합니다.
+        with pytest.raises(APIRequestError_Balancer):
+            await asyncio.wait_for(api_request_handler.request(endpoint='always_limited', params=params, rate_limited=rate_limited), timeout=5)
+    assert request_count['always_limited'] == expected
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    PARAMETRIZE_INDICATOR,
+    [
+        (('slow', 5), ({'count': 1}, 4)),
+        (('slow', 1), ({'count': 1}, 0)),
+    ],
+)
+@async_exception_test()
+async def test_api_request_handler_coalescing(local_api_server: Tuple[str, dict], input: Tuple[str, int], expected: Tuple[dict, int]):
+    endpoint, request_num = input
+    async with APIRequestHandler(api_key='', base_url=local_api_server[0]) as api_request_handler:
+        results = await asyncio.gather(*[api_request_handler.request(endpoint=endpoint) for _ in range(request_num)])
+        assert all(result == expected[0] for result in results)
+        assert api_request_handler.coalesced_count == expected[1]
+
+        # 진행 중인 요청이 끝난 뒤에는 새로 요청합니다.
+        result = await api_request_handler.request(endpoint=endpoint)
+        assert result == {'count': expected[0]['count'] + 1}
+
+        # 우선순위가 다른 요청은 합치지 않습니다.
+        results = await asyncio.gather(*[api_request_handler.request(endpoint=endpoint, priority=priority) for priority in RequestPriority])
+        assert max(result['count'] for result in results) == expected[0]['count'] + 1 + len(RequestPriority)
+        assert api_request_handler.coalesced_count == expected[1]
+
+
 if __name__ == '__main__':
     pytest.main(['-sx', '-v', __file__])
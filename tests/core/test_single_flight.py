@@ -0,0 +1,73 @@
+from typing import List, Tuple
+import asyncio
+import pytest
+from conftest import PARAMETRIZE_INDICATOR, async_exception_test
+
+
+from ks_bot.core.single_flight import *
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    PARAMETRIZE_INDICATOR,
+    [
+        (['key-1', 'key-1', 'key-1'], ({'key-1': 1}, 2)),
+        (['key-1', 'key-2', 'key-1'], ({'key-1': 1, 'key-2': 1}, 1)),
+        (['key-1'], ({'key-1': 1}, 0)),
+    ],
+)
+@async_exception_test()
+async def test_single_flight_run(input: List[str], expected: Tuple[dict, int]):
+    single_flight = SingleFlight()
+    call_count = {}
+
+    async def work(key: str) -> str:
+        call_count[key] = call_count.get(key, 0) + 1
+        await asyncio.sleep(0.01)
+        return key
+
+    results = await asyncio.gather(*[single_flight.run(key, lambda key=key: work(key)) for key in input])
+    assert results == input
+    assert (call_count, single_flight.coalesced_count) == expected
+    assert len(single_flight) == 0
+
+    # 진행 중인 작업이 끝난 뒤에는 새로 시작합니다.
+    await single_flight.run(input[0], lambda: work(input[0]))
+    assert call_count[input[0]] == expected[0][input[0]] + 1
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    PARAMETRIZE_INDICATOR,
+    [
+        (3, 'result'),
+    ],
+)
+@async_exception_test()
+async def test_single_flight_cancel(input: int, expected: str):
+    single_flight = SingleFlight()
+    is_started = asyncio.Event()
+
+    async def work() -> str:
+        is_started.set()
+        await asyncio.sleep(0.01)
+        return expected
+
+    # 한 호출자가 취소되어도 같은 작업을 기다리는 다른 호출자는 결과를 받습니다.
+    callers = [asyncio.ensure_future(single_flight.run('key', work)) for _ in range(input)]
+    await is_started.wait()
+    callers[0].cancel()
+    results = await asyncio.gather(*callers, return_exceptions=True)
+    assert isinstance(results[0], asyncio.CancelledError)
+    assert results[1:] == [expected] * (input - 1)
+
+    # cancel_all은 진행 중인 작업 자체를 취소합니다.
+    task = single_flight.get_task('key', work)
+    assert 'key' in single_flight
+    await single_flight.cancel_all()
+    assert task.cancelled()
+    assert 'key' not in single_flight
+
+
+if __name__ == '__main__':
+    pytest.main(['-sx', '-v', __file__])
@@ -0,0 +1,195 @@
+from typing import List, Tuple
+import pytest
+from conftest import PARAMETRIZE_INDICATOR, async_exception_test
+
+
+from ks_bot.common.dataclass import PlayerMatchStats
+from ks_bot.core.stats_scorer import *
+
+
+def make_player_match_stats_list(player_name: str, match_num: int, match_types: List[MatchType] = (MatchType.NORMAL,)) -> List[PlayerMatchStats]:
+    return [
+        PlayerMatchStats(
+            player_name=player_name,
+            match_id=f'{player_name}-match-{idx}',
+            match_type=match_types[idx % len(match_types)],
+            win_place=idx % 25 + 1,
+            damage_dealt=float(37 * idx % 500),
+            assists=idx % 3,
+            kills=idx % 5,
+        )
+        for idx in range(match_num)
+    ]
+
+
+def calculate_match_score_by_loop(player_match_stats: PlayerMatchStats) -> float:
+    # 벡터 연산 결과와 비교하기 위해 매치 하나의 점수를 직접 계산합니다.
+    if player_match_stats.match_type == MatchType.NORMAL:
+        return (
+            StatsScorer.A
+            + StatsScorer.B * (1 / player_match_stats.win_place)
+            + StatsScorer.C * (player_match_stats.damage_dealt / 100)
+            + StatsScorer.D * player_match_stats.assists
+        )
+    elif player_match_stats.match_type == MatchType.RANKED:
+        return StatsScorer.E
+    return 0.0
+
+
+def calculate_stats_by_loop(player_match_stats_list: List[PlayerMatchStats]) -> Stats:
+    # 롤링 스탯 결과와 비교하기 위해 매치를 하나씩 순회하여 계산합니다.
+    rounds_played = len(player_match_stats_list)
+    total_score = sum([calculate_match_score_by_loop(player_match_stats) for player_match_stats in player_match_stats_list])
+
+    kills = sum([match.kills for match in player_match_stats_list])
+    deaths = sum([1 if match.win_place != 1 else 0 for match in player_match_stats_list])
+    assists = sum([match.assists for match in player_match_stats_list])
+    return Stats(
+        rounds_played=rounds_played,
+        avg_rank=sum([match.win_place for match in player_match_stats_list]) / rounds_played,
+        top10_ratio=sum([1 for match in player_match_stats_list if match.win_place <= 10]) / rounds_played,
+        win_ratio=sum([1 for match in player_match_stats_list if match.win_place == 1]) / rounds_played,
+        damage_dealt=sum([match.damage_dealt for match in player_match_stats_list]),
+        kills=kills,
+        assists=assists,
+        deaths=deaths,
+        kda=(kills + assists) / deaths if deaths else 0.0,
+        score=total_score / rounds_played,
+    )
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    PARAMETRIZE_INDICATOR,
+    [
+        (
+            make_player_match_stats_list('player1', 40),
+            [calculate_match_score_by_loop(player_match_stats) for player_match_stats in make_player_match_stats_list('player1', 40)],
+        ),
+        (
+            make_player_match_stats_list('player1', 25, [MatchType.NORMAL, MatchType.RANKED, MatchType.AIROYALE]),
+            [
+                calculate_match_score_by_loop(player_match_stats)
+                for player_match_stats in make_player_match_stats_list('player1', 25, [MatchType.NORMAL, MatchType.RANKED, MatchType.AIROYALE])
+            ],
+        ),
+        ([], []),
+    ],
+)
+@async_exception_test()
+async def test_calculate_match_scores(input: List[PlayerMatchStats], expected: List[float]):
+    columns = MatchStatsColumns.from_rows(
+        (
+            player_match_stats.match_type.value,
+            player_match_stats.win_place,
+            player_match_stats.damage_dealt,
+            player_match_stats.assists,
+            player_match_stats.kills,
+        )
+        for player_match_stats in input
+    )
+    assert StatsScorer().calculate_match_scores(columns).tolist() == pytest.approx(expected)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    PARAMETRIZE_INDICATOR,
+    [
+        (
+            [('official', 1, 100.0, 1, 2), ('unknown', 2, 0.0, 0, 0), ('competitive', 3, 50.0, 2, 1)],
+            ([1, 0, 2], [1.0, 2.0, 3.0], [100.0, 0.0, 50.0]),
+        ),
+        ([], ([], [], [])),
+    ],
+)
+@async_exception_test()
+async def test_match_stats_columns_from_rows(input: List[tuple], expected: tuple):
+    columns = MatchStatsColumns.from_rows(input)
+
+    expected_match_types, expected_win_places, expected_damage_dealts = expected
+    assert columns.match_type.tolist() == expected_match_types
+    assert columns.win_place.tolist() == expected_win_places
+    assert columns.damage_dealt.tolist() == expected_damage_dealts
+
+
+def make_new_player_match_stats_rows(player_match_stats_list: List[PlayerMatchStats], dates: List[int], game_mode: GameMode = GameMode.SQUAD) -> List[tuple]:
+    # SQLiteDBHandler.get_new_player_match_stats_rows와 같은 형태의 행을 저장된 순서대로 만듭니다.
+    return [
+        (
+            seq + 1,
+            player_match_stats.match_id,
+            f'2024-01-{date:02d} 00:00:00',
+            game_mode.value,
+            player_match_stats.match_type.value,
+            player_match_stats.win_place,
+            player_match_stats.damage_dealt,
+            player_match_stats.kills,
+            player_match_stats.assists,
+        )
+        for seq, (player_match_stats, date) in enumerate(zip(player_match_stats_list, dates))
+    ]
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    PARAMETRIZE_INDICATOR,
+    [
+        # 매치가 날짜순으로 저장되면 가장 오래된 매치부터 window에서 밀려납니다.
+        ((make_player_match_stats_list('player1', 28, [MatchType.NORMAL, MatchType.RANKED]), list(range(1, 29)), 20), list(range(8, 28))),
+        # 늦게 저장된 예전 매치는 날짜 순서에 맞는 위치에 들어가며, window보다 오래되었다면 바로 밀려납니다.
+        ((make_player_match_stats_list('player1', 6), [2, 4, 6, 1, 5, 3], 4), [2, 4, 5, 1]),
+        ((make_player_match_stats_list('player1', 3), [1, 2, 3], 5), [0, 1, 2]),
+    ],
+)
+@async_exception_test()
+async def test_update_rolling_stats(input: Tuple[List[PlayerMatchStats], List[int], int], expected: List[int]):
+    player_match_stats_list, dates, max_match_num = input
+    stats_scorer = StatsScorer()
+    rows = make_new_player_match_stats_rows(player_match_stats_list, dates)
+
+    # 행을 하나씩 반영한 결과와 한 번에 반영한 결과가 같아야 합니다.
+    rolling_stats = RollingStats(player_name='player1', game_mode=GameMode.SQUAD)
+    for row in rows:
+        assert stats_scorer.update_rolling_stats(rolling_stats, [row], [MatchType.NORMAL, MatchType.RANKED], max_match_num)
+    batch_rolling_stats = RollingStats(player_name='player1', game_mode=GameMode.SQUAD)
+    stats_scorer.update_rolling_stats(batch_rolling_stats, rows, [MatchType.NORMAL, MatchType.RANKED], max_match_num)
+    assert batch_rolling_stats.window_matches == rolling_stats.window_matches
+    assert rolling_stats.last_seq == len(rows)
+    assert not stats_scorer.update_rolling_stats(rolling_stats, [], [MatchType.NORMAL, MatchType.RANKED], max_match_num)
+    # 이미 반영된 행은 건너뛰고, 여러 플레이어를 한 번에 반영해도 플레이어별로 반영한 결과와 같아야 합니다.
+    assert not stats_scorer.update_rolling_stats(batch_rolling_stats, rows, [MatchType.NORMAL, MatchType.RANKED], max_match_num)
+    rolling_stats_list = [RollingStats(player_name=player_name, game_mode=GameMode.SQUAD) for player_name in ['player0', 'player1']]
+    assert stats_scorer.update_rolling_stats_list(rolling_stats_list, [rows[:1], rows], [MatchType.NORMAL, MatchType.RANKED], max_match_num) == [True, True]
+    assert rolling_stats_list[0].rounds_played == 1
+    assert rolling_stats_list[1].window_matches == rolling_stats.window_matches
+
+    expected_player_match_stats_list = [player_match_stats_list[idx] for idx in expected]
+    assert sorted(window_match[0] for window_match in rolling_stats.window_matches) == sorted(stats.match_id for stats in expected_player_match_stats_list)
+    result = rolling_stats.to_stats()
+    expected_stats = calculate_stats_by_loop(expected_player_match_stats_list)
+    for field_name in ['rounds_played', 'avg_rank', 'top10_ratio', 'win_ratio', 'damage_dealt', 'kills', 'assists', 'deaths', 'kda', 'score']:
+        assert getattr(result, field_name) == pytest.approx(getattr(expected_stats, field_name))
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    PARAMETRIZE_INDICATOR,
+    [
+        ((GameMode.SOLO, MatchType.NORMAL), 0),
+        ((GameMode.SQUAD, MatchType.AIROYALE), 0),
+        ((GameMode.SQUAD, MatchType.NORMAL), 3),
+    ],
+)
+@async_exception_test()
+async def test_update_rolling_stats_filter(input: Tuple[GameMode, MatchType], expected: int):
+    game_mode, match_type = input
+    rows = make_new_player_match_stats_rows(make_player_match_stats_list('player1', 3, [match_type]), [1, 2, 3], game_mode)
+
+    rolling_stats = RollingStats(player_name='player1', game_mode=GameMode.SQUAD)
+    assert StatsScorer().update_rolling_stats(rolling_stats, rows, [MatchType.NORMAL, MatchType.RANKED], 20)
+    assert rolling_stats.rounds_played == expected
+    assert rolling_stats.last_seq == 3
+
+
+if __name__ == '__main__':
+    pytest.main(['-sx', '-v', __file__])
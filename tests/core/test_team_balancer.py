@@ -0,0 +1,78 @@
+from itertools import combinations
+from typing import Dict, List, Tuple
+import random
+import pytest
+from conftest import PARAMETRIZE_INDICATOR, async_exception_test
+
+
+from ks_bot.core.team_balancer import *
+
+
+def make_player_scores(player_num: int, seed: int = 0) -> Dict[str, float]:
+    score_random = random.Random(seed)
+    return {f'player{idx}': max(0.0, score_random.gauss(8, 4)) for idx in range(player_num)}
+
+
+def get_optimal_spread(player_scores: Dict[str, float], team_size: int) -> float:
+    # 완전 탐색 결과와 비교하기 위해 모든 분할을 직접 나열합니다.
+    def search(player_names: List[str]) -> List[List[float]]:
+        if not player_names:
+            return [[]]
+        first, rest = player_names[0], player_names[1:]
+        team_scores_list = []
+        for teammates in combinations(rest, team_size - 1):
+            team_score = player_scores[first] + sum(player_scores[player_name] for player_name in teammates)
+            remaining_player_names = [player_name for player_name in rest if player_name not in teammates]
+            team_scores_list.extend([[team_score] + team_scores for team_scores in search(remaining_player_names)])
+        return team_scores_list
+
+    return min(max(team_scores) - min(team_scores) for team_scores in search(list(player_scores)))
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    PARAMETRIZE_INDICATOR,
+    [
+        (({'a': 10, 'b': 9, 'c': 3, 'd': 2}, 2), 0.0),
+        ((make_player_scores(8, seed=1), 4), get_optimal_spread(make_player_scores(8, seed=1), 4)),
+        ((make_player_scores(9, seed=2), 3), get_optimal_spread(make_player_scores(9, seed=2), 3)),
+        ((make_player_scores(12, seed=3), 4), get_optimal_spread(make_player_scores(12, seed=3), 4)),
+        ((make_player_scores(5, seed=4), 4), TeamSizeError_Balancer()),
+        ((make_player_scores(3, seed=4), 0), TeamSizeError_Balancer()),
+    ],
+)
+@async_exception_test()
+async def test_balance_exact(input: Tuple[Dict[str, float], int], expected: float):
+    player_scores, team_size = input
+    result = TeamBalancer(time_budget=10).balance(player_scores, team_num=len(player_scores) // team_size if team_size else 0, team_size=team_size)
+
+    assert result.is_optimal
+    assert result.spread == pytest.approx(expected)
+    assert all(len(team.player_names) == team_size for team in result.teams)
+    assert sorted(player_name for team in result.teams for player_name in team.player_names) == sorted(player_scores)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    PARAMETRIZE_INDICATOR,
+    [
+        ((make_player_scores(100), 4), ([4] * 25, 0.5)),
+        ((make_player_scores(99), 4), ([4] * 24 + [3], 4.0)),
+        ((make_player_scores(30), 3), ([3] * 10, 0.5)),
+    ],
+)
+@async_exception_test()
+async def test_balance_heuristic(input: Tuple[Dict[str, float], int], expected: Tuple[List[int], float]):
+    player_scores, team_size = input
+    team_balancer = TeamBalancer(seed=0)
+    result = team_balancer.balance(player_scores, team_size=team_size)
+
+    expected_team_sizes, max_spread = expected
+    assert sorted([len(team.player_names) for team in result.teams], reverse=True) == expected_team_sizes
+    assert sorted(player_name for team in result.teams for player_name in team.player_names) == sorted(player_scores)
+    assert result.spread <= max_spread
+    assert result.elapsed_time < team_balancer.time_budget * 2
+
+
+if __name__ == '__main__':
+    pytest.main(['-sx', '-v', __file__])